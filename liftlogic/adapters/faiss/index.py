@@ -5,7 +5,7 @@ Features:
 - Async-compatible operations
 - Index persistence
 - Batch operations
-- Metadata storage alongside vectors
+- Vectors keyed by document ID (IndexIDMap2)
 """
 
 from __future__ import annotations
@@ -13,6 +13,7 @@ from __future__ import annotations
 import asyncio
 import json
 import logging
+from collections.abc import Sequence
 from pathlib import Path
 from typing import Any
 
@@ -21,6 +22,14 @@ import numpy as np
 
 logger = logging.getLogger(__name__)
 
+# Sub-quantizers for IVFPQ (32 bytes per vector); must divide the dimension
+PQ_SUBQUANTIZERS = 32
+# Centroids per sub-quantizer (8-bit codes); PQ training needs this many vectors
+PQ_CENTROIDS = 256
+
+# Index types FAISS can train and fill on a GPU (HNSW and SQfp16 are CPU-only)
+GPU_INDEX_TYPES = ("Flat", "IVFFlat", "IVFPQ")
+
 __all__ = ["FAISSIndex"]
 
 
@@ -30,8 +39,8 @@ class FAISSIndex:
 
     Example:
         >>> index = FAISSIndex(dimension=384)
-        >>> await index.add_vectors(embeddings, metadata_list)
-        >>> results = await index.search(query_embedding, k=10)
+        >>> await index.add_vectors(embeddings, doc_ids)
+        >>> hits = await index.search(query_embedding, k=10)  # [(doc_id, score), ...]
     """
 
     def __init__(
@@ -39,40 +48,78 @@ class FAISSIndex:
         dimension: int = 384,
         index_type: str = "IVFFlat",
         nlist: int = 100,
+        nprobe: int = 16,
+        use_gpu: bool = False,
     ) -> None:
         """
         Initialize FAISS index.
 
         Args:
             dimension: Vector dimension (384 for MiniLM, 768 for MPNet)
-            index_type: Index type ("Flat", "IVFFlat", "HNSW")
-            nlist: Number of clusters for IVF index
+            index_type: Index type ("Flat", "SQfp16", "IVFFlat", "IVFPQ", "HNSW");
+                "SQfp16" stores vectors as float16, halving memory, and
+                "IVFPQ" (OPQ + IVF + product quantization) for large corpora
+            nlist: Number of clusters for IVF indexes
+            nprobe: Number of clusters visited per query for IVF indexes
+            use_gpu: Train and add on GPU 0 when one is available; the index
+                is moved back to CPU afterwards, so saved files stay portable
         """
         self.dimension = dimension
         self.index_type = index_type
         self.nlist = nlist
+        self.nprobe = nprobe
+        self.use_gpu = use_gpu
 
         self._index: faiss.Index | None = None
-        self._metadata: list[dict[str, Any]] = []
         self._is_trained = False
+        # Position -> document ID for indexes saved before IDs were stored
+        self._position_ids: np.ndarray | None = None
 
     def _create_index(self) -> faiss.Index:
-        """Create FAISS index based on type."""
+        """Create FAISS index based on type, keyed by document ID."""
+        inner: faiss.Index
         if self.index_type == "Flat":
-            return faiss.IndexFlatIP(self.dimension)
+            inner = faiss.IndexFlatIP(self.dimension)
+        elif self.index_type == "SQfp16":
+            # Exhaustive like Flat; float32 queries are scored against fp16 codes
+            inner = faiss.IndexScalarQuantizer(
+                self.dimension, faiss.ScalarQuantizer.QT_fp16, faiss.METRIC_INNER_PRODUCT
+            )
         elif self.index_type == "IVFFlat":
             quantizer = faiss.IndexFlatIP(self.dimension)
-            index = faiss.IndexIVFFlat(quantizer, self.dimension, self.nlist)
-            return index
+            inner = faiss.IndexIVFFlat(quantizer, self.dimension, self.nlist)
+        elif self.index_type == "IVFPQ":
+            m = PQ_SUBQUANTIZERS
+            inner = faiss.index_factory(
+                self.dimension, f"OPQ{m},IVF{self.nlist},PQ{m}", faiss.METRIC_INNER_PRODUCT
+            )
         elif self.index_type == "HNSW":
-            return faiss.IndexHNSWFlat(self.dimension, 32)
+            inner = faiss.IndexHNSWFlat(self.dimension, 32)
         else:
-            return faiss.IndexFlatIP(self.dimension)
+            inner = faiss.IndexFlatIP(self.dimension)
+        # Searches return document IDs directly, so no per-vector metadata
+        # has to be kept alongside the index
+        return faiss.IndexIDMap2(inner)
+
+    @property
+    def min_train_vectors(self) -> int:
+        """Vectors needed to train the index (0 for index types without training)."""
+        if self.index_type == "IVFFlat":
+            return self.nlist
+        if self.index_type == "IVFPQ":
+            return max(self.nlist, PQ_CENTROIDS)
+        return 0
+
+    def _apply_nprobe(self) -> None:
+        """Set the number of clusters searched per query on IVF indexes."""
+        if self._index is not None and self.index_type in ("IVFFlat", "IVFPQ"):
+            faiss.ParameterSpace().set_index_parameter(self._index, "nprobe", self.nprobe)
 
     async def initialize(self) -> None:
         """Initialize empty index."""
         self._index = self._create_index()
-        self._metadata = []
+        self._position_ids = None
+        self._apply_nprobe()
         logger.info(
             "FAISS index initialized: dimension=%d, type=%s",
             self.dimension,
@@ -82,33 +129,57 @@ class FAISSIndex:
     async def add_vectors(
         self,
         vectors: np.ndarray,
-        metadata: list[dict[str, Any]],
+        ids: Sequence[int] | np.ndarray,
     ) -> None:
         """
-        Add vectors with metadata.
+        Add vectors keyed by document ID.
 
         Args:
             vectors: numpy array of shape (n, dimension)
-            metadata: List of metadata dicts (same length as vectors)
+            ids: Document ID of each vector (same length as vectors)
+
+        Contiguous float32 input is normalized in place rather than copied,
+        so a large embedding matrix is never held twice.
+
+        Raises:
+            ValueError: If an untrained IVF index gets fewer vectors than
+                it needs to train
         """
         if self._index is None:
             await self.initialize()
         assert self._index is not None  # Guaranteed by initialize()
 
-        vectors = np.ascontiguousarray(vectors.astype("float32"))
+        # An untrained IVF index cannot take vectors, so fail before any work
+        needs_training = self.index_type in ("IVFFlat", "IVFPQ") and not self._is_trained
+        if needs_training and len(vectors) < self.min_train_vectors:
+            raise ValueError(
+                f"{self.index_type} index with nlist={self.nlist} needs at least "
+                f"{self.min_train_vectors} vectors to train, got {len(vectors)}; "
+                "lower nlist or use a Flat index"
+            )
+
+        vectors = np.ascontiguousarray(vectors.astype(np.float32, copy=False))
+        id_array = np.ascontiguousarray(ids, dtype=np.int64)
 
         # Normalize for inner product (cosine similarity)
         faiss.normalize_L2(vectors)
 
+        index = self._index
+        on_gpu = self.use_gpu and self.index_type in GPU_INDEX_TYPES and faiss.get_num_gpus() > 0
+        if on_gpu:
+            index = faiss.index_cpu_to_gpu(faiss.StandardGpuResources(), 0, index)
+
         # Train IVF index if needed
-        if self.index_type == "IVFFlat" and not self._is_trained:
-            if len(vectors) >= self.nlist:
-                await asyncio.to_thread(self._index.train, vectors)
-                self._is_trained = True
+        if needs_training:
+            await asyncio.to_thread(index.train, vectors)
+            self._is_trained = True
 
         # Add vectors
-        await asyncio.to_thread(self._index.add, vectors)
-        self._metadata.extend(metadata)
+        await asyncio.to_thread(index.add_with_ids, vectors, id_array)
+
+        if on_gpu:
+            self._index = faiss.index_gpu_to_cpu(index)
+            self._apply_nprobe()
 
         logger.debug("Added %d vectors to index", len(vectors))
 
@@ -116,7 +187,7 @@ class FAISSIndex:
         self,
         query_vector: np.ndarray,
         k: int = 10,
-    ) -> list[dict[str, Any]]:
+    ) -> list[tuple[int, float]]:
         """
         Search for similar vectors.
 
@@ -125,7 +196,7 @@ class FAISSIndex:
             k: Number of results
 
         Returns:
-            List of dicts with 'score', 'metadata', and 'index'
+            (doc_id, score) pairs, most similar first
         """
         if self._index is None or self._index.ntotal == 0:
             return []
@@ -134,7 +205,8 @@ class FAISSIndex:
         if query_vector.ndim == 1:
             query_vector = query_vector.reshape(1, -1)
 
-        query_vector = np.ascontiguousarray(query_vector.astype("float32"))
+        # Callers may hand over float16 queries; FAISS needs float32
+        query_vector = np.ascontiguousarray(query_vector.astype(np.float32, copy=False))
         faiss.normalize_L2(query_vector)
 
         # Search
@@ -142,18 +214,12 @@ class FAISSIndex:
             self._index.search, query_vector, min(k, self._index.ntotal)
         )
 
-        results = []
-        for score, idx in zip(scores[0], indices[0]):
-            if idx >= 0 and idx < len(self._metadata):
-                results.append(
-                    {
-                        "score": float(score),
-                        "index": int(idx),
-                        "metadata": self._metadata[idx],
-                    }
-                )
+        found = indices[0] >= 0
+        doc_ids = indices[0][found]
+        if self._position_ids is not None:
+            doc_ids = self._position_ids[doc_ids]
 
-        return results
+        return list(zip(doc_ids.tolist(), scores[0][found].tolist(), strict=True))
 
     async def save(self, path: str | Path) -> None:
         """
@@ -175,9 +241,11 @@ class FAISSIndex:
             "dimension": self.dimension,
             "index_type": self.index_type,
             "nlist": self.nlist,
+            "nprobe": self.nprobe,
             "is_trained": self._is_trained,
-            "metadata": self._metadata,
         }
+        if self._position_ids is not None:
+            metadata["metadata"] = [{"doc_id": doc_id} for doc_id in self._position_ids.tolist()]
         await asyncio.to_thread(self._write_json, metadata_path, metadata)
 
         ntotal = self._index.ntotal if self._index else 0
@@ -208,8 +276,16 @@ class FAISSIndex:
         self.dimension = data["dimension"]
         self.index_type = data["index_type"]
         self.nlist = data["nlist"]
+        self.nprobe = data.get("nprobe", self.nprobe)
         self._is_trained = data["is_trained"]
-        self._metadata = data["metadata"]
+        self._position_ids = None
+        if not isinstance(self._index, faiss.IndexIDMap2) and "metadata" in data:
+            # Saved before vectors carried document IDs: positions index
+            # into the stored metadata list (such indexes are read-only)
+            self._position_ids = np.array(
+                [item.get("doc_id", 0) for item in data["metadata"]], dtype=np.int64
+            )
+        self._apply_nprobe()
 
         ntotal = self._index.ntotal if self._index else 0
         logger.info("Index loaded from %s (%d vectors)", path, ntotal)
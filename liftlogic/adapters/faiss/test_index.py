@@ -0,0 +1,85 @@
+"""Tests for FAISS Index."""
+
+import json
+from pathlib import Path
+
+import faiss
+import numpy as np
+import pytest
+
+from .index import FAISSIndex
+
+
+def _vectors(n: int, dimension: int = 8) -> np.ndarray:
+    """Random float32 vectors."""
+    return np.random.default_rng(0).random((n, dimension), dtype=np.float32)
+
+
+async def test_search_returns_document_ids() -> None:
+    """Test hits carry the document IDs the vectors were added with."""
+    index = FAISSIndex(dimension=8, index_type="Flat")
+    vectors = _vectors(5)
+    await index.add_vectors(vectors, [10, 20, 30, 40, 50])
+
+    hits = await index.search(vectors[2], k=2)
+
+    assert len(hits) == 2
+    assert hits[0][0] == 30
+    assert hits[0][1] >= hits[1][1]
+
+
+async def test_save_and_load_keep_ids(tmp_path: Path) -> None:
+    """Test a saved index returns the same document IDs after loading."""
+    index = FAISSIndex(dimension=8, index_type="SQfp16")
+    vectors = _vectors(5)
+    await index.add_vectors(vectors, [7, 8, 9, 10, 11])
+    await index.save(tmp_path)
+
+    loaded = FAISSIndex()
+    await loaded.load(tmp_path)
+
+    assert loaded.size == 5
+    assert (await loaded.search(vectors[4], k=1))[0][0] == 11
+
+
+async def test_load_index_saved_without_ids(tmp_path: Path) -> None:
+    """Test indexes saved with per-vector metadata map positions to doc IDs."""
+    vectors = _vectors(3)
+    faiss.normalize_L2(vectors)
+    legacy = faiss.IndexFlatIP(8)
+    legacy.add(vectors)
+    faiss.write_index(legacy, str(tmp_path / "faiss_index.bin"))
+    (tmp_path / "metadata.json").write_text(
+        json.dumps(
+            {
+                "dimension": 8,
+                "index_type": "Flat",
+                "nlist": 100,
+                "is_trained": False,
+                "metadata": [{"doc_id": 5}, {"doc_id": 6}, {"doc_id": 7}],
+            }
+        )
+    )
+
+    index = FAISSIndex()
+    await index.load(tmp_path)
+
+    assert (await index.search(vectors[1], k=1))[0][0] == 6
+
+
+async def test_ivf_index_trains_on_first_add() -> None:
+    """Test an IVF index with enough vectors trains and becomes searchable."""
+    index = FAISSIndex(dimension=8, index_type="IVFFlat", nlist=4)
+    vectors = _vectors(200)
+    await index.add_vectors(vectors, list(range(200)))
+
+    assert index.size == 200
+    assert (await index.search(vectors[3], k=1))[0][0] == 3
+
+
+async def test_ivfpq_rejects_too_few_training_vectors() -> None:
+    """Test an untrained IVFPQ index fails clearly instead of adding untrained."""
+    index = FAISSIndex(dimension=64, index_type="IVFPQ", nlist=4096)
+
+    with pytest.raises(ValueError, match="needs at least 4096 vectors"):
+        await index.add_vectors(_vectors(100, dimension=64), list(range(100)))
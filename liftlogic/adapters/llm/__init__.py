@@ -15,8 +15,28 @@ Usage:
     # Without auth (uses Ollama)
     llm = await get_llm_for_user(None)
     response = await llm.generate("What is fault code 505?")
+
+    # Group concurrent requests (no provider accepts multi-prompt calls,
+    # so this saves no model calls)
+    batched = get_batched_llm(llm)
+    response = await batched.generate("What is fault code 505?")
 """
 
-from .service import LLMResponse, LLMService, get_llm_for_user
+from .batching import BatchedLLM, get_batched_llm
+from .service import (
+    LLMResponse,
+    LLMService,
+    close_llm_http_client,
+    get_llm_for_user,
+    get_llm_http_client,
+)
 
-__all__ = ["LLMService", "get_llm_for_user", "LLMResponse"]
+__all__ = [
+    "LLMService",
+    "get_llm_for_user",
+    "LLMResponse",
+    "BatchedLLM",
+    "get_batched_llm",
+    "get_llm_http_client",
+    "close_llm_http_client",
+]
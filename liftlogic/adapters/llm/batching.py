@@ -0,0 +1,184 @@
+"""
+Batched LLM - Micro-batching of concurrent generate calls.
+
+Concurrent requests for the same user (or all anonymous Ollama requests)
+are coalesced within a short window and dispatched as one
+``generate_batch`` call, in the spirit of Ray Serve's ``@serve.batch``.
+
+Neither provider has a real multi-prompt endpoint: ``generate_batch`` fans
+the prompts out as concurrent requests over the shared HTTP client, so the
+batcher saves no model calls. The API routes therefore call
+``LLMService.generate`` directly. A prompt that arrives while the batcher
+is idle is dispatched at once; only prompts arriving while a batch is in
+flight wait (up to ``max_wait_ms``) to be grouped.
+"""
+
+from __future__ import annotations
+
+import asyncio
+import logging
+from collections import OrderedDict, deque
+from typing import NamedTuple
+
+from .service import LLMResponse, LLMService
+
+logger = logging.getLogger(__name__)
+
+# One batcher per (provider, model, token); bounded so that one-off users
+# don't accumulate
+_MAX_BATCHERS = 1024
+_batchers: OrderedDict[tuple[str, str, str | None], BatchedLLM] = OrderedDict()
+
+
+class _Pending(NamedTuple):
+    """A queued prompt awaiting its batch."""
+
+    prompt: str
+    system_instruction: str | None
+    temperature: float | None
+    future: asyncio.Future[LLMResponse]
+
+
+class BatchedLLM:
+    """
+    Coalesces concurrent ``generate`` calls into ``generate_batch`` calls.
+
+    A worker task is started when the first prompt arrives and exits once
+    nothing is pending, so idle batchers hold no running tasks.
+
+    Example:
+        >>> batched = BatchedLLM(LLMService())
+        >>> response = await batched.generate("Explain fault code F505")
+    """
+
+    def __init__(
+        self,
+        llm: LLMService,
+        max_batch_size: int = 8,
+        max_wait_ms: float = 20,
+    ) -> None:
+        """
+        Initialize batcher.
+
+        Args:
+            llm: Underlying LLM service
+            max_batch_size: Maximum prompts per dispatched batch
+            max_wait_ms: Maximum time to wait for a batch to fill while
+                another batch is in flight
+        """
+        self._llm = llm
+        self._max_batch_size = max_batch_size
+        self._max_wait = max_wait_ms / 1000
+        self._pending: deque[_Pending] = deque()
+        self._worker: asyncio.Task[None] | None = None
+        # Resolved early when a batch fills before max_wait elapses
+        self._wakeup: asyncio.Future[None] | None = None
+        self._dispatches: set[asyncio.Task[None]] = set()
+
+    @property
+    def provider(self) -> str:
+        """Provider of the underlying service ("gemini" or "ollama")."""
+        return self._llm.provider
+
+    async def generate(
+        self,
+        prompt: str,
+        system_instruction: str | None = None,
+        temperature: float | None = None,
+    ) -> LLMResponse:
+        """
+        Queue a prompt and wait for its slot in the next batch.
+
+        Args:
+            prompt: User prompt
+            system_instruction: System prompt
+            temperature: Override default temperature
+
+        Returns:
+            LLMResponse with generated text
+        """
+        loop = asyncio.get_running_loop()
+        future: asyncio.Future[LLMResponse] = loop.create_future()
+        self._pending.append(_Pending(prompt, system_instruction, temperature, future))
+
+        worker = self._worker
+        if worker is None or worker.done() or worker.get_loop() is not loop:
+            self._worker = loop.create_task(self._run())
+        elif len(self._pending) >= self._max_batch_size:
+            wakeup = self._wakeup
+            if wakeup is not None and not wakeup.done():
+                wakeup.set_result(None)
+        return await future
+
+    async def _run(self) -> None:
+        """Collect batches until no prompts are pending."""
+        loop = asyncio.get_running_loop()
+        while self._pending:
+            # Only wait for company while a batch is in flight; an idle
+            # batcher dispatches at once instead of adding latency
+            if self._dispatches and len(self._pending) < self._max_batch_size:
+                self._wakeup = loop.create_future()
+                try:
+                    await asyncio.wait_for(self._wakeup, self._max_wait)
+                except TimeoutError:
+                    pass
+                finally:
+                    self._wakeup = None
+
+            size = min(len(self._pending), self._max_batch_size)
+            batch = [self._pending.popleft() for _ in range(size)]
+
+            # generate_batch takes one system instruction, so split on it
+            groups: dict[tuple[str | None, float | None], list[_Pending]] = {}
+            for item in batch:
+                groups.setdefault((item.system_instruction, item.temperature), []).append(item)
+            for group in groups.values():
+                task = loop.create_task(self._dispatch(group))
+                self._dispatches.add(task)
+                task.add_done_callback(self._dispatches.discard)
+
+    async def _dispatch(self, group: list[_Pending]) -> None:
+        """Send one batch and resolve each caller's future with its own outcome."""
+        first = group[0]
+        try:
+            responses = await self._llm.generate_batch(
+                [item.prompt for item in group],
+                system_instruction=first.system_instruction,
+                temperature=first.temperature,
+            )
+        except Exception as e:
+            logger.warning("Batched LLM call failed (%d prompts): %s", len(group), e)
+            for item in group:
+                if not item.future.done():
+                    item.future.set_exception(e)
+            return
+
+        # One prompt failing (e.g. an Ollama timeout) fails only its own caller
+        for item, response in zip(group, responses, strict=True):
+            if item.future.done():
+                continue
+            if isinstance(response, BaseException):
+                item.future.set_exception(response)
+            else:
+                item.future.set_result(response)
+
+
+def get_batched_llm(llm: LLMService) -> BatchedLLM:
+    """
+    Get the shared batcher for an LLM service's provider, model and token.
+
+    Args:
+        llm: Service returned by ``get_llm_for_user``
+
+    Returns:
+        BatchedLLM shared by all requests with the same credentials
+    """
+    key = (llm.provider, llm.model, llm.user_token)
+    batcher = _batchers.get(key)
+    if batcher is None:
+        batcher = _batchers[key] = BatchedLLM(llm)
+        if len(_batchers) > _MAX_BATCHERS:
+            _batchers.popitem(last=False)
+    else:
+        _batchers.move_to_end(key)
+    return batcher
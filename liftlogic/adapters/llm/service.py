@@ -13,7 +13,12 @@ Architecture:
 
 from __future__ import annotations
 
+import asyncio
+import json
 import logging
+from collections import OrderedDict
+from collections.abc import AsyncGenerator
+from contextlib import aclosing
 from dataclasses import dataclass
 from typing import TYPE_CHECKING, Any
 
@@ -26,6 +31,36 @@ if TYPE_CHECKING:
 
 logger = logging.getLogger(__name__)
 
+# Shared by every LLMService so calls reuse pooled connections and TLS
+# sessions (and multiplex over one HTTP/2 connection to Gemini)
+_http_client: httpx.AsyncClient | None = None
+
+
+def get_llm_http_client() -> httpx.AsyncClient:
+    """Get or create the shared HTTP client for LLM calls."""
+    global _http_client
+    if _http_client is None or _http_client.is_closed:
+        _http_client = httpx.AsyncClient(
+            http2=True,
+            timeout=30.0,
+            limits=httpx.Limits(max_connections=100, max_keepalive_connections=20),
+        )
+    return _http_client
+
+
+# One long-lived LLMService per token (None = anonymous Ollama), reused across
+# requests; bounded so that one-off users don't accumulate
+_MAX_SERVICES = 1024
+_services: OrderedDict[str | None, LLMService] = OrderedDict()
+
+
+async def close_llm_http_client() -> None:
+    """Close the shared HTTP client."""
+    global _http_client
+    if _http_client is not None:
+        await _http_client.aclose()
+        _http_client = None
+
 
 @dataclass
 class LLMResponse:
@@ -55,6 +90,7 @@ class LLMService:
         self,
         user_token: str | None = None,
         model: str | None = None,
+        client: httpx.AsyncClient | None = None,
     ) -> None:
         """
         Initialize LLM service.
@@ -62,10 +98,12 @@ class LLMService:
         Args:
             user_token: User's Google OAuth access token (for Gemini)
             model: Override default model
+            client: HTTP client to use. Defaults to the shared client.
         """
         self.settings = get_settings()
         self.user_token = user_token
         self.model = model or self.settings.gemini_model
+        self._client = client
 
         # Determine provider based on auth
         if user_token:
@@ -101,20 +139,87 @@ class LLMService:
         else:
             return await self._generate_ollama(prompt, system_instruction, temperature)
 
-    async def _generate_gemini(
+    async def generate_batch(
+        self,
+        prompts: list[str],
+        system_instruction: str | None = None,
+        temperature: float | None = None,
+    ) -> list[LLMResponse | BaseException]:
+        """
+        Generate responses for several prompts sharing one system instruction.
+
+        Neither Gemini's generateContent nor Ollama's /api/generate accepts
+        multiple prompts, so the batch is fanned out concurrently over the
+        shared HTTP client (multiplexed on one HTTP/2 connection for Gemini).
+        Prompts fail independently: a failed prompt yields its exception in
+        place of a response, and the others still complete.
+
+        Args:
+            prompts: User prompts
+            system_instruction: System prompt applied to every prompt
+            temperature: Override default temperature
+
+        Returns:
+            One LLMResponse (or the raised exception) per prompt, in order
+        """
+        return list(
+            await asyncio.gather(
+                *(self.generate(p, system_instruction, temperature) for p in prompts),
+                return_exceptions=True,
+            )
+        )
+
+    async def generate_stream(
         self,
         prompt: str,
         system_instruction: str | None = None,
         temperature: float | None = None,
-    ) -> LLMResponse:
-        """Generate using Gemini with user's OAuth token."""
+    ) -> AsyncGenerator[str, None]:
+        """
+        Generate text incrementally.
+
+        Falls back to Ollama if Gemini fails before producing any text.
+        Closing the generator closes the upstream HTTP stream immediately.
+
+        Args:
+            prompt: User prompt
+            system_instruction: System prompt
+            temperature: Override default temperature
+
+        Yields:
+            Text chunks as the model produces them
+        """
+        if self.provider == "gemini":
+            started = False
+            try:
+                async with aclosing(
+                    self._stream_gemini(prompt, system_instruction, temperature)
+                ) as stream:
+                    async for chunk in stream:
+                        started = True
+                        yield chunk
+                return
+            except Exception as e:
+                if started:
+                    raise
+                logger.warning("Gemini stream failed, falling back to Ollama: %s", e)
+
+        async with aclosing(self._stream_ollama(prompt, system_instruction, temperature)) as stream:
+            async for chunk in stream:
+                yield chunk
+
+    def _gemini_request(
+        self,
+        method: str,
+        prompt: str,
+        system_instruction: str | None,
+        temperature: float | None,
+    ) -> tuple[str, dict[str, str], dict[str, Any]]:
+        """Build Gemini URL, headers and body for a generate method."""
         if not self.user_token:
             raise LLMError("No user token for Gemini")
 
-        # Build request
-        url = (
-            f"https://generativelanguage.googleapis.com/v1beta/models/{self.model}:generateContent"
-        )
+        url = f"https://generativelanguage.googleapis.com/v1beta/models/{self.model}:{method}"
 
         contents = []
         if system_instruction:
@@ -128,98 +233,178 @@ class LLMService:
                 "temperature": temperature or self.settings.gemini_temperature,
             },
         }
+        headers = {
+            "Authorization": f"Bearer {self.user_token}",
+            "Content-Type": "application/json",
+        }
+        return url, headers, body
+
+    @staticmethod
+    def _check_gemini_status(response: httpx.Response) -> None:
+        """Raise LLMError for a failed Gemini response (body must be read)."""
+        if response.status_code == 429:
+            raise LLMError("Gemini quota exceeded", {"code": "QUOTA_EXCEEDED"})
+
+        if response.status_code == 403:
+            error_text = response.text.lower()
+            if "scope" in error_text or "insufficient" in error_text:
+                logger.error(
+                    "Gemini scope error: User token missing required scopes. "
+                    "Ensure 'generative-language.retriever' scope is requested."
+                )
+                raise LLMError(
+                    "Gemini API requires additional OAuth scopes",
+                    {"code": "SCOPE_INSUFFICIENT", "hint": "Re-login to grant new permissions"},
+                )
+            logger.error("Gemini 403 forbidden: %s", response.text)
+            raise LLMError(f"Gemini API access denied: {response.status_code}")
+
+        if response.status_code != 200:
+            logger.error("Gemini error: %s %s", response.status_code, response.text)
+            raise LLMError(f"Gemini API error: {response.status_code}")
+
+    @staticmethod
+    def _gemini_text(data: dict[str, Any]) -> str:
+        """Extract text from a Gemini response (or stream chunk)."""
+        candidates = data.get("candidates", [])
+        if candidates:
+            content = candidates[0].get("content", {})
+            parts = content.get("parts", [])
+            if parts:
+                text: str = parts[0].get("text", "")
+                return text
+        return ""
 
-        async with httpx.AsyncClient() as client:
-            response = await client.post(
-                url,
-                headers={
-                    "Authorization": f"Bearer {self.user_token}",
-                    "Content-Type": "application/json",
-                },
-                json=body,
-                timeout=60.0,
-            )
-
-            if response.status_code == 429:
-                raise LLMError("Gemini quota exceeded", {"code": "QUOTA_EXCEEDED"})
-
-            if response.status_code == 403:
-                error_text = response.text.lower()
-                if "scope" in error_text or "insufficient" in error_text:
-                    logger.error(
-                        "Gemini scope error: User token missing required scopes. "
-                        "Ensure 'generative-language.retriever' scope is requested."
-                    )
-                    raise LLMError(
-                        "Gemini API requires additional OAuth scopes",
-                        {"code": "SCOPE_INSUFFICIENT", "hint": "Re-login to grant new permissions"},
-                    )
-                logger.error("Gemini 403 forbidden: %s", response.text)
-                raise LLMError(f"Gemini API access denied: {response.status_code}")
-
-            if response.status_code != 200:
-                logger.error("Gemini error: %s %s", response.status_code, response.text)
-                raise LLMError(f"Gemini API error: {response.status_code}")
+    async def _generate_gemini(
+        self,
+        prompt: str,
+        system_instruction: str | None = None,
+        temperature: float | None = None,
+    ) -> LLMResponse:
+        """Generate using Gemini with user's OAuth token."""
+        url, headers, body = self._gemini_request(
+            "generateContent", prompt, system_instruction, temperature
+        )
 
-            data = response.json()
+        client = self._client or get_llm_http_client()
+        response = await client.post(url, headers=headers, json=body, timeout=60.0)
+        self._check_gemini_status(response)
 
-            # Extract text from response
-            text = ""
-            candidates = data.get("candidates", [])
-            if candidates:
-                content = candidates[0].get("content", {})
-                parts = content.get("parts", [])
-                if parts:
-                    text = parts[0].get("text", "")
+        data = response.json()
 
-            # Get token usage
-            usage = data.get("usageMetadata", {})
-            tokens = usage.get("totalTokenCount")
+        # Get token usage
+        usage = data.get("usageMetadata", {})
+        tokens = usage.get("totalTokenCount")
 
-            return LLMResponse(
-                text=text,
-                model=self.model,
-                provider="gemini",
-                tokens_used=tokens,
-            )
+        return LLMResponse(
+            text=self._gemini_text(data),
+            model=self.model,
+            provider="gemini",
+            tokens_used=tokens,
+        )
 
-    async def _generate_ollama(
+    async def _stream_gemini(
         self,
         prompt: str,
         system_instruction: str | None = None,
         temperature: float | None = None,
-    ) -> LLMResponse:
-        """Generate using local Ollama."""
-        url = f"{self.settings.ollama_url}/api/generate"
+    ) -> AsyncGenerator[str, None]:
+        """Stream from Gemini's SSE endpoint with user's OAuth token."""
+        url, headers, body = self._gemini_request(
+            "streamGenerateContent", prompt, system_instruction, temperature
+        )
 
+        client = self._client or get_llm_http_client()
+        async with client.stream(
+            "POST", url, params={"alt": "sse"}, headers=headers, json=body, timeout=60.0
+        ) as response:
+            if response.status_code != 200:
+                await response.aread()
+                self._check_gemini_status(response)
+
+            async for line in response.aiter_lines():
+                if line.startswith("data:"):
+                    text = self._gemini_text(json.loads(line[5:]))
+                    if text:
+                        yield text
+
+    def _ollama_body(
+        self,
+        prompt: str,
+        system_instruction: str | None,
+        temperature: float | None,
+        stream: bool,
+    ) -> dict[str, Any]:
+        """Build an Ollama /api/generate request body."""
         full_prompt = prompt
         if system_instruction:
             full_prompt = f"{system_instruction}\n\n{prompt}"
 
-        body = {
+        return {
             "model": self.settings.ollama_model,
             "prompt": full_prompt,
-            "stream": False,
+            "stream": stream,
             "options": {
                 "temperature": temperature or self.settings.gemini_temperature,
             },
         }
 
+    async def _generate_ollama(
+        self,
+        prompt: str,
+        system_instruction: str | None = None,
+        temperature: float | None = None,
+    ) -> LLMResponse:
+        """Generate using local Ollama."""
+        url = f"{self.settings.ollama_url}/api/generate"
+        body = self._ollama_body(prompt, system_instruction, temperature, stream=False)
+
+        client = self._client or get_llm_http_client()
         try:
-            async with httpx.AsyncClient() as client:
-                response = await client.post(url, json=body, timeout=120.0)
+            response = await client.post(url, json=body, timeout=120.0)
+
+            if response.status_code != 200:
+                raise LLMError(f"Ollama error: {response.status_code}")
+
+            data = response.json()
+
+            return LLMResponse(
+                text=data.get("response", ""),
+                model=self.settings.ollama_model,
+                provider="ollama",
+                tokens_used=data.get("eval_count"),
+            )
+
+        except httpx.ConnectError:
+            raise LLMError(
+                "Ollama not running. Start with: ollama serve",
+                {"hint": "Run 'ollama serve' in a terminal"},
+            )
 
+    async def _stream_ollama(
+        self,
+        prompt: str,
+        system_instruction: str | None = None,
+        temperature: float | None = None,
+    ) -> AsyncGenerator[str, None]:
+        """Stream from local Ollama (newline-delimited JSON)."""
+        url = f"{self.settings.ollama_url}/api/generate"
+        body = self._ollama_body(prompt, system_instruction, temperature, stream=True)
+
+        client = self._client or get_llm_http_client()
+        try:
+            async with client.stream("POST", url, json=body, timeout=120.0) as response:
                 if response.status_code != 200:
                     raise LLMError(f"Ollama error: {response.status_code}")
 
-                data = response.json()
-
-                return LLMResponse(
-                    text=data.get("response", ""),
-                    model=self.settings.ollama_model,
-                    provider="ollama",
-                    tokens_used=data.get("eval_count"),
-                )
+                async for line in response.aiter_lines():
+                    if not line:
+                        continue
+                    data = json.loads(line)
+                    if data.get("response"):
+                        yield data["response"]
+                    if data.get("done"):
+                        break
 
         except httpx.ConnectError:
             raise LLMError(
@@ -237,8 +422,6 @@ class LLMService:
 
         response = await self.generate(prompt, json_instruction)
 
-        import json
-
         try:
             result: dict[str, Any] = json.loads(response.text)
             return result
@@ -257,12 +440,21 @@ async def get_llm_for_user(user: UserContext | None) -> LLMService:
     """
     Get LLM service configured for user.
 
+    Services are cached per access token, so repeat requests reuse the
+    same instance instead of rebuilding it.
+
     Args:
         user: Authenticated user context (or None for fallback)
 
     Returns:
         LLMService configured with user's token or Ollama fallback
     """
-    if user and user.access_token:
-        return LLMService(user_token=user.access_token)
-    return LLMService()
+    token = user.access_token if user and user.access_token else None
+    service = _services.get(token)
+    if service is None:
+        service = _services[token] = LLMService(user_token=token)
+        if len(_services) > _MAX_SERVICES:
+            _services.popitem(last=False)
+    else:
+        _services.move_to_end(token)
+    return service
@@ -0,0 +1,111 @@
+"""
+Tests for the batched LLM wrapper.
+"""
+
+from __future__ import annotations
+
+import asyncio
+from unittest.mock import AsyncMock
+
+import pytest
+
+from .batching import BatchedLLM, get_batched_llm
+from .service import LLMResponse, LLMService
+
+
+def _echo_batch(prompts: list[str], **kwargs: object) -> list[LLMResponse]:
+    """Return one response per prompt, echoing the prompt."""
+    return [LLMResponse(text=p, model="test", provider="ollama") for p in prompts]
+
+
+@pytest.fixture
+def llm() -> LLMService:
+    """LLMService with a mocked generate_batch."""
+    service = LLMService()
+    service.generate_batch = AsyncMock(side_effect=_echo_batch)  # type: ignore[method-assign]
+    return service
+
+
+async def test_concurrent_prompts_share_one_batch(llm: LLMService) -> None:
+    """Prompts arriving within the window are dispatched together."""
+    batched = BatchedLLM(llm, max_batch_size=8, max_wait_ms=20)
+
+    responses = await asyncio.gather(*(batched.generate(f"q{i}") for i in range(5)))
+
+    assert [r.text for r in responses] == [f"q{i}" for i in range(5)]
+    llm.generate_batch.assert_awaited_once()  # type: ignore[attr-defined]
+
+
+async def test_idle_batcher_dispatches_without_waiting(llm: LLMService) -> None:
+    """A lone prompt is not held back for the batching window."""
+    batched = BatchedLLM(llm, max_wait_ms=60_000)
+
+    response = await asyncio.wait_for(batched.generate("q"), timeout=1)
+
+    assert response.text == "q"
+
+
+async def test_batches_split_on_size_and_system_instruction(llm: LLMService) -> None:
+    """Batches respect max_batch_size and never mix system instructions."""
+    batched = BatchedLLM(llm, max_batch_size=2, max_wait_ms=20)
+
+    await asyncio.gather(
+        batched.generate("a", system_instruction="x"),
+        batched.generate("b", system_instruction="y"),
+        batched.generate("c", system_instruction="x"),
+    )
+
+    calls = llm.generate_batch.await_args_list  # type: ignore[attr-defined]
+    for call in calls:
+        assert len(call.args[0]) <= 2
+    assert sorted(p for call in calls for p in call.args[0]) == ["a", "b", "c"]
+
+
+async def test_batch_failure_propagates_to_callers(llm: LLMService) -> None:
+    """An error from generate_batch is raised in every waiting caller."""
+    llm.generate_batch.side_effect = RuntimeError("down")  # type: ignore[attr-defined]
+    batched = BatchedLLM(llm)
+
+    with pytest.raises(RuntimeError, match="down"):
+        await batched.generate("q")
+
+
+async def test_prompt_failure_only_fails_its_caller(llm: LLMService) -> None:
+    """A prompt that fails inside a batch does not fail its batch-mates."""
+    error = TimeoutError("ollama timed out")
+    llm.generate_batch.side_effect = lambda prompts, **kwargs: [  # type: ignore[attr-defined]
+        error if p == "bad" else LLMResponse(text=p, model="test", provider="ollama")
+        for p in prompts
+    ]
+    batched = BatchedLLM(llm, max_batch_size=8, max_wait_ms=20)
+
+    results = await asyncio.gather(
+        batched.generate("a"),
+        batched.generate("bad"),
+        batched.generate("b"),
+        return_exceptions=True,
+    )
+
+    assert [r.text for r in results if isinstance(r, LLMResponse)] == ["a", "b"]
+    assert results[1] is error
+    llm.generate_batch.assert_awaited_once()  # type: ignore[attr-defined]
+
+
+async def test_generate_batch_returns_exceptions_in_place() -> None:
+    """generate_batch keeps successful responses when one prompt raises."""
+    service = LLMService()
+    ok = LLMResponse(text="ok", model="test", provider="ollama")
+    service.generate = AsyncMock(side_effect=[ok, RuntimeError("b")])  # type: ignore[method-assign]
+
+    results = await service.generate_batch(["a", "b"])
+
+    assert results[0] is ok
+    assert isinstance(results[1], RuntimeError)
+
+
+def test_get_batched_llm_shares_per_credentials() -> None:
+    """Services with the same credentials share one batcher."""
+    assert get_batched_llm(LLMService()) is get_batched_llm(LLMService())
+    assert get_batched_llm(LLMService(user_token="a")) is not get_batched_llm(
+        LLMService(user_token="b")
+    )
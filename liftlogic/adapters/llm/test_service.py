@@ -0,0 +1,28 @@
+"""
+Tests for the unified LLM service.
+"""
+
+from __future__ import annotations
+
+from types import SimpleNamespace
+from typing import Any
+
+from .service import get_llm_for_user
+
+
+def _user(token: str) -> Any:
+    """Minimal stand-in for UserContext."""
+    return SimpleNamespace(access_token=token)
+
+
+async def test_get_llm_for_user_reuses_service_per_token() -> None:
+    """Services are cached per access token, with anonymous users sharing one."""
+    first = await get_llm_for_user(_user("token-a"))
+
+    assert await get_llm_for_user(_user("token-a")) is first
+    assert await get_llm_for_user(_user("token-b")) is not first
+    assert first.provider == "gemini"
+
+    anonymous = await get_llm_for_user(None)
+    assert await get_llm_for_user(None) is anonymous
+    assert anonymous.provider == "ollama"
@@ -0,0 +1,162 @@
+"""
+SQLite Bulk Loading - Insert row builders and deferred index maintenance.
+
+Helpers behind SQLiteRepository's bulk inserts and ``bulk_load``: the
+insert statements with their parameter builders, and the FTS trigger and
+secondary indexes that are dropped while loading and rebuilt afterwards.
+"""
+
+from __future__ import annotations
+
+import logging
+from collections.abc import AsyncIterator
+from contextlib import asynccontextmanager
+from typing import Any
+
+import aiosqlite
+import orjson
+
+logger = logging.getLogger(__name__)
+
+__all__ = [
+    "DOCUMENTS_INSERT_TRIGGER",
+    "INSERT_DOCUMENT",
+    "INSERT_FAULT_CODE",
+    "SECONDARY_INDEXES",
+    "create_deferred_indexes",
+    "deferred_indexing",
+    "document_params",
+    "fault_code_params",
+]
+
+# Indexes each new document in FTS5; dropped for the duration of a bulk load
+DOCUMENTS_INSERT_TRIGGER = """
+    CREATE TRIGGER IF NOT EXISTS documents_ai AFTER INSERT ON documents BEGIN
+        INSERT INTO documents_fts(rowid, filename, manufacturer, model, content)
+        VALUES (new.id, new.filename, new.manufacturer, new.model, new.content);
+    END;
+"""
+
+_REBUILD_FTS = "INSERT INTO documents_fts(documents_fts) VALUES('rebuild')"
+
+# Secondary b-tree indexes (name -> table(columns)); dropped during a bulk
+# load and rebuilt afterwards in one sorted pass each
+SECONDARY_INDEXES = {
+    "idx_documents_manufacturer": "documents(manufacturer)",
+    "idx_documents_type": "documents(document_type)",
+    "idx_fault_codes_code": "fault_codes(code)",
+    "idx_fault_codes_manufacturer": "fault_codes(manufacturer)",
+}
+_CREATE_INDEXES = "".join(
+    f"CREATE INDEX IF NOT EXISTS {name} ON {target};\n"
+    for name, target in SECONDARY_INDEXES.items()
+)
+
+INSERT_DOCUMENT = """
+    INSERT INTO documents (filename, filepath, manufacturer, model, document_type, content, metadata)
+    VALUES (?, ?, ?, ?, ?, ?, ?)
+"""
+
+INSERT_FAULT_CODE = """
+    INSERT INTO fault_codes
+    (code, manufacturer, description, severity, causes, remedies, document_id, metadata)
+    VALUES (?, ?, ?, ?, ?, ?, ?, ?)
+"""
+
+
+def _json_text(value: Any) -> str | None:
+    """Encode a JSON column value (empty values are stored as NULL)."""
+    return orjson.dumps(value).decode() if value else None
+
+
+def document_params(
+    filename: str,
+    content: str,
+    manufacturer: str | None = None,
+    model: str | None = None,
+    document_type: str | None = None,
+    filepath: str | None = None,
+    metadata: dict[str, Any] | None = None,
+) -> tuple[Any, ...]:
+    """Bind parameters for INSERT_DOCUMENT."""
+    return (
+        filename,
+        filepath,
+        manufacturer,
+        model,
+        document_type,
+        content,
+        _json_text(metadata),
+    )
+
+
+def fault_code_params(
+    code: str,
+    description: str,
+    manufacturer: str | None = None,
+    severity: str | None = None,
+    causes: list[str] | None = None,
+    remedies: list[str] | None = None,
+    document_id: int | None = None,
+    metadata: dict[str, Any] | None = None,
+) -> tuple[Any, ...]:
+    """Bind parameters for INSERT_FAULT_CODE."""
+    return (
+        code,
+        manufacturer,
+        description,
+        severity,
+        _json_text(causes),
+        _json_text(remedies),
+        document_id,
+        _json_text(metadata),
+    )
+
+
+async def create_deferred_indexes(conn: aiosqlite.Connection, rebuild_fts: bool = False) -> None:
+    """
+    Create the secondary indexes and FTS insert trigger if missing.
+
+    Args:
+        conn: Open connection (the caller commits)
+        rebuild_fts: Also rebuild the FTS index, e.g. after a bulk load
+            that never finished left documents unindexed
+    """
+    await conn.executescript(_CREATE_INDEXES)
+    await conn.executescript(DOCUMENTS_INSERT_TRIGGER)
+    if rebuild_fts:
+        logger.warning("Rebuilding FTS index after an interrupted bulk load")
+        await conn.execute(_REBUILD_FTS)
+
+
+@asynccontextmanager
+async def deferred_indexing(conn: aiosqlite.Connection) -> AsyncIterator[None]:
+    """
+    Defer FTS indexing, secondary indexes and fsyncs within the block.
+
+    The per-row insert trigger is dropped while loading and the FTS index
+    is rebuilt once on exit, so each document is tokenized in one bulk pass
+    instead of inside every insert. The manufacturer, type and code indexes
+    are likewise dropped and rebuilt (then ANALYZEd) on exit, so inserts
+    only append to the tables.
+
+    Commits skip fsync (``synchronous=OFF``) until the block exits, when the
+    WAL is checkpointed into the database; an OS crash mid-load can lose the
+    loaded batches, which a rerun of the load restores.
+    """
+    await conn.execute("DROP TRIGGER IF EXISTS documents_ai")
+    for name in SECONDARY_INDEXES:
+        await conn.execute(f"DROP INDEX IF EXISTS {name}")
+    await conn.commit()
+    await conn.execute("PRAGMA synchronous=OFF")
+    try:
+        yield
+    finally:
+        await conn.executescript(_CREATE_INDEXES)
+        await conn.executescript(DOCUMENTS_INSERT_TRIGGER)
+        await conn.execute(_REBUILD_FTS)
+        await conn.execute("ANALYZE")
+        await conn.commit()
+        await conn.execute("PRAGMA synchronous=NORMAL")
+        await conn.execute("PRAGMA wal_checkpoint(TRUNCATE)")
+        logger.info("Indexes rebuilt after bulk load")
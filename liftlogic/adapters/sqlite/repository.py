@@ -10,16 +10,43 @@ Features:
 
 from __future__ import annotations
 
-import json
 import logging
+from collections.abc import AsyncIterator, Sequence
+from contextlib import asynccontextmanager
 from pathlib import Path
-from typing import Any
+from typing import Any, cast
 
 import aiosqlite
 
+from .bulk import (
+    INSERT_DOCUMENT,
+    INSERT_FAULT_CODE,
+    create_deferred_indexes,
+    deferred_indexing,
+    document_params,
+    fault_code_params,
+)
+
 logger = logging.getLogger(__name__)
 
-__all__ = ["SQLiteRepository"]
+__all__ = ["FTS_COLUMNS", "SQLiteRepository"]
+
+# Column order of the tuples returned by SQLiteRepository.search_fts
+FTS_COLUMNS = ("id", "filename", "content", "manufacturer", "document_type", "score", "snippet")
+
+# Per-connection settings for a read-heavy FTS5 workload: WAL lets searches
+# run alongside writes, and a memory-mapped file plus a 200 MB page cache
+# keep hot FTS segments out of the read() path
+_CONNECTION_PRAGMAS = (
+    "PRAGMA journal_mode=WAL",
+    "PRAGMA synchronous=NORMAL",
+    "PRAGMA mmap_size=30000000000",
+    "PRAGMA cache_size=-200000",
+    "PRAGMA temp_store=MEMORY",
+)
+
+# Rows sampled per index by ANALYZE, so startup stays fast on large databases
+_ANALYSIS_LIMIT = 1000
 
 
 class SQLiteRepository:
@@ -49,12 +76,19 @@ class SQLiteRepository:
         if self._connection is None:
             self._connection = await aiosqlite.connect(str(self.db_path))
             self._connection.row_factory = aiosqlite.Row
+            for pragma in _CONNECTION_PRAGMAS:
+                await self._connection.execute(pragma)
         return self._connection
 
     async def initialize(self) -> None:
         """Initialize database schema."""
         conn = await self._get_connection()
 
+        cursor = await conn.execute(
+            "SELECT name FROM sqlite_master WHERE name IN ('documents', 'documents_ai')"
+        )
+        existing = {row[0] for row in await cursor.fetchall()}
+
         await conn.executescript("""
             -- Documents table
             CREATE TABLE IF NOT EXISTS documents (
@@ -81,12 +115,7 @@ class SQLiteRepository:
                 tokenize='porter'
             );
 
-            -- Triggers to keep FTS in sync
-            CREATE TRIGGER IF NOT EXISTS documents_ai AFTER INSERT ON documents BEGIN
-                INSERT INTO documents_fts(rowid, filename, manufacturer, model, content)
-                VALUES (new.id, new.filename, new.manufacturer, new.model, new.content);
-            END;
-
+            -- Triggers to keep FTS in sync (documents_ai: bulk.DOCUMENTS_INSERT_TRIGGER)
             CREATE TRIGGER IF NOT EXISTS documents_ad AFTER DELETE ON documents BEGIN
                 INSERT INTO documents_fts(documents_fts, rowid, filename, manufacturer, model, content)
                 VALUES ('delete', old.id, old.filename, old.manufacturer, old.model, old.content);
@@ -112,17 +141,47 @@ class SQLiteRepository:
                 metadata TEXT,
                 FOREIGN KEY (document_id) REFERENCES documents(id)
             );
-
-            -- Indexes
-            CREATE INDEX IF NOT EXISTS idx_documents_manufacturer ON documents(manufacturer);
-            CREATE INDEX IF NOT EXISTS idx_documents_type ON documents(document_type);
-            CREATE INDEX IF NOT EXISTS idx_fault_codes_code ON fault_codes(code);
-            CREATE INDEX IF NOT EXISTS idx_fault_codes_manufacturer ON fault_codes(manufacturer);
         """)
+        # A bulk_load that never finished left documents missing from FTS
+        await create_deferred_indexes(
+            conn, rebuild_fts="documents" in existing and "documents_ai" not in existing
+        )
+
+        await conn.commit()
 
+        # Refresh planner statistics so the manufacturer/type indexes are
+        # chosen consistently from the first query
+        await conn.execute(f"PRAGMA analysis_limit={_ANALYSIS_LIMIT}")
+        await conn.execute("ANALYZE")
         await conn.commit()
         logger.info("Database initialized: %s", self.db_path)
 
+    async def optimize(self) -> None:
+        """
+        Merge FTS5 index segments and refresh planner statistics.
+
+        Incremental inserts leave the FTS index split across many b-trees;
+        merging them keeps MATCH queries fast. Intended to run periodically
+        (e.g. weekly), as it rewrites the whole index.
+        """
+        conn = await self._get_connection()
+        await conn.execute("INSERT INTO documents_fts(documents_fts) VALUES('optimize')")
+        await conn.execute("PRAGMA optimize")
+        await conn.commit()
+        logger.info("Database optimized: %s", self.db_path)
+
+    @asynccontextmanager
+    async def bulk_load(self) -> AsyncIterator[None]:
+        """
+        Defer FTS indexing, secondary indexes and fsyncs within the block.
+
+        Documents loaded in the block are not searchable until it exits,
+        when the FTS index and secondary indexes are rebuilt in one pass
+        each; see ``bulk.deferred_indexing``.
+        """
+        async with deferred_indexing(await self._get_connection()):
+            yield
+
     async def insert_document(
         self,
         filename: str,
@@ -142,24 +201,53 @@ class SQLiteRepository:
         conn = await self._get_connection()
 
         cursor = await conn.execute(
-            """
-            INSERT INTO documents (filename, filepath, manufacturer, model, document_type, content, metadata)
-            VALUES (?, ?, ?, ?, ?, ?, ?)
-            """,
-            (
+            INSERT_DOCUMENT,
+            document_params(
                 filename,
-                filepath,
-                manufacturer,
-                model,
-                document_type,
                 content,
-                json.dumps(metadata) if metadata else None,
+                manufacturer=manufacturer,
+                model=model,
+                document_type=document_type,
+                filepath=filepath,
+                metadata=metadata,
             ),
         )
 
         await conn.commit()
         return cursor.lastrowid or 0
 
+    async def insert_documents_bulk(self, documents: Sequence[dict[str, Any]]) -> list[int]:
+        """
+        Insert many documents in one transaction.
+
+        Uses a single executemany, so bulk loads pay one commit (and one
+        fsync) instead of one per document.
+
+        Args:
+            documents: Keyword arguments for ``insert_document``, one dict
+                per document
+
+        Returns:
+            Document IDs, in input order
+        """
+        if not documents:
+            return []
+
+        conn = await self._get_connection()
+        try:
+            await conn.executemany(INSERT_DOCUMENT, [document_params(**doc) for doc in documents])
+            # AUTOINCREMENT ids are consecutive within one write transaction
+            cursor = await conn.execute("SELECT last_insert_rowid()")
+            row = await cursor.fetchone()
+            await conn.commit()
+        except Exception:
+            await conn.rollback()
+            raise
+
+        last_id = row[0] if row else 0
+        first_id = last_id - len(documents) + 1
+        return list(range(first_id, last_id + 1))
+
     async def get_document(self, doc_id: int) -> dict[str, Any] | None:
         """Get document by ID."""
         conn = await self._get_connection()
@@ -171,51 +259,140 @@ class SQLiteRepository:
             return dict(row)
         return None
 
+    async def get_documents_for_embedding(self, max_chars: int = 1000) -> list[tuple[Any, ...]]:
+        """
+        Get every document with content, truncated for embedding.
+
+        Content is cut to ``max_chars`` in SQL, so full document bodies
+        never leave SQLite. Rows are plain tuples, which the index build
+        splits into per-column lists in one pass.
+
+        Args:
+            max_chars: Length of the content prefix returned per document
+
+        Returns:
+            Documents as (id, content prefix) tuples, ordered by id
+        """
+        conn = await self._get_connection()
+
+        cursor = await conn.execute(
+            """
+            SELECT id, substr(content, 1, ?) AS content
+            FROM documents
+            WHERE content IS NOT NULL
+            ORDER BY id
+            """,
+            (max_chars,),
+        )
+        cursor.row_factory = None
+        rows = await cursor.fetchall()
+
+        # row_factory=None above, so these are tuples rather than Rows
+        return cast(list[tuple[Any, ...]], rows)
+
+    async def get_documents_by_ids(
+        self,
+        doc_ids: Sequence[int],
+        content_chars: int = 500,
+    ) -> list[tuple[Any, ...]]:
+        """
+        Get documents by ID, e.g. to join vector search hits back to SQLite.
+
+        Args:
+            doc_ids: Document IDs
+            content_chars: Length of the content prefix returned per row
+
+        Returns:
+            Documents as (id, filename, content prefix, manufacturer,
+            document_type) tuples, in no particular order; unknown IDs are
+            skipped
+        """
+        if not doc_ids:
+            return []
+
+        conn = await self._get_connection()
+
+        placeholders = ",".join("?" * len(doc_ids))
+        cursor = await conn.execute(
+            f"""
+            SELECT id, filename, substr(content, 1, ?) AS content, manufacturer, document_type
+            FROM documents
+            WHERE id IN ({placeholders})
+            """,
+            (content_chars, *doc_ids),
+        )
+        cursor.row_factory = None
+        rows = await cursor.fetchall()
+
+        # row_factory=None above, so these are tuples rather than Rows
+        return cast(list[tuple[Any, ...]], rows)
+
     async def search_fts(
         self,
         query: str,
         limit: int = 20,
         manufacturer: str | None = None,
-    ) -> list[dict[str, Any]]:
+        content_chars: int = 500,
+    ) -> list[tuple[Any, ...]]:
         """
         Full-text search using FTS5.
 
+        Rows are plain tuples in ``FTS_COLUMNS`` order, so callers can unpack
+        them positionally without per-row dict construction.
+
         Args:
             query: Search query
             limit: Maximum results
             manufacturer: Optional manufacturer filter
+            content_chars: Length of the content prefix returned per row
 
         Returns:
-            List of matching documents with BM25 scores
+            Matching documents as (id, filename, content prefix,
+            manufacturer, document_type, score, snippet) tuples, where score
+            is the (negative) BM25 score and snippet a highlighted excerpt
         """
         conn = await self._get_connection()
 
-        # Build query with optional manufacturer filter
-        if manufacturer:
-            sql = """
-                SELECT d.*, bm25(documents_fts) as score
-                FROM documents_fts
-                JOIN documents d ON documents_fts.rowid = d.id
-                WHERE documents_fts MATCH ? AND d.manufacturer = ?
-                ORDER BY score
-                LIMIT ?
-            """
-            params: tuple[Any, ...] = (query, manufacturer, limit)
-        else:
-            sql = """
-                SELECT d.*, bm25(documents_fts) as score
+        # MATCH runs alone in the CTE so the planner keeps the FTS5 index;
+        # combining it with a documents filter in one WHERE can make SQLite
+        # scan the index instead. The manufacturer filter is then applied to
+        # the top-ranked rowids, so over-fetch to leave room for it.
+        # Content is truncated in SQL so full document bodies never leave
+        # SQLite.
+        fts_limit = limit * 10 if manufacturer else limit
+        sql = """
+            WITH fts AS (
+                SELECT
+                    rowid,
+                    bm25(documents_fts) AS score,
+                    snippet(documents_fts, -1, '<b>', '</b>', '…', 32) AS snippet
                 FROM documents_fts
-                JOIN documents d ON documents_fts.rowid = d.id
                 WHERE documents_fts MATCH ?
                 ORDER BY score
                 LIMIT ?
-            """
-            params = (query, limit)
+            )
+            SELECT
+                d.id,
+                d.filename,
+                substr(d.content, 1, ?) AS content,
+                d.manufacturer,
+                d.document_type,
+                fts.score,
+                fts.snippet
+            FROM fts
+            JOIN documents d ON d.id = fts.rowid
+            WHERE (? IS NULL OR d.manufacturer = ?)
+            ORDER BY fts.score
+            LIMIT ?
+        """
+        params = (query, fts_limit, content_chars, manufacturer, manufacturer, limit)
 
         cursor = await conn.execute(sql, params)
+        cursor.row_factory = None
         rows = await cursor.fetchall()
 
-        return [dict(row) for row in rows]
+        # row_factory=None above, so these are tuples rather than Rows
+        return cast(list[tuple[Any, ...]], rows)
 
     async def insert_fault_code(
         self,
@@ -232,26 +409,47 @@ class SQLiteRepository:
         conn = await self._get_connection()
 
         cursor = await conn.execute(
-            """
-            INSERT INTO fault_codes
-            (code, manufacturer, description, severity, causes, remedies, document_id, metadata)
-            VALUES (?, ?, ?, ?, ?, ?, ?, ?)
-            """,
-            (
+            INSERT_FAULT_CODE,
+            fault_code_params(
                 code,
-                manufacturer,
                 description,
-                severity,
-                json.dumps(causes) if causes else None,
-                json.dumps(remedies) if remedies else None,
-                document_id,
-                json.dumps(metadata) if metadata else None,
+                manufacturer=manufacturer,
+                severity=severity,
+                causes=causes,
+                remedies=remedies,
+                document_id=document_id,
+                metadata=metadata,
             ),
         )
 
         await conn.commit()
         return cursor.lastrowid or 0
 
+    async def insert_fault_codes_bulk(self, fault_codes: Sequence[dict[str, Any]]) -> int:
+        """
+        Insert many fault codes in one transaction.
+
+        Args:
+            fault_codes: Keyword arguments for ``insert_fault_code``, one
+                dict per fault code
+
+        Returns:
+            Number of fault codes inserted
+        """
+        if not fault_codes:
+            return 0
+
+        conn = await self._get_connection()
+        try:
+            await conn.executemany(
+                INSERT_FAULT_CODE, [fault_code_params(**fault) for fault in fault_codes]
+            )
+            await conn.commit()
+        except Exception:
+            await conn.rollback()
+            raise
+        return len(fault_codes)
+
     async def get_fault_code(
         self,
         code: str,
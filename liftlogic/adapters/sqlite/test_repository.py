@@ -2,10 +2,12 @@
 
 from collections.abc import AsyncGenerator
 from pathlib import Path
+from typing import Any
 
 import pytest
 
-from .repository import SQLiteRepository
+from .bulk import SECONDARY_INDEXES
+from .repository import FTS_COLUMNS, SQLiteRepository
 
 
 @pytest.fixture
@@ -18,6 +20,11 @@ async def repo(tmp_path: Path) -> AsyncGenerator[SQLiteRepository, None]:
     await repo.close()
 
 
+def _as_dicts(rows: list[tuple[Any, ...]]) -> list[dict[str, Any]]:
+    """Key FTS result tuples by column name."""
+    return [dict(zip(FTS_COLUMNS, row, strict=True)) for row in rows]
+
+
 async def test_initialize_creates_tables(repo: SQLiteRepository) -> None:
     """Test that initialize creates all required tables."""
     conn = await repo._get_connection()
@@ -64,16 +71,41 @@ async def test_search_fts(repo: SQLiteRepository) -> None:
     )
 
     # Search for specific term
-    results = await repo.search_fts("fault code 505")
+    results = _as_dicts(await repo.search_fts("fault code 505"))
     assert len(results) >= 1
     assert any("505" in r["content"] for r in results)
 
     # Search with manufacturer filter
-    results = await repo.search_fts("motor", manufacturer="Otis")
+    results = _as_dicts(await repo.search_fts("motor", manufacturer="Otis"))
     assert len(results) >= 1
     assert all(r["manufacturer"] == "Otis" for r in results)
 
 
+async def test_search_fts_manufacturer_filter_respects_limit(repo: SQLiteRepository) -> None:
+    """Test manufacturer-filtered search ranks by BM25 and applies the limit."""
+    for i in range(3):
+        await repo.insert_document(
+            filename=f"kone{i}.pdf", content="Door operator fault " * (i + 1), manufacturer="KONE"
+        )
+        await repo.insert_document(
+            filename=f"otis{i}.pdf", content="Door operator fault", manufacturer="Otis"
+        )
+
+    results = _as_dicts(await repo.search_fts("door", limit=2, manufacturer="KONE"))
+    assert len(results) == 2
+    assert all(r["manufacturer"] == "KONE" for r in results)
+    assert results[0]["score"] <= results[1]["score"]
+
+
+async def test_search_fts_truncates_content_and_highlights(repo: SQLiteRepository) -> None:
+    """Test search returns a content prefix plus a highlighted snippet."""
+    await repo.insert_document(filename="long.pdf", content="Brake wear check. " * 1000)
+
+    results = _as_dicts(await repo.search_fts("brake", content_chars=100))
+    assert len(results[0]["content"]) == 100
+    assert "<b>Brake</b>" in results[0]["snippet"]
+
+
 async def test_insert_and_get_fault_code(repo: SQLiteRepository) -> None:
     """Test fault code operations."""
     # Insert a document first (for foreign key)
@@ -120,5 +152,84 @@ async def test_get_document_count(repo: SQLiteRepository) -> None:
 
 async def test_search_empty_query(repo: SQLiteRepository) -> None:
     """Test search with empty results."""
-    results = await repo.search_fts("nonexistent_term_xyz")
+    results = _as_dicts(await repo.search_fts("nonexistent_term_xyz"))
     assert results == []
+
+
+async def test_connection_uses_wal(repo: SQLiteRepository) -> None:
+    """Test connections are opened in WAL mode."""
+    conn = await repo._get_connection()
+    cursor = await conn.execute("PRAGMA journal_mode")
+    row = await cursor.fetchone()
+    assert row is not None
+    assert row[0] == "wal"
+
+
+async def test_optimize_keeps_index_searchable(repo: SQLiteRepository) -> None:
+    """Test FTS optimize merges segments without losing documents."""
+    for i in range(3):
+        await repo.insert_document(filename=f"doc{i}.pdf", content="Brake fault")
+
+    await repo.optimize()
+
+    results = await repo.search_fts("brake")
+    assert len(results) == 3
+
+
+async def test_bulk_inserts(repo: SQLiteRepository) -> None:
+    """Test bulk inserts return ordered IDs usable as fault code foreign keys."""
+    await repo.insert_document(filename="existing.pdf", content="Existing")
+
+    doc_ids = await repo.insert_documents_bulk(
+        [
+            {"filename": "a.pdf", "content": "Door fault", "manufacturer": "KONE"},
+            {"filename": "b.pdf", "content": "Brake fault", "metadata": {"pages": 2}},
+        ]
+    )
+    assert [(await repo.get_document(i) or {})["filename"] for i in doc_ids] == ["a.pdf", "b.pdf"]
+
+    inserted = await repo.insert_fault_codes_bulk(
+        [{"code": "F505", "description": "Door lock", "document_id": doc_ids[0]}]
+    )
+    assert inserted == 1
+    faults = await repo.get_fault_code("F505")
+    assert faults[0]["document_id"] == doc_ids[0]
+    assert len(await repo.search_fts("brake")) == 1
+
+
+async def test_bulk_load_defers_fts_until_exit(repo: SQLiteRepository) -> None:
+    """Test documents loaded in bulk_load are indexed once the block exits."""
+    async with repo.bulk_load():
+        await repo.insert_documents_bulk([{"filename": "a.pdf", "content": "Brake fault"}])
+        assert await repo.search_fts("brake") == []
+
+    assert len(await repo.search_fts("brake")) == 1
+    conn = await repo._get_connection()
+    cursor = await conn.execute("PRAGMA synchronous")
+    row = await cursor.fetchone()
+    assert row is not None
+    assert row[0] == 1  # NORMAL restored
+    cursor = await conn.execute("SELECT name FROM sqlite_master WHERE name LIKE 'idx_%'")
+    assert {row[0] for row in await cursor.fetchall()} == set(SECONDARY_INDEXES)  # Rebuilt
+    await repo.insert_document(filename="b.pdf", content="Brake wear")
+    assert len(await repo.search_fts("brake")) == 2
+
+
+async def test_get_documents_for_embedding(repo: SQLiteRepository) -> None:
+    """Test documents for embedding are truncated and skip empty content."""
+    doc_id = await repo.insert_document(filename="long.pdf", content="x" * 5000)
+
+    rows = await repo.get_documents_for_embedding(max_chars=1000)
+    assert rows == [(doc_id, "x" * 1000)]
+
+
+async def test_get_documents_by_ids(repo: SQLiteRepository) -> None:
+    """Test documents are fetched by ID with truncated content."""
+    doc_id = await repo.insert_document(
+        filename="a.pdf", content="Door fault " * 100, manufacturer="KONE"
+    )
+    await repo.insert_document(filename="b.pdf", content="Brake fault")
+
+    rows = await repo.get_documents_by_ids([doc_id, 999], content_chars=10)
+    assert rows == [(doc_id, "a.pdf", "Door fault", "KONE", None)]
+    assert await repo.get_documents_by_ids([]) == []
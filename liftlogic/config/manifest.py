@@ -21,12 +21,13 @@ Usage:
 from __future__ import annotations
 
 import hashlib
-import json
 from dataclasses import dataclass, field
 from datetime import UTC, datetime
 from pathlib import Path
 from typing import Any
 
+import orjson
+
 
 @dataclass
 class ManifestItem:
@@ -191,14 +192,12 @@ class ArtifactManifest:
         path = Path(path)
         path.parent.mkdir(parents=True, exist_ok=True)
 
-        with open(path, "w") as f:
-            json.dump(self.to_dict(), f, indent=2)
+        path.write_bytes(orjson.dumps(self.to_dict(), option=orjson.OPT_INDENT_2))
 
     @classmethod
     def load(cls, path: str | Path) -> ArtifactManifest:
         """Load manifest from JSON file."""
-        with open(path) as f:
-            data = json.load(f)
+        data = orjson.loads(Path(path).read_bytes())
         return cls.from_dict(data)
 
 
@@ -229,14 +228,21 @@ def create_faiss_manifest(
     dim: int,
     doc_count: int,
     source: str | None = None,
+    index_type: str | None = None,
+    nprobe: int | None = None,
 ) -> ArtifactManifest:
     """Create manifest for FAISS index."""
+    metadata: dict[str, Any] = {"document_count": doc_count}
+    if index_type is not None:
+        metadata["index_type"] = index_type
+    if nprobe is not None:
+        metadata["nprobe"] = nprobe
     manifest = ArtifactManifest(
         artifact_type="faiss_index",
         model=model,
         dim=dim,
         source=source,
-        metadata={"document_count": doc_count},
+        metadata=metadata,
     )
     manifest.add_item(index_path)
     return manifest
@@ -12,8 +12,10 @@ from .contracts import GraphStore, Reasoner
 from .graph_store import KnowledgeGraphStore
 from .models import (
     CausalChain,
+    FaultProcedures,
     KnowledgeEdge,
     KnowledgeNode,
+    NodeType,
     ReasoningPath,
 )
 from .reasoner import GraphReasoner
@@ -23,8 +25,10 @@ __all__ = [
     "GraphStore",
     "Reasoner",
     # Models
+    "NodeType",
     "KnowledgeNode",
     "KnowledgeEdge",
+    "FaultProcedures",
     "ReasoningPath",
     "CausalChain",
     # Implementations
@@ -15,12 +15,14 @@ import networkx as nx
 
 from .models import (
     EdgeType,
+    FaultProcedures,
     GraphStats,
     KnowledgeEdge,
     KnowledgeNode,
     NodeType,
     ReasoningPath,
 )
+from .procedures import project_fault_procedures
 
 if TYPE_CHECKING:
     from liftlogic.adapters.neo4j import Neo4jClient
@@ -468,3 +470,18 @@ class KnowledgeGraphStore:
             edge_type=EdgeType.TESTED_BY.value,
             direction="out",
         )
+
+    async def get_fault_with_procedures(self, code: str) -> FaultProcedures | None:
+        """
+        Get a fault and its resolution and test procedures in one call.
+
+        Args:
+            code: Fault code to search for
+
+        Returns:
+            FaultProcedures if the fault exists, None otherwise
+        """
+        fault = await self.find_fault_by_code(code)
+        if fault is None:
+            return None
+        return project_fault_procedures(self._graph, self._nodes, fault)
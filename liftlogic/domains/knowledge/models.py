@@ -69,6 +69,18 @@ class KnowledgeEdge(BaseModel):
     confidence: float = 1.0
 
 
+class FaultProcedures(BaseModel):
+    """The fields of a fault node and its procedures needed to explain it."""
+
+    id: str
+    name: str
+    description: str | None = None
+    reason: str | None = None
+    operation: str | None = None
+    resolutions: list[str] = Field(default_factory=list)  # Procedure texts
+    tests: list[str] = Field(default_factory=list)  # Procedure texts
+
+
 class ReasoningPath(BaseModel):
     """A path through the knowledge graph."""
 
@@ -0,0 +1,61 @@
+"""
+Fault Procedures - Projection of a fault and its procedures from the graph.
+
+Kept apart from the graph store so fault explanations can take only the
+fields they use instead of whole nodes.
+"""
+
+from __future__ import annotations
+
+from collections.abc import Mapping
+
+import networkx as nx
+
+from .models import EdgeType, FaultProcedures, KnowledgeNode
+
+__all__ = ["project_fault_procedures"]
+
+
+def project_fault_procedures(
+    graph: nx.DiGraph,
+    nodes: Mapping[str, KnowledgeNode],
+    fault: KnowledgeNode,
+) -> FaultProcedures:
+    """
+    Project a fault node with its resolution and test procedures.
+
+    Walks the fault's outgoing edges once instead of once per edge type.
+
+    Args:
+        graph: Graph holding the fault's edges
+        nodes: Node lookup by ID
+        fault: The fault node
+
+    Returns:
+        FaultProcedures with the fault fields and procedure texts
+    """
+    props = fault.properties
+    resolutions: list[str] = []
+    tests: list[str] = []
+    resolved_by = EdgeType.RESOLVED_BY.value
+    tested_by = EdgeType.TESTED_BY.value
+    for _, target, edge_type in graph.out_edges(fault.id, data="type"):
+        if edge_type == resolved_by:
+            bucket = resolutions
+        elif edge_type == tested_by:
+            bucket = tests
+        else:
+            continue
+        node = nodes.get(target)
+        if node:
+            bucket.append(node.properties.get("text", node.name))
+
+    return FaultProcedures(
+        id=fault.id,
+        name=props.get("name", fault.name),
+        description=props.get("description"),
+        reason=props.get("reason"),
+        operation=props.get("operation"),
+        resolutions=resolutions,
+        tests=tests,
+    )
@@ -228,3 +228,34 @@ async def test_get_fault_resolution(graph: KnowledgeGraphStore) -> None:
     resolutions = await graph.get_fault_resolution("fault")
     assert len(resolutions) == 1
     assert resolutions[0].properties["text"] == "Power cycle the system"
+
+
+async def test_get_fault_with_procedures(graph: KnowledgeGraphStore) -> None:
+    """Test fetching a fault with resolutions and tests in one call."""
+    await graph.add_node(
+        KnowledgeNode(id="fault", type=NodeType.ENTITY, name="F100", properties={"code": "100"})
+    )
+    await graph.add_node(
+        KnowledgeNode(
+            id="reset",
+            type=NodeType.PROCEDURE,
+            name="Reset",
+            properties={"text": "Power cycle the system"},
+        )
+    )
+    await graph.add_node(KnowledgeNode(id="meter", type=NodeType.PROCEDURE, name="Measure"))
+    await graph.add_edge(
+        KnowledgeEdge(source_id="fault", target_id="reset", type=EdgeType.RESOLVED_BY)
+    )
+    await graph.add_edge(
+        KnowledgeEdge(source_id="fault", target_id="meter", type=EdgeType.TESTED_BY)
+    )
+
+    result = await graph.get_fault_with_procedures("100")
+    assert result is not None
+    assert result.id == "fault"
+    assert result.name == "F100"
+    assert result.resolutions == ["Power cycle the system"]
+    assert result.tests == ["Measure"]  # Falls back to the node name
+
+    assert await graph.get_fault_with_procedures("999") is None
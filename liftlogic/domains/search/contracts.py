@@ -25,7 +25,7 @@ class SearchEngine(Protocol):
 class Ranker(Protocol):
     """Contract for result ranking implementations."""
 
-    async def rerank(
+    def rerank(
         self,
         query: str,
         results: list[SearchResult],
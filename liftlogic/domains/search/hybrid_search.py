@@ -63,86 +63,146 @@ class HybridSearchEngine:
         """
         Execute hybrid search.
 
+        Dispatches once on the query flags so single-mode requests skip
+        the fusion pass entirely.
+
         Args:
             query: Search query parameters
 
         Returns:
             List of search results sorted by relevance
         """
+        use_vector = query.use_vector and self._faiss.size > 0
+        use_keyword = query.use_keyword
+
+        if use_vector and use_keyword:
+            return await self._search_hybrid(query)
+        if use_vector:
+            return await self._search_vector_only(query)
+        if use_keyword:
+            return await self._search_keyword_only(query)
+        return []
+
+    async def _search_hybrid(self, query: SearchQuery) -> list[SearchResult]:
+        """Run both retrievers and fuse their rankings with RRF."""
+        limit = query.limit
+        rrf_k = self._rrf_k
+
+        vector_results = await self._vector_search(query)
+        keyword_results = await self._keyword_search(query)
+
+        # Identical top-k in identical order (typical for exact fault-code
+        # lookups) fuses to the same order, so skip the RRF pass
+        top_vector = vector_results[:limit]
+        if [r.doc_id for r in top_vector] == [r.doc_id for r in keyword_results[:limit]]:
+            for rank, result in enumerate(top_vector, 1):
+                result.score = 2.0 / (rrf_k + rank)
+                result.source = "hybrid"
+            if logger.isEnabledFor(logging.INFO):
+                logger.info(
+                    "Hybrid search: query='%s' -> %d results (identical rankings, fusion skipped)",
+                    query.query[:50],
+                    len(top_vector),
+                )
+            return top_vector
+
         results_map: dict[int, SearchResult] = {}
         vector_ranks: dict[int, int] = {}
         keyword_ranks: dict[int, int] = {}
 
-        # Vector search
-        if query.use_vector and self._faiss.size > 0:
-            vector_results = await self._vector_search(query)
-            for rank, result in enumerate(vector_results, 1):
-                results_map[result.doc_id] = result
-                vector_ranks[result.doc_id] = rank
-
-        # Keyword search
-        if query.use_keyword:
-            keyword_results = await self._keyword_search(query)
-            for rank, result in enumerate(keyword_results, 1):
-                if result.doc_id not in results_map:
-                    results_map[result.doc_id] = result
-                keyword_ranks[result.doc_id] = rank
+        for rank, result in enumerate(vector_results, 1):
+            results_map[result.doc_id] = result
+            vector_ranks[result.doc_id] = rank
+
+        for rank, result in enumerate(keyword_results, 1):
+            # Keep the vector hit if present; one hash probe either way
+            results_map.setdefault(result.doc_id, result)
+            keyword_ranks[result.doc_id] = rank
 
         # Reciprocal Rank Fusion
         rrf_scores: dict[int, float] = {}
         for doc_id in results_map:
             score = 0.0
             if doc_id in vector_ranks:
-                score += 1.0 / (self._rrf_k + vector_ranks[doc_id])
+                score += 1.0 / (rrf_k + vector_ranks[doc_id])
             if doc_id in keyword_ranks:
-                score += 1.0 / (self._rrf_k + keyword_ranks[doc_id])
+                score += 1.0 / (rrf_k + keyword_ranks[doc_id])
             rrf_scores[doc_id] = score
 
         # Sort by RRF score
         sorted_ids = sorted(rrf_scores.keys(), key=lambda x: rrf_scores[x], reverse=True)
 
         results = []
-        for doc_id in sorted_ids[: query.limit]:
+        for doc_id in sorted_ids[:limit]:
             result = results_map[doc_id]
             result.score = rrf_scores[doc_id]
             result.source = "hybrid"
             results.append(result)
 
-        logger.info(
-            "Hybrid search: query='%s' -> %d results (vector=%d, keyword=%d)",
-            query.query[:50],
-            len(results),
-            len(vector_ranks),
-            len(keyword_ranks),
-        )
+        # Guarded so the query slice is skipped when INFO is disabled
+        if logger.isEnabledFor(logging.INFO):
+            logger.info(
+                "Hybrid search: query='%s' -> %d results (vector=%d, keyword=%d)",
+                query.query[:50],
+                len(results),
+                len(vector_ranks),
+                len(keyword_ranks),
+            )
+
+        return results
+
+    async def _search_vector_only(self, query: SearchQuery) -> list[SearchResult]:
+        """Vector search only - results are already in rank order."""
+        results = (await self._vector_search(query))[: query.limit]
+        if logger.isEnabledFor(logging.INFO):
+            logger.info("Vector search: query='%s' -> %d results", query.query[:50], len(results))
+        return results
 
+    async def _search_keyword_only(self, query: SearchQuery) -> list[SearchResult]:
+        """Keyword search only - results are already in rank order."""
+        results = (await self._keyword_search(query))[: query.limit]
+        if logger.isEnabledFor(logging.INFO):
+            logger.info("Keyword search: query='%s' -> %d results", query.query[:50], len(results))
         return results
 
     async def _vector_search(self, query: SearchQuery) -> list[SearchResult]:
         """Execute vector similarity search."""
-        # Generate embedding and convert to numpy array
-        raw_embedding = self._embedder.encode(query.query)
-        # Convert tensor to numpy array if needed (sentence-transformers returns Tensor)
-        if hasattr(raw_embedding, "numpy"):
-            embedding: np.ndarray[Any, Any] = raw_embedding.numpy()
-        else:
-            embedding = cast(np.ndarray[Any, Any], raw_embedding)
+        # Request a normalized numpy embedding and hand it over as float16;
+        # FAISSIndex.search casts back to float32 right before the lookup
+        raw_embedding = self._embedder.encode(
+            query.query,
+            convert_to_numpy=True,
+            convert_to_tensor=False,
+            normalize_embeddings=True,
+        )
+        embedding = cast(np.ndarray[Any, Any], raw_embedding).astype(np.float16, copy=False)
 
-        # Search FAISS
-        faiss_results = await self._faiss.search(embedding, k=query.limit * 2)
+        # Search FAISS; hits are (doc_id, score) pairs
+        hits = await self._faiss.search(embedding, k=query.limit * 2)
+        if not hits:
+            return []
 
+        # One IN query joins the hits back to their documents
+        rows = await self._sqlite.get_documents_by_ids([doc_id for doc_id, _ in hits])
+        documents = {row[0]: row for row in rows}
+
+        # Rows come from our own database, so skip Pydantic validation
         results = []
-        for item in faiss_results:
-            meta = item["metadata"]
+        for doc_id, score in hits:
+            row = documents.get(doc_id)
+            if row is None:  # Deleted since the index was built
+                continue
+            _, filename, content, manufacturer, document_type = row
             results.append(
-                SearchResult(
-                    doc_id=meta.get("doc_id", 0),
-                    filename=meta.get("filename", ""),
-                    content=meta.get("content", "")[:500],
-                    manufacturer=meta.get("manufacturer"),
-                    document_type=meta.get("document_type"),
-                    score=item["score"],
+                SearchResult.model_construct(
+                    doc_id=doc_id,
+                    filename=filename,
+                    content=content or "",  # Truncated by get_documents_by_ids
+                    manufacturer=manufacturer,
+                    document_type=document_type,
+                    score=score,
                     source="vector",
+                    metadata={},
                 )
             )
 
@@ -156,23 +216,25 @@ class HybridSearchEngine:
             manufacturer=query.manufacturer,
         )
 
+        # Rows come from our own database, so skip Pydantic validation
         results = []
-        for row in rows:
+        for doc_id, filename, content, manufacturer, document_type, score, _ in rows:
             results.append(
-                SearchResult(
-                    doc_id=row["id"],
-                    filename=row["filename"],
-                    content=(row.get("content") or "")[:500],
-                    manufacturer=row.get("manufacturer"),
-                    document_type=row.get("document_type"),
-                    score=abs(row.get("score", 0)),  # BM25 scores are negative
+                SearchResult.model_construct(
+                    doc_id=doc_id,
+                    filename=filename,
+                    content=content or "",  # Truncated by search_fts
+                    manufacturer=manufacturer,
+                    document_type=document_type,
+                    score=abs(score or 0),  # BM25 scores are negative
                     source="keyword",
+                    metadata={},
                 )
             )
 
         return results
 
-    async def rerank(
+    def rerank(
         self,
         query: str,
         results: list[SearchResult],
@@ -181,6 +243,9 @@ class HybridSearchEngine:
         """
         Rerank results using cross-encoder (if available).
 
+        Synchronous while no awaitable work happens here; make it async
+        again once cross-encoder scoring is added.
+
         Args:
             query: Original query
             results: Results to rerank
@@ -191,14 +256,12 @@ class HybridSearchEngine:
         """
         # For now, return as-is with rank info
         # TODO: Add cross-encoder reranking
-        ranked = []
-        for i, result in enumerate(results[:top_k]):
-            ranked.append(
-                RankedResult(
-                    result=result,
-                    original_rank=i + 1,
-                    reranked_score=result.score,
-                    final_rank=i + 1,
-                )
+        return [
+            RankedResult.model_construct(
+                result=result,
+                original_rank=rank,
+                reranked_score=result.score,
+                final_rank=rank,
             )
-        return ranked
+            for rank, result in enumerate(results[:top_k], 1)
+        ]
@@ -6,7 +6,7 @@ from __future__ import annotations
 
 from typing import Any
 
-from pydantic import BaseModel, Field
+from pydantic import BaseModel, ConfigDict, Field
 
 
 class SearchQuery(BaseModel):
@@ -20,7 +20,8 @@ class SearchQuery(BaseModel):
     use_keyword: bool = True
     use_reranking: bool = True
 
-    model_config = {"frozen": True}
+    # Defaults are trusted constants, so only caller-supplied fields are validated
+    model_config = ConfigDict(frozen=True, extra="forbid", validate_default=False)
 
 
 class SearchResult(BaseModel):
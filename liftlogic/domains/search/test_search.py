@@ -80,6 +80,12 @@ def test_search_query_is_immutable() -> None:
         query.query = "changed"  # type: ignore
 
 
+def test_search_query_rejects_unknown_fields() -> None:
+    """Test SearchQuery forbids extra fields."""
+    with pytest.raises(ValueError):
+        SearchQuery(query="test", top_k=5)  # type: ignore[call-arg]
+
+
 # --- SearchResult Tests ---
 
 
@@ -176,28 +182,8 @@ def mock_faiss_index() -> AsyncMock:
     """Create a mock FAISS index."""
     mock = AsyncMock()
     mock.size = 100  # Non-empty index
-    mock.search.return_value = [
-        {
-            "score": 0.95,
-            "id": 0,
-            "metadata": {
-                "doc_id": 1,
-                "filename": "kone_manual.pdf",
-                "content": "Fault 505 door sensor",
-                "manufacturer": "KONE",
-            },
-        },
-        {
-            "score": 0.85,
-            "id": 1,
-            "metadata": {
-                "doc_id": 2,
-                "filename": "otis_manual.pdf",
-                "content": "Door fault troubleshooting",
-                "manufacturer": "OTIS",
-            },
-        },
-    ]
+    # (doc_id, score) hits, joined to documents via get_documents_by_ids
+    mock.search.return_value = [(1, 0.95), (2, 0.85)]
     return mock
 
 
@@ -205,22 +191,23 @@ def mock_faiss_index() -> AsyncMock:
 def mock_sqlite_repo() -> AsyncMock:
     """Create a mock SQLite repository."""
     mock = AsyncMock()
+    # (id, filename, content, manufacturer, document_type)
+    mock.get_documents_by_ids.return_value = [
+        (2, "otis_manual.pdf", "Door fault troubleshooting", "OTIS", None),
+        (1, "kone_manual.pdf", "Fault 505 door sensor", "KONE", None),
+    ]
+    # (id, filename, content, manufacturer, document_type, score, snippet)
     mock.search_fts.return_value = [
-        {
-            "id": 1,
-            "filename": "kone_manual.pdf",
-            "content": "Fault 505 door sensor malfunction",
-            "manufacturer": "KONE",
-            "document_type": "service_manual",
-            "score": -2.5,  # BM25 scores are negative
-        },
-        {
-            "id": 3,
-            "filename": "schindler_manual.pdf",
-            "content": "Door fault codes",
-            "manufacturer": "Schindler",
-            "score": -3.0,
-        },
+        (
+            1,
+            "kone_manual.pdf",
+            "Fault 505 door sensor malfunction",
+            "KONE",
+            "service_manual",
+            -2.5,  # BM25 scores are negative
+            None,
+        ),
+        (3, "schindler_manual.pdf", "Door fault codes", "Schindler", None, -3.0, None),
     ]
     return mock
 
@@ -277,6 +264,24 @@ async def test_hybrid_search_rrf_fusion(search_engine: HybridSearchEngine) -> No
     assert scores == sorted(scores, reverse=True)
 
 
+async def test_hybrid_search_identical_rankings_skip_fusion(
+    search_engine: HybridSearchEngine,
+    mock_sqlite_repo: AsyncMock,
+) -> None:
+    """Test identical vector/keyword top-k returns that order with RRF scores."""
+    mock_sqlite_repo.search_fts.return_value = [
+        (1, "kone_manual.pdf", "Fault 505 door sensor", "KONE", None, -2.5, None),
+        (2, "otis_manual.pdf", "Door fault troubleshooting", "OTIS", None, -3.0, None),
+    ]
+
+    results = await search_engine.search(SearchQuery(query="fault 505", limit=10))
+
+    assert [r.doc_id for r in results] == [1, 2]
+    assert all(r.source == "hybrid" for r in results)
+    assert results[0].score == pytest.approx(2.0 / 61)
+    assert results[1].score == pytest.approx(2.0 / 62)
+
+
 async def test_hybrid_search_vector_only(
     mock_faiss_index: AsyncMock,
     mock_sqlite_repo: AsyncMock,
@@ -295,10 +300,17 @@ async def test_hybrid_search_vector_only(
     query = SearchQuery(query="test", use_vector=True, use_keyword=False)
     results = await engine.search(query)
 
-    # Should only call FAISS, not SQLite
+    # Should only call FAISS, not SQLite FTS
     mock_faiss_index.search.assert_called()
     mock_sqlite_repo.search_fts.assert_not_called()
 
+    # FAISS hit order is kept; documents are joined in by ID
+    mock_sqlite_repo.get_documents_by_ids.assert_awaited_once_with([1, 2])
+    assert [r.doc_id for r in results] == [1, 2]
+    assert results[0].filename == "kone_manual.pdf"
+    assert results[0].content == "Fault 505 door sensor"
+    assert all(r.source == "vector" for r in results)
+
 
 async def test_hybrid_search_keyword_only(
     mock_faiss_index: AsyncMock,
@@ -320,6 +332,11 @@ async def test_hybrid_search_keyword_only(
 
     # Should only call SQLite, not FAISS
     mock_sqlite_repo.search_fts.assert_called()
+    mock_faiss_index.search.assert_not_called()
+
+    # Single-mode results keep retriever order and source (no RRF pass)
+    assert [r.doc_id for r in results] == [1, 3]
+    assert all(r.source == "keyword" for r in results)
 
 
 async def test_hybrid_search_empty_index(
@@ -371,7 +388,7 @@ async def test_hybrid_search_with_manufacturer_filter(
     assert call_kwargs.kwargs.get("manufacturer") == "KONE"
 
 
-async def test_rerank_returns_ranked_results(search_engine: HybridSearchEngine) -> None:
+def test_rerank_returns_ranked_results(search_engine: HybridSearchEngine) -> None:
     """Test rerank method returns RankedResult objects."""
     results = [
         SearchResult(doc_id=1, filename="a.pdf", content="Content A", score=0.9),
@@ -379,7 +396,7 @@ async def test_rerank_returns_ranked_results(search_engine: HybridSearchEngine)
         SearchResult(doc_id=3, filename="c.pdf", content="Content C", score=0.7),
     ]
 
-    ranked = await search_engine.rerank("test query", results, top_k=2)
+    ranked = search_engine.rerank("test query", results, top_k=2)
 
     assert len(ranked) == 2
     assert all(isinstance(r, RankedResult) for r in ranked)
@@ -387,14 +404,14 @@ async def test_rerank_returns_ranked_results(search_engine: HybridSearchEngine)
     assert ranked[1].original_rank == 2
 
 
-async def test_rerank_respects_top_k(search_engine: HybridSearchEngine) -> None:
+def test_rerank_respects_top_k(search_engine: HybridSearchEngine) -> None:
     """Test rerank respects top_k parameter."""
     results = [
         SearchResult(doc_id=i, filename=f"{i}.pdf", content=f"Content {i}", score=0.9 - i * 0.1)
         for i in range(10)
     ]
 
-    ranked = await search_engine.rerank("test", results, top_k=3)
+    ranked = search_engine.rerank("test", results, top_k=3)
     assert len(ranked) == 3
 
 
@@ -444,9 +461,16 @@ async def test_full_search_workflow(
     assert all(r.score > 0 for r in results)
 
     # Verify embedding was called
-    mock_embedder.encode.assert_called_once_with("KONE door fault 505")
+    mock_embedder.encode.assert_called_once_with(
+        "KONE door fault 505",
+        convert_to_numpy=True,
+        convert_to_tensor=False,
+        normalize_embeddings=True,
+    )
+    faiss_query = mock_faiss_index.search.call_args.args[0]
+    assert faiss_query.dtype == np.float16
 
     # Rerank results
-    ranked = await engine.rerank("KONE door fault 505", results, top_k=3)
+    ranked = engine.rerank("KONE door fault 505", results, top_k=3)
     assert len(ranked) <= 3
     assert ranked[0].final_rank == 1
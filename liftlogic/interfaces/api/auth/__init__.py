@@ -10,13 +10,21 @@ Flow:
     Backend: Verify token → get user email → use token for Gemini
 """
 
-from .deps import UserContext, get_current_user, get_current_user_optional
+from .deps import (
+    UserContext,
+    close_auth_client,
+    get_current_user,
+    get_current_user_optional,
+    warmup_auth_client,
+)
 from .encryption import TokenEncryption, encryption
 
 __all__ = [
     "get_current_user",
     "get_current_user_optional",
     "UserContext",
+    "warmup_auth_client",
+    "close_auth_client",
     "TokenEncryption",
     "encryption",
 ]
@@ -8,14 +8,53 @@ We verify it and extract user info + the token for Gemini API calls.
 
 from __future__ import annotations
 
+import hashlib
 import logging
 from dataclasses import dataclass
 
 import httpx
 from fastapi import Header, HTTPException
 
+from liftlogic.domains.orchestration import ResponseCacheImpl
+
 logger = logging.getLogger(__name__)
 
+USERINFO_URL = "https://www.googleapis.com/oauth2/v3/userinfo"
+_WARMUP_URL = "https://www.googleapis.com/generate_204"
+
+# Shared client so token checks reuse pooled connections and TLS sessions
+_client: httpx.AsyncClient | None = None
+
+# Verified tokens -> UserContext, so a signed-in user costs one userinfo
+# round-trip per TTL rather than one per request. Google access tokens live
+# for an hour; a short TTL bounds how long a revoked token stays accepted.
+_TOKEN_CACHE_TTL = 300
+_token_cache = ResponseCacheImpl(max_size=1024, default_ttl=_TOKEN_CACHE_TTL)
+
+
+def _get_client() -> httpx.AsyncClient:
+    """Get or create the shared HTTP client for Google token validation."""
+    global _client
+    if _client is None:
+        _client = httpx.AsyncClient(timeout=10.0)
+    return _client
+
+
+async def warmup_auth_client() -> None:
+    """Open a pooled connection to Google so the first login skips the TLS handshake."""
+    try:
+        await _get_client().get(_WARMUP_URL)
+    except httpx.HTTPError as e:
+        logger.warning("Auth client warm-up failed: %s", e)
+
+
+async def close_auth_client() -> None:
+    """Close the shared HTTP client."""
+    global _client
+    if _client is not None:
+        await _client.aclose()
+        _client = None
+
 
 @dataclass
 class UserContext:
@@ -45,6 +84,8 @@ async def get_current_user(
     Expects 'Authorization: Bearer <token>' header.
     The token is a Google OAuth access token from Sign-In.
 
+    Successful verifications are cached for a few minutes per token.
+
     Returns:
         UserContext with email, name, picture, and access_token
 
@@ -60,30 +101,36 @@ async def get_current_user(
             raise HTTPException(status_code=401, detail="Invalid authentication scheme")
 
         token = parts[1]
+        cache_key = hashlib.sha256(token.encode()).hexdigest()
+        cached = await _token_cache.get(cache_key)
+        if cached is not None:
+            user: UserContext = cached.response
+            return user
 
         # Verify token by calling Google's userinfo endpoint
-        async with httpx.AsyncClient() as client:
-            response = await client.get(
-                "https://www.googleapis.com/oauth2/v3/userinfo",
-                headers={"Authorization": f"Bearer {token}"},
-            )
-
-            if response.status_code != 200:
-                logger.warning("Token validation failed: %s", response.text)
-                raise HTTPException(status_code=401, detail="Invalid authentication token")
-
-            user_info = response.json()
-            email = user_info.get("email")
-
-            if not email:
-                raise HTTPException(status_code=401, detail="Token does not contain email")
-
-            return UserContext(
-                email=email,
-                name=user_info.get("name"),
-                picture=user_info.get("picture"),
-                access_token=token,  # Keep token for Gemini calls
-            )
+        response = await _get_client().get(
+            USERINFO_URL,
+            headers={"Authorization": f"Bearer {token}"},
+        )
+
+        if response.status_code != 200:
+            logger.warning("Token validation failed: %s", response.text)
+            raise HTTPException(status_code=401, detail="Invalid authentication token")
+
+        user_info = response.json()
+        email = user_info.get("email")
+
+        if not email:
+            raise HTTPException(status_code=401, detail="Token does not contain email")
+
+        user = UserContext(
+            email=email,
+            name=user_info.get("name"),
+            picture=user_info.get("picture"),
+            access_token=token,  # Keep token for Gemini calls
+        )
+        await _token_cache.set(cache_key, user)
+        return user
 
     except HTTPException:
         raise
@@ -6,12 +6,37 @@ Provides singleton instances of database and service objects.
 
 from __future__ import annotations
 
+import asyncio
+import logging
 from functools import lru_cache
 from pathlib import Path
 
+from fastapi import Depends
+
+from liftlogic.adapters.llm import (
+    LLMService,
+    close_llm_http_client,
+    get_llm_for_user,
+    get_llm_http_client,
+)
 from liftlogic.adapters.sqlite import SQLiteRepository
 from liftlogic.config import get_settings
 from liftlogic.domains.knowledge import KnowledgeGraphStore
+from liftlogic.domains.orchestration import ResponseCacheImpl
+
+from .auth import (
+    UserContext,
+    close_auth_client,
+    get_current_user_optional,
+    warmup_auth_client,
+)
+
+logger = logging.getLogger(__name__)
+
+# Interval between FTS index merges (see SQLiteRepository.optimize)
+_DB_OPTIMIZE_INTERVAL = 7 * 24 * 3600
+
+_maintenance_task: asyncio.Task[None] | None = None
 
 
 @lru_cache
@@ -27,6 +52,36 @@ def get_knowledge_graph() -> KnowledgeGraphStore:
     return KnowledgeGraphStore()
 
 
+@lru_cache
+def get_diagnosis_cache() -> ResponseCacheImpl:
+    """Get the fault-context cache used by the diagnosis routes."""
+    return ResponseCacheImpl(max_size=512, default_ttl=300)
+
+
+@lru_cache
+def get_document_cache() -> ResponseCacheImpl:
+    """Get the document-head cache used by the analysis routes."""
+    return ResponseCacheImpl(max_size=256, default_ttl=600)
+
+
+@lru_cache
+def get_answer_cache() -> ResponseCacheImpl:
+    """Get the serialized RAG answer cache used by the search routes."""
+    return ResponseCacheImpl(max_size=4096, default_ttl=3600)
+
+
+async def get_llm(
+    user: UserContext | None = Depends(get_current_user_optional),
+) -> LLMService:
+    """
+    Get the LLM service for the requesting user.
+
+    FastAPI resolves this once per request, so handlers and any
+    sub-dependencies share one service and provider choice.
+    """
+    return await get_llm_for_user(user)
+
+
 async def init_services() -> None:
     """
     Initialize services on startup.
@@ -35,9 +90,12 @@ async def init_services() -> None:
     """
     settings = get_settings()
 
+    global _maintenance_task
+
     # Initialize SQLite
     repo = get_sqlite_repository()
     await repo.initialize()
+    _maintenance_task = asyncio.create_task(_optimize_periodically(repo))
 
     # Load knowledge graph from JSON
     graph = get_knowledge_graph()
@@ -45,8 +103,31 @@ async def init_services() -> None:
     if graph_dir.exists():
         await graph.load_from_json(graph_dir)
 
+    # Seed the auth client's connection pool with a TLS session to Google
+    await warmup_auth_client()
+
+    # Shared LLM client, reused by every request for keep-alive and TLS reuse
+    get_llm_http_client()
+
+
+async def _optimize_periodically(repo: SQLiteRepository) -> None:
+    """Merge FTS segments once per interval for the lifetime of the app."""
+    while True:
+        await asyncio.sleep(_DB_OPTIMIZE_INTERVAL)
+        try:
+            await repo.optimize()
+        except Exception as e:
+            logger.warning("Database optimize failed: %s", e)
+
 
 async def cleanup_services() -> None:
     """Cleanup services on shutdown."""
+    global _maintenance_task
+    if _maintenance_task is not None:
+        _maintenance_task.cancel()
+        _maintenance_task = None
+
     repo = get_sqlite_repository()
     await repo.close()
+    await close_auth_client()
+    await close_llm_http_client()
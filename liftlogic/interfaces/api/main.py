@@ -1,11 +1,12 @@
 """
 FastAPI Main Application - Unified API entry point.
 
-Run with: uvicorn liftlogic.interfaces.api.main:app --reload
+Run with: uvicorn liftlogic.interfaces.api.main:app --loop uvloop --http httptools --reload
 """
 
 from __future__ import annotations
 
+import asyncio
 import logging
 from collections.abc import AsyncIterator
 from contextlib import asynccontextmanager
@@ -13,28 +14,67 @@ from pathlib import Path
 
 from fastapi import FastAPI, Request
 from fastapi.middleware.cors import CORSMiddleware
-from fastapi.responses import FileResponse
-from fastapi.staticfiles import StaticFiles
+from fastapi.responses import ORJSONResponse, Response
 
 from liftlogic.config import get_settings
 
 from .deps import cleanup_services, init_services
 from .middleware import (
+    CompressionMiddleware,
     ErrorHandlerMiddleware,
     LatencyMiddleware,
     RateLimitMiddleware,
     RequestIDMiddleware,
 )
 from .routes import diagnosis, extraction, health, search
+from .static import CachedStaticFiles, PreloadedFile
 
 # Static file paths
 INTERFACES_DIR = Path(__file__).parent.parent
 LANDING_DIR = INTERFACES_DIR / "landing"
+LANDING_ASSETS_DIR = LANDING_DIR / "assets"
 WEB_DIST_DIR = INTERFACES_DIR / "web" / "dist"
+WEB_ASSETS_DIR = WEB_DIST_DIR / "assets"
+
+# Security: Explicitly list allowed origins instead of "*"
+ALLOWED_ORIGINS = (
+    "http://localhost:3000",  # Vite dev server
+    "http://localhost:8000",  # FastAPI (same-origin)
+    "http://127.0.0.1:3000",
+    "http://127.0.0.1:8000",
+)
+
+# Entry-point files held in memory: route -> (path, media type)
+PRELOADED_FILES = {
+    "/app": (WEB_DIST_DIR / "index.html", "text/html; charset=utf-8"),
+    "/": (LANDING_DIR / "index.html", "text/html; charset=utf-8"),
+    "/styles.css": (LANDING_DIR / "styles.css", "text/css; charset=utf-8"),
+    "/script.js": (LANDING_DIR / "script.js", "application/javascript; charset=utf-8"),
+}
 
 logger = logging.getLogger(__name__)
 
 
+def _load_preloaded_files() -> dict[str, PreloadedFile]:
+    """Read and compress all existing entry-point files."""
+    return {
+        route: PreloadedFile.read(path, media_type)
+        for route, (path, media_type) in PRELOADED_FILES.items()
+        if path.exists()
+    }
+
+
+def _serve_preloaded(request: Request, route: str) -> Response:
+    """Serve an entry-point file from the startup cache."""
+    cache: dict[str, PreloadedFile] = request.app.state.static_cache
+    file = cache.get(route)
+    if file is None:
+        # Lifespan did not run (e.g. TestClient without a context manager)
+        path, media_type = PRELOADED_FILES[route]
+        file = cache[route] = PreloadedFile.read(path, media_type)
+    return file.response(request)
+
+
 @asynccontextmanager
 async def lifespan(app: FastAPI) -> AsyncIterator[None]:
     """Application lifespan manager."""
@@ -47,6 +87,9 @@ async def lifespan(app: FastAPI) -> AsyncIterator[None]:
     await init_services()
     logger.info("  Services initialized")
 
+    # Entry-point static files: read, compress and hash once
+    app.state.static_cache = await asyncio.to_thread(_load_preloaded_files)
+
     yield
 
     # Cleanup
@@ -63,9 +106,11 @@ def create_app() -> FastAPI:
         description="AI-native elevator/lift technical documentation intelligence",
         version="2.0.0",
         lifespan=lifespan,
+        default_response_class=ORJSONResponse,
         docs_url="/docs",
         redoc_url="/redoc",
     )
+    app.state.static_cache = {}
 
     # Add middleware (order matters - first added = outermost)
     # 1. Rate limiting (outermost - reject early)
@@ -81,13 +126,7 @@ def create_app() -> FastAPI:
     app.add_middleware(RequestIDMiddleware)
 
     # 5. CORS (framework middleware)
-    # Security: Explicitly list allowed origins instead of "*"
-    allowed_origins = [
-        "http://localhost:3000",  # Vite dev server
-        "http://localhost:8000",  # FastAPI (same-origin)
-        "http://127.0.0.1:3000",
-        "http://127.0.0.1:8000",
-    ]
+    allowed_origins = list(ALLOWED_ORIGINS)
     # Add production origins from environment if configured
     if settings.api_debug:
         # In debug mode, also allow any localhost port for development
@@ -101,6 +140,11 @@ def create_app() -> FastAPI:
         allow_headers=["Content-Type", "Authorization", "X-Request-ID"],
     )
 
+    # 6. Compression for larger payloads (LLM analyses run to several KB);
+    # level 5 keeps most of the ratio at a fraction of level 9's CPU; SSE
+    # answers are left uncompressed so they are not buffered
+    app.add_middleware(CompressionMiddleware, minimum_size=1024, compresslevel=5)
+
     # Include routers
     app.include_router(health.router, tags=["Health"])
     app.include_router(search.router, prefix="/api/search", tags=["Search"])
@@ -112,39 +156,39 @@ def create_app() -> FastAPI:
         # Serve React app static assets
         app.mount(
             "/app/assets",
-            StaticFiles(directory=WEB_DIST_DIR / "assets"),
+            CachedStaticFiles(directory=WEB_ASSETS_DIR),
             name="app-assets",
         )
 
         @app.get("/app")
         @app.get("/app/{path:path}")
-        async def serve_react_app(request: Request, path: str = "") -> FileResponse:
+        async def serve_react_app(request: Request, path: str = "") -> Response:
             """Serve the React technician portal (LiftLogic app)."""
-            return FileResponse(WEB_DIST_DIR / "index.html")
+            return _serve_preloaded(request, "/app")
 
     # Serve the landing page (ARPRO website) at root
     if LANDING_DIR.exists():
         # Mount landing page assets
         app.mount(
             "/assets",
-            StaticFiles(directory=LANDING_DIR / "assets"),
+            CachedStaticFiles(directory=LANDING_ASSETS_DIR),
             name="landing-assets",
         )
 
         @app.get("/styles.css")
-        async def serve_landing_css() -> FileResponse:
+        async def serve_landing_css(request: Request) -> Response:
             """Serve landing page CSS."""
-            return FileResponse(LANDING_DIR / "styles.css", media_type="text/css")
+            return _serve_preloaded(request, "/styles.css")
 
         @app.get("/script.js")
-        async def serve_landing_js() -> FileResponse:
+        async def serve_landing_js(request: Request) -> Response:
             """Serve landing page JavaScript."""
-            return FileResponse(LANDING_DIR / "script.js", media_type="application/javascript")
+            return _serve_preloaded(request, "/script.js")
 
         @app.get("/")
-        async def serve_landing_page() -> FileResponse:
+        async def serve_landing_page(request: Request) -> Response:
             """Serve the main ARPRO landing page."""
-            return FileResponse(LANDING_DIR / "index.html")
+            return _serve_preloaded(request, "/")
 
     return app
 
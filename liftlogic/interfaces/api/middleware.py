@@ -6,100 +6,161 @@ Provides:
 - Response latency measurement
 - Error handling with taxonomy codes
 - Rate limiting
+- Response compression (event streams excluded)
 """
 
 from __future__ import annotations
 
 import logging
+import math
 import time
 import uuid
-from collections import defaultdict
-from collections.abc import Awaitable, Callable
+from collections import OrderedDict
 from typing import Any
 
-from fastapi import Request, Response
-from fastapi.responses import JSONResponse
-from starlette.middleware.base import BaseHTTPMiddleware
-from starlette.types import ASGIApp
+import orjson
+from starlette.middleware.gzip import GZipMiddleware
+from starlette.types import ASGIApp, Message, Receive, Scope, Send
 
 from liftlogic.config.errors import ErrorCode, LiftLogicError
 
 logger = logging.getLogger(__name__)
 
+# Health probes and API docs: not rate limited and not access-logged
+_RATE_BYPASS = frozenset({"/health", "/api", "/docs", "/redoc", "/openapi.json"})
 
-class RequestIDMiddleware(BaseHTTPMiddleware):
-    """Attach request ID for tracing across logs and responses."""
 
-    async def dispatch(
-        self, request: Request, call_next: Callable[[Request], Awaitable[Response]]
-    ) -> Response:
-        request_id = request.headers.get("X-Request-ID") or str(uuid.uuid4())
+class RequestIDMiddleware:
+    """
+    Attach request ID for tracing across logs and responses.
 
-        # Store in request state for access in handlers
-        request.state.request_id = request_id
+    Pure ASGI (no BaseHTTPMiddleware task group). The ID is stored in
+    ``scope["state"]`` so handlers read it as ``request.state.request_id``.
+    """
+
+    def __init__(self, app: ASGIApp) -> None:
+        self.app = app
 
-        response = await call_next(request)
-        response.headers["X-Request-ID"] = request_id
+    async def __call__(self, scope: Scope, receive: Receive, send: Send) -> None:
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
 
-        return response
+        raw_id = _header(scope, b"x-request-id")
+        if raw_id is None:
+            raw_id = str(uuid.uuid4()).encode("latin-1")
+            scope["headers"] = [*scope["headers"], (b"x-request-id", raw_id)]
 
+        # Store in request state for access in handlers
+        scope.setdefault("state", {})["request_id"] = raw_id.decode("latin-1")
 
-class LatencyMiddleware(BaseHTTPMiddleware):
-    """Track and log request latency."""
+        async def send_with_request_id(message: Message) -> None:
+            if message["type"] == "http.response.start":
+                message["headers"] = [*message.get("headers", ()), (b"x-request-id", raw_id)]
+            await send(message)
 
-    async def dispatch(
-        self, request: Request, call_next: Callable[[Request], Awaitable[Response]]
-    ) -> Response:
-        start_time = time.perf_counter()
+        await self.app(scope, receive, send_with_request_id)
 
-        response = await call_next(request)
 
-        duration_ms = (time.perf_counter() - start_time) * 1000
-        response.headers["X-Response-Time-Ms"] = f"{duration_ms:.2f}"
+class LatencyMiddleware:
+    """
+    Track and log request latency.
 
-        # Log request with latency
-        request_id = getattr(request.state, "request_id", "unknown")
-        logger.info(
-            "%s %s status=%d latency_ms=%.2f request_id=%s",
-            request.method,
-            request.url.path,
-            response.status_code,
-            duration_ms,
-            request_id,
-        )
+    Pure ASGI: the header is added on ``http.response.start`` so streaming
+    responses are not buffered, and the log line fires even on exceptions.
+    """
 
-        return response
+    def __init__(self, app: ASGIApp) -> None:
+        self.app = app
 
+    async def __call__(self, scope: Scope, receive: Receive, send: Send) -> None:
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
 
-class ErrorHandlerMiddleware(BaseHTTPMiddleware):
-    """Convert LiftLogicError exceptions to structured JSON responses."""
+        start_time = time.perf_counter()
+        status_code = 500
+
+        async def send_with_latency(message: Message) -> None:
+            nonlocal status_code
+            if message["type"] == "http.response.start":
+                status_code = message["status"]
+                duration_ms = (time.perf_counter() - start_time) * 1000
+                message["headers"] = [
+                    *message.get("headers", ()),
+                    (b"x-response-time-ms", f"{duration_ms:.2f}".encode("latin-1")),
+                ]
+            await send(message)
+
+        try:
+            await self.app(scope, receive, send_with_latency)
+        finally:
+            # Log request with latency (probes are just noise)
+            if logger.isEnabledFor(logging.INFO) and scope["path"] not in _RATE_BYPASS:
+                logger.info(
+                    "%s %s status=%d latency_ms=%.2f request_id=%s",
+                    scope["method"],
+                    scope["path"],
+                    status_code,
+                    (time.perf_counter() - start_time) * 1000,
+                    _request_id(scope),
+                )
+
+
+class ErrorHandlerMiddleware:
+    """
+    Convert LiftLogicError exceptions to structured JSON responses.
+
+    Pure ASGI: exceptions surface directly from ``self.app`` instead of being
+    re-raised through a BaseHTTPMiddleware task group.
+    """
+
+    def __init__(self, app: ASGIApp) -> None:
+        self.app = app
+
+    async def __call__(self, scope: Scope, receive: Receive, send: Send) -> None:
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+
+        response_started = False
+
+        async def send_tracking_start(message: Message) -> None:
+            nonlocal response_started
+            if message["type"] == "http.response.start":
+                response_started = True
+            await send(message)
 
-    async def dispatch(
-        self, request: Request, call_next: Callable[[Request], Awaitable[Response]]
-    ) -> Response:
         try:
-            return await call_next(request)
+            await self.app(scope, receive, send_tracking_start)
         except LiftLogicError as e:
-            request_id = getattr(request.state, "request_id", "unknown")
+            request_id = _request_id(scope)
             logger.error(
                 "LiftLogicError: %s request_id=%s details=%s",
                 e.message,
                 request_id,
                 e.details,
             )
-            return JSONResponse(
-                status_code=_error_code_to_status(e.code),
-                content={
+            # Headers already sent - nothing sensible left to write
+            if response_started:
+                raise
+            await _send_json(
+                send,
+                _error_code_to_status(e.code),
+                {
                     "error": e.to_dict(),
                     "request_id": request_id,
                 },
             )
         except Exception as e:
-            request_id = getattr(request.state, "request_id", "unknown")
-            logger.exception("Unhandled error: %s request_id=%s", str(e), request_id)
-            return JSONResponse(
-                status_code=500,
-                content={
+            request_id = _request_id(scope)
+            logger.error("Unhandled error: %s request_id=%s", e, request_id, exc_info=True)
+            if response_started:
+                raise
+            await _send_json(
+                send,
+                500,
+                {
                     "error": {
                         "code": ErrorCode.INTERNAL_ERROR.value,
                         "message": "Internal server error",
@@ -110,90 +171,183 @@ class ErrorHandlerMiddleware(BaseHTTPMiddleware):
             )
 
 
-class RateLimitMiddleware(BaseHTTPMiddleware):
-    """Simple in-memory rate limiting per client IP."""
+class RateLimitMiddleware:
+    """
+    Simple in-memory rate limiting per client IP.
 
-    def __init__(self, app: ASGIApp, requests_per_minute: int = 60) -> None:
-        super().__init__(app)
+    Token bucket per client: ``requests_per_minute`` tokens of capacity,
+    refilled continuously, so there is no burst at window boundaries.
+    Buckets are kept in an LRU capped at ``max_clients`` so a flood of
+    distinct source IPs cannot grow memory without bound.
+    """
+
+    def __init__(
+        self,
+        app: ASGIApp,
+        requests_per_minute: int = 60,
+        max_clients: int = 100_000,
+    ) -> None:
+        self.app = app
         self.requests_per_minute = requests_per_minute
-        self.buckets: dict[str, dict[str, Any]] = defaultdict(
-            lambda: {"window": 0, "tokens": 0}
-        )
-
-    async def dispatch(
-        self, request: Request, call_next: Callable[[Request], Awaitable[Response]]
-    ) -> Response:
-        # Skip rate limiting for health checks
-        if request.url.path == "/health":
-            return await call_next(request)
-
-        client_ip = request.client.host if request.client else "unknown"
-        now = time.time()
-        window = int(now // 60)  # 1-minute windows
-
-        bucket = self.buckets[client_ip]
-
-        # Reset bucket if new window
-        if bucket["window"] != window:
-            bucket["window"] = window
-            bucket["tokens"] = self.requests_per_minute
-
-        if bucket["tokens"] <= 0:
-            request_id = getattr(request.state, "request_id", "unknown")
+        self.max_clients = max_clients
+        self._refill_per_second = requests_per_minute / 60.0
+        # client IP -> [tokens, last_refill], least recently seen first
+        self.buckets: OrderedDict[str, list[float]] = OrderedDict()
+
+    async def __call__(self, scope: Scope, receive: Receive, send: Send) -> None:
+        # Skip rate limiting for health checks and docs
+        if scope["type"] != "http" or scope["path"] in _RATE_BYPASS:
+            await self.app(scope, receive, send)
+            return
+
+        client = scope.get("client")
+        client_ip = client[0] if client else "unknown"
+        now = time.monotonic()
+
+        bucket = self.buckets.get(client_ip)
+        if bucket is None:
+            bucket = [float(self.requests_per_minute), now]
+            self.buckets[client_ip] = bucket
+            if len(self.buckets) > self.max_clients:
+                # The evicted bucket has been idle longest, so would be near full anyway
+                self.buckets.popitem(last=False)
+        else:
+            self.buckets.move_to_end(client_ip)
+            # Lazy refill for the time elapsed since the last request
+            bucket[0] = min(
+                self.requests_per_minute,
+                bucket[0] + (now - bucket[1]) * self._refill_per_second,
+            )
+            bucket[1] = now
+
+        if bucket[0] < 1:
+            request_id = _request_id(scope)
+            retry_after = math.ceil((1 - bucket[0]) / self._refill_per_second)
             logger.warning(
                 "Rate limit exceeded for %s request_id=%s",
                 client_ip,
                 request_id,
             )
-            return JSONResponse(
-                status_code=429,
-                content={
+            await _send_json(
+                send,
+                429,
+                {
                     "error": {
                         "code": ErrorCode.SECURITY_RATE_LIMITED.value,
-                        "message": "Too many requests. Please retry after 60 seconds.",
-                        "details": {"retry_after": 60},
+                        "message": f"Too many requests. Please retry after {retry_after} seconds.",
+                        "details": {"retry_after": retry_after},
                     },
                     "request_id": request_id,
                 },
-                headers={"Retry-After": "60"},
+                headers=[(b"retry-after", str(retry_after).encode("latin-1"))],
             )
-
-        bucket["tokens"] -= 1
-
-        response = await call_next(request)
-        response.headers["X-RateLimit-Remaining"] = str(bucket["tokens"])
-        response.headers["X-RateLimit-Limit"] = str(self.requests_per_minute)
-
-        return response
+            return
+
+        bucket[0] -= 1
+        rate_headers = [
+            (b"x-ratelimit-remaining", str(int(bucket[0])).encode("latin-1")),
+            (b"x-ratelimit-limit", str(self.requests_per_minute).encode("latin-1")),
+        ]
+
+        async def send_with_rate_headers(message: Message) -> None:
+            if message["type"] == "http.response.start":
+                message["headers"] = [*message.get("headers", ()), *rate_headers]
+            await send(message)
+
+        await self.app(scope, receive, send_with_rate_headers)
+
+
+# Error code -> HTTP status, built once at import
+_ERROR_STATUS: dict[ErrorCode, int] = {
+    # 400 Bad Request
+    ErrorCode.EXTRACTION_INVALID_PDF: 400,
+    ErrorCode.SEARCH_INVALID_QUERY: 400,
+    ErrorCode.DIAGNOSIS_INVALID_CODE: 400,
+    ErrorCode.VALIDATION_ERROR: 400,
+    ErrorCode.KNOWLEDGE_INVALID_EDGE: 400,
+    # 401 Unauthorized
+    ErrorCode.SECURITY_UNAUTHORIZED: 401,
+    ErrorCode.LLM_AUTH_FAILED: 401,
+    # 403 Forbidden
+    ErrorCode.SECURITY_FORBIDDEN: 403,
+    # 404 Not Found
+    ErrorCode.NOT_FOUND: 404,
+    ErrorCode.KNOWLEDGE_NODE_NOT_FOUND: 404,
+    ErrorCode.SEARCH_NO_RESULTS: 404,
+    # 408 Timeout
+    ErrorCode.EXTRACTION_TIMEOUT: 408,
+    # 429 Rate Limited
+    ErrorCode.SECURITY_RATE_LIMITED: 429,
+    ErrorCode.LLM_RATE_LIMITED: 429,
+    # 503 Service Unavailable
+    ErrorCode.LLM_UNAVAILABLE: 503,
+    ErrorCode.SEARCH_INDEX_UNAVAILABLE: 503,
+    ErrorCode.KNOWLEDGE_GRAPH_UNAVAILABLE: 503,
+    ErrorCode.STORAGE_CONNECTION_FAILED: 503,
+}
+
+
+class CompressionMiddleware:
+    """
+    Gzip responses, except server-sent event streams.
+
+    Starlette's GZipMiddleware holds compressed output in the gzip buffer
+    until it fills, so an SSE answer would stall; only recent Starlette
+    releases exclude ``text/event-stream`` themselves. The search routes
+    stream only to clients sending ``Accept: text/event-stream``, so those
+    requests bypass compression. Responses that already set
+    ``Content-Encoding`` (precompressed static files) are passed through by
+    GZipMiddleware itself.
+    """
+
+    def __init__(self, app: ASGIApp, minimum_size: int = 500, compresslevel: int = 9) -> None:
+        self.app = app
+        self.gzip = GZipMiddleware(app, minimum_size=minimum_size, compresslevel=compresslevel)
+
+    async def __call__(self, scope: Scope, receive: Receive, send: Send) -> None:
+        if scope["type"] == "http" and b"text/event-stream" in (_header(scope, b"accept") or b""):
+            await self.app(scope, receive, send)
+            return
+        await self.gzip(scope, receive, send)
 
 
 def _error_code_to_status(code: ErrorCode) -> int:
     """Map error codes to HTTP status codes."""
-    mapping = {
-        # 400 Bad Request
-        ErrorCode.EXTRACTION_INVALID_PDF: 400,
-        ErrorCode.SEARCH_INVALID_QUERY: 400,
-        ErrorCode.DIAGNOSIS_INVALID_CODE: 400,
-        ErrorCode.VALIDATION_ERROR: 400,
-        ErrorCode.KNOWLEDGE_INVALID_EDGE: 400,
-        # 401 Unauthorized
-        ErrorCode.SECURITY_UNAUTHORIZED: 401,
-        ErrorCode.LLM_AUTH_FAILED: 401,
-        # 403 Forbidden
-        ErrorCode.SECURITY_FORBIDDEN: 403,
-        # 404 Not Found
-        ErrorCode.NOT_FOUND: 404,
-        ErrorCode.KNOWLEDGE_NODE_NOT_FOUND: 404,
-        ErrorCode.SEARCH_NO_RESULTS: 404,
-        # 408 Timeout
-        ErrorCode.EXTRACTION_TIMEOUT: 408,
-        # 429 Rate Limited
-        ErrorCode.SECURITY_RATE_LIMITED: 429,
-        ErrorCode.LLM_RATE_LIMITED: 429,
-        # 503 Service Unavailable
-        ErrorCode.LLM_UNAVAILABLE: 503,
-        ErrorCode.SEARCH_INDEX_UNAVAILABLE: 503,
-        ErrorCode.KNOWLEDGE_GRAPH_UNAVAILABLE: 503,
-        ErrorCode.STORAGE_CONNECTION_FAILED: 503,
-    }
-    return mapping.get(code, 500)
+    return _ERROR_STATUS.get(code, 500)
+
+
+async def _send_json(
+    send: Send,
+    status_code: int,
+    content: dict[str, Any],
+    headers: list[tuple[bytes, bytes]] | None = None,
+) -> None:
+    """Send a complete JSON response directly over ASGI."""
+    body = orjson.dumps(content)
+    await send(
+        {
+            "type": "http.response.start",
+            "status": status_code,
+            "headers": [
+                (b"content-type", b"application/json"),
+                (b"content-length", str(len(body)).encode("latin-1")),
+                *(headers or ()),
+            ],
+        }
+    )
+    await send({"type": "http.response.body", "body": body})
+
+
+def _request_id(scope: Scope) -> str:
+    """Return the request ID stored by RequestIDMiddleware, if any."""
+    state = scope.get("state")
+    return state.get("request_id", "unknown") if state else "unknown"
+
+
+def _header(scope: Scope, name: bytes) -> bytes | None:
+    """Return the first raw value of a (lowercase) request header, if present."""
+    headers: list[tuple[bytes, bytes]] = scope["headers"]
+    for key, value in headers:
+        if key == name:
+            return value
+    return None
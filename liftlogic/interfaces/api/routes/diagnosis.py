@@ -8,16 +8,27 @@ Authentication:
 
 from __future__ import annotations
 
+import asyncio
+import re
+from dataclasses import dataclass, field
 from enum import Enum
+from itertools import islice
 from typing import Any
 
 from fastapi import APIRouter, Depends
+from fastapi.responses import ORJSONResponse
 from pydantic import BaseModel, Field
 
-from liftlogic.adapters import SQLiteRepository, get_llm_for_user
-from liftlogic.domains.knowledge import KnowledgeGraphStore
-from liftlogic.interfaces.api.auth import UserContext, get_current_user_optional
-from liftlogic.interfaces.api.deps import get_knowledge_graph, get_sqlite_repository
+from liftlogic.adapters import LLMService, SQLiteRepository
+from liftlogic.domains.knowledge import KnowledgeGraphStore, KnowledgeNode, NodeType
+from liftlogic.domains.orchestration import ResponseCacheImpl
+from liftlogic.interfaces.api.deps import (
+    get_diagnosis_cache,
+    get_document_cache,
+    get_knowledge_graph,
+    get_llm,
+    get_sqlite_repository,
+)
 
 router = APIRouter()
 
@@ -53,45 +64,87 @@ class DiagnosisResponse(BaseModel):
     confidence: float
 
 
-@router.post("/diagnose", response_model=DiagnosisResponse)
-async def diagnose_fault(
-    request: DiagnosisRequest,
-    user: UserContext | None = Depends(get_current_user_optional),
-    repo: SQLiteRepository = Depends(get_sqlite_repository),
-    graph: KnowledgeGraphStore = Depends(get_knowledge_graph),
-) -> DiagnosisResponse:
-    """
-    Diagnose a fault code.
+# Document content sent to the LLM for safety/maintenance analysis
+_MAX_DOC_CHARS = 10000
 
-    Provides:
-    - Fault description
-    - Possible causes
-    - Recommended remedies
-    - Related components
+# Prompt template and system instruction per mode; other modes use DETAILED
+_DETAILED_PROMPT = (
+    """Diagnose elevator fault code {code}.
+Context:
+{context}
 
-    Auth:
-    - With Google login: Uses Gemini (your quota, zero cost)
-    - Without login: Uses Ollama (server-side)
-    """
+Provide:
+1. Description of the fault
+2. Likely causes (list)
+3. Recommended remedies (list)
+4. Related components that may be affected
+5. Severity assessment (critical/high/medium/low)""",
+    "You are an expert elevator technician. Provide a comprehensive diagnosis based on the documentation.",
+)
+_PROMPTS: dict[DiagnosisMode, tuple[str, str]] = {
+    DiagnosisMode.QUICK: (
+        "Briefly explain fault code {code}. Context:\n{context}",
+        "You are an elevator technician. Provide a brief explanation in 2-3 sentences.",
+    ),
+    DiagnosisMode.SAFETY: (
+        "Analyze the safety implications of fault code {code}. Context:\n{context}",
+        "You are an elevator safety expert. Focus on safety risks, hazards, and critical precautions.",
+    ),
+    DiagnosisMode.DETAILED: _DETAILED_PROMPT,
+}
+
+# Severity keywords in priority order; case-insensitive substring matches
+_SEVERITY_RULES = (
+    (re.compile(r"immediately|lock", re.IGNORECASE), "critical"),
+    (re.compile(r"prevent|inhibit", re.IGNORECASE), "high"),
+    (re.compile(r"warning|alarm", re.IGNORECASE), "low"),
+)
+
+
+def _classify_severity(operation: str) -> str:
+    """Classify fault severity from the fault's operation text."""
+    for pattern, severity in _SEVERITY_RULES:
+        if pattern.search(operation):
+            return severity
+    return "medium"
+
+
+@dataclass
+class FaultContext:
+    """Graph lookups and assembled LLM context for one fault code."""
+
+    context: str
+    fault_node: KnowledgeNode | None = None
+    resolution_procedures: list[KnowledgeNode] = field(default_factory=list)
+    test_procedures: list[KnowledgeNode] = field(default_factory=list)
+    related_nodes: list[KnowledgeNode] = field(default_factory=list)
+
+
+async def _load_fault_context(
+    fault_code: str,
+    manufacturer: str | None,
+    repo: SQLiteRepository,
+    graph: KnowledgeGraphStore,
+) -> FaultContext:
+    """Look up a fault in the graph and SQLite and build its LLM context."""
     # Look up fault in knowledge graph
-    fault_node = await graph.find_fault_by_code(request.fault_code)
+    fault_node = await graph.find_fault_by_code(fault_code)
 
-    # Get related data from graph
+    # Get related data from graph and look up in SQLite - independent, so concurrent
     resolution_procedures = []
     test_procedures = []
     related_nodes = []
 
     if fault_node:
-        resolution_procedures = await graph.get_fault_resolution(fault_node.id)
-        test_procedures = await graph.get_fault_tests(fault_node.id)
-        # Get all neighbors (related components/procedures)
-        related_nodes = await graph.get_neighbors(fault_node.id)
-
-    # Look up in SQLite
-    await repo.get_fault_code(
-        request.fault_code,
-        request.manufacturer,
-    )
+        resolution_procedures, test_procedures, related_nodes, _ = await asyncio.gather(
+            graph.get_fault_resolution(fault_node.id),
+            graph.get_fault_tests(fault_node.id),
+            # All neighbors (related components/procedures)
+            graph.get_neighbors(fault_node.id),
+            repo.get_fault_code(fault_code, manufacturer),
+        )
+    else:
+        await repo.get_fault_code(fault_code, manufacturer)
 
     # Build context for LLM
     context_parts = []
@@ -119,11 +172,61 @@ async def diagnose_fault(
             + "\n".join(f"- {p.properties.get('text', p.name)}" for p in test_procedures)
         )
 
-    if request.symptoms:
-        context_parts.append("Reported Symptoms:\n" + "\n".join(f"- {s}" for s in request.symptoms))
+    return FaultContext(
+        context="\n\n".join(context_parts),
+        fault_node=fault_node,
+        resolution_procedures=resolution_procedures,
+        test_procedures=test_procedures,
+        related_nodes=related_nodes,
+    )
+
+
+# Response is built from trusted server-side values, so it is neither validated
+# on construction nor re-validated by FastAPI; the schema is kept for the docs
+@router.post(
+    "/diagnose",
+    response_model=None,
+    responses={200: {"model": DiagnosisResponse}},
+)
+async def diagnose_fault(
+    request: DiagnosisRequest,
+    llm: LLMService = Depends(get_llm),
+    repo: SQLiteRepository = Depends(get_sqlite_repository),
+    graph: KnowledgeGraphStore = Depends(get_knowledge_graph),
+    cache: ResponseCacheImpl = Depends(get_diagnosis_cache),
+) -> ORJSONResponse:
+    """
+    Diagnose a fault code.
+
+    Provides:
+    - Fault description
+    - Possible causes
+    - Recommended remedies
+    - Related components
+
+    Auth:
+    - With Google login: Uses Gemini (your quota, zero cost)
+    - Without login: Uses Ollama (server-side)
+    """
+    # Graph lookups and context depend only on the fault, so they are cached;
+    # symptoms vary per request and are appended afterwards
+    cache_key = f"{request.fault_code}|{request.manufacturer or ''}"
+    cached = await cache.get(cache_key)
+    if cached:
+        fault_context: FaultContext = cached.response
+    else:
+        fault_context = await _load_fault_context(
+            request.fault_code, request.manufacturer, repo, graph
+        )
+        await cache.set(cache_key, fault_context)
 
-    # Get LLM for diagnosis
-    llm = await get_llm_for_user(user)
+    fault_node = fault_context.fault_node
+    resolution_procedures = fault_context.resolution_procedures
+    related_nodes = fault_context.related_nodes
+
+    context_parts = [fault_context.context] if fault_context.context else []
+    if request.symptoms:
+        context_parts.append("Reported Symptoms:\n" + "\n".join("- " + s for s in request.symptoms))
 
     context = (
         "\n\n".join(context_parts)
@@ -132,26 +235,8 @@ async def diagnose_fault(
     )
 
     # Generate diagnosis based on mode
-    if request.mode == DiagnosisMode.QUICK:
-        prompt = f"Briefly explain fault code {request.fault_code}. Context:\n{context}"
-        system_instruction = (
-            "You are an elevator technician. Provide a brief explanation in 2-3 sentences."
-        )
-    elif request.mode == DiagnosisMode.SAFETY:
-        prompt = f"Analyze the safety implications of fault code {request.fault_code}. Context:\n{context}"
-        system_instruction = "You are an elevator safety expert. Focus on safety risks, hazards, and critical precautions."
-    else:  # DETAILED
-        prompt = f"""Diagnose elevator fault code {request.fault_code}.
-Context:
-{context}
-
-Provide:
-1. Description of the fault
-2. Likely causes (list)
-3. Recommended remedies (list)
-4. Related components that may be affected
-5. Severity assessment (critical/high/medium/low)"""
-        system_instruction = "You are an expert elevator technician. Provide a comprehensive diagnosis based on the documentation."
+    template, system_instruction = _PROMPTS.get(request.mode, _DETAILED_PROMPT)
+    prompt = template.format(code=request.fault_code, context=context)
 
     response = await llm.generate(prompt, system_instruction)
 
@@ -171,20 +256,17 @@ Provide:
         if resolution_procedures
         else []
     )
-    related_components = [n.name for n in related_nodes if n.type.value != "procedure"][:5]
+    # Stop after the first 5 non-procedure neighbours instead of filtering them all
+    related_components = list(
+        islice((n.name for n in related_nodes if n.type is not NodeType.PROCEDURE), 5)
+    )
 
     # Determine severity from operation field
-    severity = "medium"
-    if fault_node:
-        operation = fault_node.properties.get("operation", "").lower()
-        if "immediately" in operation or "lock" in operation:
-            severity = "critical"
-        elif "prevent" in operation or "inhibit" in operation:
-            severity = "high"
-        elif "warning" in operation or "alarm" in operation:
-            severity = "low"
-
-    return DiagnosisResponse(
+    severity = (
+        _classify_severity(fault_node.properties.get("operation", "")) if fault_node else "medium"
+    )
+
+    diagnosis = DiagnosisResponse.model_construct(
         fault_code=request.fault_code,
         description=description,
         severity=severity,
@@ -193,13 +275,44 @@ Provide:
         related_components=related_components,
         confidence=0.9 if fault_node else 0.5,
     )
+    return ORJSONResponse(diagnosis.model_dump())
+
+
+async def _get_document_head(
+    document_id: int,
+    repo: SQLiteRepository,
+    cache: ResponseCacheImpl,
+) -> dict[str, Any] | None:
+    """
+    Get a document's filename, manufacturer and first _MAX_DOC_CHARS of content.
+
+    Repeat analyses of the same document skip the full-row fetch and slice.
+    """
+    cache_key = str(document_id)
+    cached = await cache.get(cache_key)
+    if cached:
+        head: dict[str, Any] = cached.response
+        return head
+
+    doc = await repo.get_document(document_id)
+    if not doc:
+        return None
+
+    head = {
+        "filename": doc.get("filename"),
+        "manufacturer": doc.get("manufacturer"),
+        "content": (doc.get("content") or "")[:_MAX_DOC_CHARS],  # Limit context size
+    }
+    await cache.set(cache_key, head)
+    return head
 
 
 @router.post("/analyze/safety")
 async def safety_analysis(
     document_id: int,
-    user: UserContext | None = Depends(get_current_user_optional),
+    llm: LLMService = Depends(get_llm),
     repo: SQLiteRepository = Depends(get_sqlite_repository),
+    cache: ResponseCacheImpl = Depends(get_document_cache),
 ) -> dict[str, Any]:
     """
     Perform safety audit on a document.
@@ -210,8 +323,8 @@ async def safety_analysis(
     - With Google login: Uses Gemini (your quota, zero cost)
     - Without login: Uses Ollama (server-side)
     """
-    # Get document from database
-    doc = await repo.get_document(document_id)
+    # Get document head (metadata + truncated content), cached per document
+    doc = await _get_document_head(document_id, repo, cache)
 
     if not doc:
         return {
@@ -221,11 +334,8 @@ async def safety_analysis(
             "recommendations": [],
         }
 
-    # Get LLM for analysis
-    llm = await get_llm_for_user(user)
-
     # Analyze document for safety concerns
-    content = (doc.get("content") or "")[:10000]  # Limit context size
+    content = doc["content"]
 
     response = await llm.generate(
         f"""Analyze this elevator documentation for safety concerns:
@@ -257,8 +367,9 @@ Identify:
 @router.post("/analyze/maintenance")
 async def maintenance_analysis(
     document_id: int,
-    user: UserContext | None = Depends(get_current_user_optional),
+    llm: LLMService = Depends(get_llm),
     repo: SQLiteRepository = Depends(get_sqlite_repository),
+    cache: ResponseCacheImpl = Depends(get_document_cache),
 ) -> dict[str, Any]:
     """
     Generate maintenance schedule from a document.
@@ -269,8 +380,8 @@ async def maintenance_analysis(
     - With Google login: Uses Gemini (your quota, zero cost)
     - Without login: Uses Ollama (server-side)
     """
-    # Get document from database
-    doc = await repo.get_document(document_id)
+    # Get document head (metadata + truncated content), cached per document
+    doc = await _get_document_head(document_id, repo, cache)
 
     if not doc:
         return {
@@ -279,11 +390,8 @@ async def maintenance_analysis(
             "schedule": {"monthly": [], "quarterly": [], "annually": []},
         }
 
-    # Get LLM for analysis
-    llm = await get_llm_for_user(user)
-
     # Analyze document for maintenance requirements
-    content = (doc.get("content") or "")[:10000]
+    content = doc["content"]
 
     response = await llm.generate(
         f"""Extract maintenance schedule from this elevator documentation:
@@ -4,13 +4,20 @@ Extraction Routes - PDF extraction endpoints.
 
 from __future__ import annotations
 
-from typing import Any
+import asyncio
+import shutil
+import tempfile
+from pathlib import Path
+from typing import Any, BinaryIO
 
 from fastapi import APIRouter, File, HTTPException, UploadFile
 from pydantic import BaseModel
 
 router = APIRouter()
 
+# Copy uploads to disk in fixed-size chunks so peak memory stays flat
+_SPOOL_CHUNK_SIZE = 1024 * 1024
+
 
 class ExtractionResponse(BaseModel):
     """Extraction result response."""
@@ -22,6 +29,13 @@ class ExtractionResponse(BaseModel):
     quality_score: float | None
 
 
+def _spool_to_disk(source: BinaryIO) -> Path:
+    """Copy an uploaded file to a temporary PDF (sync helper for to_thread)."""
+    with tempfile.NamedTemporaryFile(suffix=".pdf", delete=False) as tmp:
+        shutil.copyfileobj(source, tmp, _SPOOL_CHUNK_SIZE)
+    return Path(tmp.name)
+
+
 @router.post("/extract", response_model=ExtractionResponse)
 async def extract_pdf(file: UploadFile = File(...)) -> ExtractionResponse:
     """
@@ -36,7 +50,13 @@ async def extract_pdf(file: UploadFile = File(...)) -> ExtractionResponse:
     if not file.filename or not file.filename.endswith(".pdf"):
         raise HTTPException(status_code=400, detail="File must be a PDF")
 
-    # TODO: Integrate with extraction domain
+    # Stream the (already disk-spooled) upload to a path for the path-based
+    # extractor instead of reading the whole PDF into memory with
+    # `await file.read()`
+    pdf_path = await asyncio.to_thread(_spool_to_disk, file.file)
+    # TODO: Integrate with extraction domain (extract from pdf_path)
+    await asyncio.to_thread(pdf_path.unlink, missing_ok=True)
+
     return ExtractionResponse(
         filename=file.filename,
         component_count=0,
@@ -4,22 +4,75 @@ Search Routes - Document search and RAG endpoints.
 Authentication:
 - Authenticated users: Gemini (user's quota, zero cost)
 - Unauthenticated users: Ollama fallback (your server)
+
+Streaming:
+- Clients sending ``Accept: text/event-stream`` receive RAG answers as
+  server-sent events: one event with the results, then ``delta`` events
+  as the answer is generated, then a final ``done`` event.
 """
 
 from __future__ import annotations
 
+import asyncio
+import hashlib
+from collections.abc import AsyncGenerator, AsyncIterator, Awaitable, Callable, Iterable
 from typing import Any
 
-from fastapi import APIRouter, Depends
+import orjson
+from fastapi import APIRouter, Depends, Request
+from fastapi.responses import ORJSONResponse, Response, StreamingResponse
 from pydantic import BaseModel, Field
 
-from liftlogic.adapters import SQLiteRepository, get_llm_for_user
+from liftlogic.adapters import LLMService, SQLiteRepository
+from liftlogic.config import LiftLogicError
 from liftlogic.domains.knowledge import KnowledgeGraphStore
-from liftlogic.interfaces.api.auth import UserContext, get_current_user_optional
-from liftlogic.interfaces.api.deps import get_knowledge_graph, get_sqlite_repository
+from liftlogic.domains.orchestration import ResponseCacheImpl
+from liftlogic.interfaces.api.deps import (
+    get_answer_cache,
+    get_knowledge_graph,
+    get_llm,
+    get_sqlite_repository,
+)
 
 router = APIRouter()
 
+# Stream deltas are flushed every N chunks or after this long, whichever first
+_STREAM_FLUSH_CHUNKS = 25
+_STREAM_FLUSH_SECONDS = 0.05
+
+# Prompt context budget. Tokens are estimated at ~4 characters each, which
+# is close enough for Gemini and Llama-family tokenizers on English text.
+_CONTEXT_MAX_TOKENS = 1500
+_CHARS_PER_TOKEN = 4
+_MIN_ENTRY_CHARS = 200  # Don't append fragments shorter than this
+
+# Answer cache TTLs; fault codes are a small closed vocabulary so live longer
+_SEARCH_ANSWER_TTL = 3600
+_FAULT_ANSWER_TTL = 24 * 3600
+
+# Prompts. System instructions are constant strings, so every request sends
+# a byte-identical prefix that the provider's prompt cache can reuse.
+_SEARCH_SYSTEM = (
+    "You are an elevator technician assistant. Provide practical, accurate answers "
+    "based on the documentation provided. If the documentation doesn't contain the "
+    "answer, say so."
+)
+_SEARCH_PROMPT = (
+    "Based on the following elevator documentation, answer this query: {query}\n\n"
+    "Documentation:\n{context}"
+).format
+_FAULT_SYSTEM = (
+    "You are an elevator technician assistant. Provide a practical explanation of the "
+    "fault code, its causes, and recommended actions. Be concise."
+)
+_FAULT_PROMPT = (
+    "Based on this documentation, explain elevator fault code {code}:\n\n{context}"
+).format
+_FAULT_PROMPT_WITH_MANUFACTURER = (
+    "Based on this documentation, explain elevator fault code {code} for {manufacturer}:"
+    "\n\n{context}"
+).format
+
 
 class SearchRequest(BaseModel):
     """Search request body."""
@@ -38,6 +91,7 @@ class SearchResultItem(BaseModel):
     content: str
     manufacturer: str | None
     score: float
+    snippet: str | None = None  # FTS5 match context with <b> highlights
 
 
 class SearchResponse(BaseModel):
@@ -50,12 +104,14 @@ class SearchResponse(BaseModel):
     llm_provider: str | None = None  # "gemini" or "ollama"
 
 
-@router.post("", response_model=SearchResponse)
+@router.post("", response_model=None, responses={200: {"model": SearchResponse}})
 async def search(
     request: SearchRequest,
-    user: UserContext | None = Depends(get_current_user_optional),
+    http_request: Request,
+    llm: LLMService = Depends(get_llm),
     repo: SQLiteRepository = Depends(get_sqlite_repository),
-) -> SearchResponse:
+    cache: ResponseCacheImpl = Depends(get_answer_cache),
+) -> Response:
     """
     Search documents with optional AI-powered answers.
 
@@ -64,10 +120,24 @@ async def search(
     - **manufacturer**: Filter by manufacturer
     - **use_rag**: Generate AI-powered answer from results
 
+    Send ``Accept: text/event-stream`` to stream the answer as it is generated.
+    RAG responses are cached per query, manufacturer, limit and LLM provider.
+
     Auth:
     - With Google login: Uses Gemini (your quota, zero cost)
     - Without login: Uses Ollama (server-side)
     """
+    stream = _wants_event_stream(http_request)
+    if request.use_rag:
+        query = request.query.strip().lower()
+        key = f"{query}|{request.manufacturer}|{request.limit}|{llm.provider}"
+        cache_key = "search:" + hashlib.blake2b(key.encode()).hexdigest()
+        cached = await cache.get(cache_key)
+        if cached is not None:
+            if stream:
+                return _replay_event_stream(cached.response, "answer")
+            return _cached_json_response(http_request, cached.response)
+
     # Perform FTS5 search
     search_results = await repo.search_fts(
         query=request.query,
@@ -75,78 +145,100 @@ async def search(
         manufacturer=request.manufacturer,
     )
 
-    # Convert to response format
+    # Rows come from our own database, so skip Pydantic validation
     results = [
-        SearchResultItem(
-            doc_id=row["id"],
-            filename=row["filename"],
-            content=(row.get("content") or "")[:500],  # Truncate for response
-            manufacturer=row.get("manufacturer"),
-            score=abs(row.get("score", 0)),  # BM25 scores are negative
+        SearchResultItem.model_construct(
+            doc_id=doc_id,
+            filename=filename,
+            content=content or "",  # Truncated by search_fts
+            manufacturer=manufacturer,
+            score=abs(score or 0),  # BM25 scores are negative
+            snippet=snippet,
         )
-        for row in search_results
+        for doc_id, filename, content, manufacturer, _, score, snippet in search_results
     ]
 
     answer = None
     llm_provider = None
 
     if request.use_rag and results:
-        # Get LLM based on user auth
-        llm = await get_llm_for_user(user)
         llm_provider = llm.provider
 
-        # Build context from search results
-        context = "\n\n".join(
-            [
-                f"[{r.filename}]: {r.content}"
-                for r in results[:5]  # Use top 5 results as context
-            ]
-        )
+        # Build context from the best-scoring results within the token budget
+        context = pack_context(f"[{r.filename}]: {r.content}" for r in results)
+        prompt = _SEARCH_PROMPT(query=request.query, context=context)
 
-        response = await llm.generate(
-            f"Based on the following elevator documentation, answer this query: {request.query}\n\nDocumentation:\n{context}",
-            system_instruction="You are an elevator technician assistant. Provide practical, accurate answers based on the documentation provided. If the documentation doesn't contain the answer, say so.",
-        )
+        if stream:
+            head = {
+                "query": request.query,
+                "results": [r.model_dump() for r in results],
+                "total": len(results),
+                "llm_provider": llm_provider,
+            }
+
+            async def cache_answer(text: str) -> None:
+                body = orjson.dumps({**head, "answer": text})
+                await cache.set(cache_key, body, ttl_seconds=_SEARCH_ANSWER_TTL)
+
+            return _event_stream(
+                head, llm.generate_stream(prompt, _SEARCH_SYSTEM), on_complete=cache_answer
+            )
+
+        response = await llm.generate(prompt, _SEARCH_SYSTEM)
         answer = response.text
 
-    return SearchResponse(
+    search_response = SearchResponse.model_construct(
         query=request.query,
         results=results,
         total=len(results),
         answer=answer,
         llm_provider=llm_provider,
     )
+    if answer is None:
+        return ORJSONResponse(search_response.model_dump())
 
+    body = orjson.dumps(search_response.model_dump())
+    await cache.set(cache_key, body, ttl_seconds=_SEARCH_ANSWER_TTL)
+    return _cached_json_response(http_request, body)
 
-@router.get("/fault/{code}")
+
+@router.get("/fault/{code}", response_model=None)
 async def get_fault_code(
     code: str,
+    http_request: Request,
     manufacturer: str | None = None,
-    user: UserContext | None = Depends(get_current_user_optional),
+    llm: LLMService = Depends(get_llm),
     repo: SQLiteRepository = Depends(get_sqlite_repository),
     graph: KnowledgeGraphStore = Depends(get_knowledge_graph),
-) -> dict[str, Any]:
+    cache: ResponseCacheImpl = Depends(get_answer_cache),
+) -> Response:
     """
     Look up a specific fault code with AI explanation.
 
     - **code**: Fault code (e.g., "505", "E-01")
     - **manufacturer**: Optional manufacturer filter
 
+    Send ``Accept: text/event-stream`` to stream the explanation as it is generated.
+    Explanations are cached for 24h per code, manufacturer and LLM provider.
+
     Auth:
     - With Google login: Uses Gemini (your quota, zero cost)
     - Without login: Uses Ollama (server-side)
     """
-    # Look up in SQLite fault codes table
-    fault_results = await repo.get_fault_code(code, manufacturer)
-
-    # Look up in knowledge graph
-    fault_node = await graph.find_fault_by_code(code)
-    resolution_procedures = []
-    test_procedures = []
-
-    if fault_node:
-        resolution_procedures = await graph.get_fault_resolution(fault_node.id)
-        test_procedures = await graph.get_fault_tests(fault_node.id)
+    stream = _wants_event_stream(http_request)
+
+    cache_key = f"fault:{code}|{manufacturer}|{llm.provider}"
+    cached = await cache.get(cache_key)
+    if cached is not None:
+        if stream:
+            return _replay_event_stream(cached.response, "explanation")
+        return _cached_json_response(http_request, cached.response, max_age=_FAULT_ANSWER_TTL)
+
+    # Look up in SQLite fault codes table and knowledge graph concurrently
+    fault_results, fault = await asyncio.gather(
+        repo.get_fault_code(code, manufacturer),
+        graph.get_fault_with_procedures(code),
+    )
 
     # Build context from database and graph
     context_parts = []
@@ -157,54 +249,202 @@ async def get_fault_code(
                 f"Fault {fr.get('code')}: {fr.get('description', 'No description')}"
             )
 
-    if fault_node:
-        props = fault_node.properties
+    if fault:
         context_parts.append(
-            f"Name: {props.get('name', fault_node.name)}\n"
-            f"Description: {props.get('description', 'N/A')}\n"
-            f"Reason: {props.get('reason', 'N/A')}\n"
-            f"Operation: {props.get('operation', 'N/A')}"
+            f"Name: {fault.name}\n"
+            f"Description: {fault.description or 'N/A'}\n"
+            f"Reason: {fault.reason or 'N/A'}\n"
+            f"Operation: {fault.operation or 'N/A'}"
         )
 
-    if resolution_procedures:
-        context_parts.append(
-            "Recovery procedures:\n"
-            + "\n".join(f"- {p.properties.get('text', p.name)}" for p in resolution_procedures)
-        )
-
-    if test_procedures:
-        context_parts.append(
-            "Testing procedures:\n"
-            + "\n".join(f"- {p.properties.get('text', p.name)}" for p in test_procedures)
-        )
+        if fault.resolutions:
+            context_parts.append(
+                "Recovery procedures:\n" + "\n".join(f"- {text}" for text in fault.resolutions)
+            )
 
-    # Get LLM for AI explanation
-    llm = await get_llm_for_user(user)
+        if fault.tests:
+            context_parts.append(
+                "Testing procedures:\n" + "\n".join(f"- {text}" for text in fault.tests)
+            )
 
     # Generate explanation with context
-    context = "\n\n".join(context_parts) if context_parts else "No specific documentation found."
-
-    response = await llm.generate(
-        f"Based on this documentation, explain elevator fault code {code}"
-        + (f" for {manufacturer}" if manufacturer else "")
-        + f":\n\n{context}",
-        system_instruction="You are an elevator technician assistant. Provide a practical explanation of the fault code, its causes, and recommended actions. Be concise.",
-    )
+    context = pack_context(context_parts) or "No specific documentation found."
+    if manufacturer:
+        prompt = _FAULT_PROMPT_WITH_MANUFACTURER(
+            code=code, manufacturer=manufacturer, context=context
+        )
+    else:
+        prompt = _FAULT_PROMPT(code=code, context=context)
 
-    return {
+    payload: dict[str, Any] = {
         "code": code,
         "manufacturer": manufacturer,
-        "explanation": response.text,
         "llm_provider": llm.provider,
         "db_results": fault_results,
         "graph_data": {
-            "name": fault_node.properties.get("name") if fault_node else None,
-            "description": fault_node.properties.get("description") if fault_node else None,
-            "resolution_procedures": [
-                p.properties.get("text", p.name) for p in resolution_procedures
-            ],
-            "test_procedures": [p.properties.get("text", p.name) for p in test_procedures],
+            "name": fault.name,
+            "description": fault.description,
+            "resolution_procedures": fault.resolutions,
+            "test_procedures": fault.tests,
         }
-        if fault_node
+        if fault
         else None,
     }
+
+    if stream:
+
+        async def cache_explanation(text: str) -> None:
+            body = orjson.dumps({**payload, "explanation": text})
+            await cache.set(cache_key, body, ttl_seconds=_FAULT_ANSWER_TTL)
+
+        return _event_stream(
+            payload,
+            llm.generate_stream(prompt, _FAULT_SYSTEM),
+            on_complete=cache_explanation,
+        )
+
+    response = await llm.generate(prompt, _FAULT_SYSTEM)
+    payload["explanation"] = response.text
+
+    body = orjson.dumps(payload)
+    await cache.set(cache_key, body, ttl_seconds=_FAULT_ANSWER_TTL)
+    return _cached_json_response(http_request, body, max_age=_FAULT_ANSWER_TTL)
+
+
+def _cached_json_response(request: Request, body: bytes, max_age: int | None = None) -> Response:
+    """
+    Serve a serialized answer with an ETag, honouring If-None-Match.
+
+    Answers depend on the caller's LLM provider, so caches must vary on
+    Authorization.
+    """
+    headers = {
+        "etag": f'"{hashlib.blake2b(body, digest_size=16).hexdigest()}"',
+        "vary": "Authorization",
+    }
+    if max_age is not None:
+        headers["cache-control"] = f"private, max-age={max_age}"
+    if request.headers.get("if-none-match") == headers["etag"]:
+        return Response(status_code=304, headers=headers)
+    return Response(body, media_type="application/json", headers=headers)
+
+
+def pack_context(entries: Iterable[str], max_tokens: int = _CONTEXT_MAX_TOKENS) -> str:
+    """
+    Join context entries, in priority order, within a token budget.
+
+    Entries are added greedily; the first one that doesn't fit is trimmed to
+    the remaining budget (unless that would leave only a fragment) and
+    packing stops there.
+
+    Args:
+        entries: Context entries, most relevant first
+        max_tokens: Approximate token budget for the joined context
+
+    Returns:
+        Entries joined by blank lines
+    """
+    remaining = max_tokens * _CHARS_PER_TOKEN
+    packed: list[str] = []
+    for entry in entries:
+        if len(entry) > remaining:
+            if remaining >= _MIN_ENTRY_CHARS:
+                packed.append(entry[:remaining])
+            break
+        packed.append(entry)
+        remaining -= len(entry) + 2  # Separator
+    return "\n\n".join(packed)
+
+
+def _wants_event_stream(request: Request) -> bool:
+    """Check whether the client asked for server-sent events."""
+    return "text/event-stream" in request.headers.get("accept", "")
+
+
+def _sse(data: dict[str, Any]) -> bytes:
+    """Encode one server-sent event."""
+    return b"data: " + orjson.dumps(data) + b"\n\n"
+
+
+def _replay_event_stream(body: bytes, answer_field: str) -> StreamingResponse:
+    """Replay a cached answer as a single-delta event stream."""
+    payload = orjson.loads(body)
+    answer = payload.pop(answer_field)
+
+    async def chunks() -> AsyncGenerator[str, None]:
+        yield answer
+
+    return _event_stream(payload, chunks())
+
+
+def _event_stream(
+    head: dict[str, Any],
+    chunks: AsyncGenerator[str, None],
+    on_complete: Callable[[str], Awaitable[None]] | None = None,
+) -> StreamingResponse:
+    """
+    Stream an LLM answer as server-sent events.
+
+    The first event carries ``head`` (results, provider, ...). Generated
+    text follows as ``{"delta": ...}`` events, each coalescing up to
+    ``_STREAM_FLUSH_CHUNKS`` chunks or ``_STREAM_FLUSH_SECONDS`` of output
+    so slow clients aren't sent one event per token. ``on_complete``
+    receives the full text once the stream finishes without error.
+    ``chunks`` is closed when the stream ends, including on client
+    disconnect, so its upstream LLM connection is released right away.
+    """
+
+    async def events() -> AsyncIterator[bytes]:
+        yield _sse(head)
+
+        loop = asyncio.get_running_loop()
+        parts: list[str] = []
+        buffer: list[str] = []
+        deadline = 0.0
+        # Awaited via asyncio.wait so a flush timeout doesn't cancel the stream
+        pending: asyncio.Future[str] | None = None
+        try:
+            while True:
+                if pending is None:
+                    pending = asyncio.ensure_future(anext(chunks))
+                timeout = max(deadline - loop.time(), 0) if buffer else None
+                done, _ = await asyncio.wait({pending}, timeout=timeout)
+
+                if done:
+                    future, pending = pending, None
+                    try:
+                        chunk = future.result()
+                    except StopAsyncIteration:
+                        break
+                    if not buffer:
+                        deadline = loop.time() + _STREAM_FLUSH_SECONDS
+                    buffer.append(chunk)
+                    parts.append(chunk)
+                    if len(buffer) < _STREAM_FLUSH_CHUNKS:
+                        continue
+
+                yield _sse({"delta": "".join(buffer)})
+                buffer.clear()
+
+            if buffer:
+                yield _sse({"delta": "".join(buffer)})
+            if on_complete is not None:
+                await on_complete("".join(parts))
+            yield _sse({"done": True})
+        except LiftLogicError as e:
+            # Headers are already sent, so report the failure in-band
+            if buffer:
+                yield _sse({"delta": "".join(buffer)})
+            yield _sse({"error": e.to_dict()})
+        finally:
+            if pending is not None:
+                pending.cancel()
+                # aclose() is refused while anext() is still running
+                await asyncio.wait({pending})
+            await chunks.aclose()
+
+    return StreamingResponse(
+        events(),
+        media_type="text/event-stream",
+        headers={"cache-control": "no-cache", "x-accel-buffering": "no"},
+    )
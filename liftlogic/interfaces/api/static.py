@@ -0,0 +1,158 @@
+"""
+Static Files - In-memory cached static asset serving.
+
+Landing page and React assets are small and only change on deploy, so
+they are served from memory instead of re-opening the file per request.
+"""
+
+from __future__ import annotations
+
+import gzip
+import hashlib
+import mimetypes
+import os
+import stat
+from collections import OrderedDict
+from dataclasses import dataclass
+from email.utils import formatdate
+from pathlib import Path
+from typing import Any
+
+from starlette.datastructures import Headers
+from starlette.requests import Request
+from starlette.responses import Response
+from starlette.staticfiles import NotModifiedResponse, StaticFiles
+from starlette.types import Scope
+
+__all__ = ["CachedStaticFiles", "PreloadedFile"]
+
+
+class CachedStaticFiles(StaticFiles):
+    """
+    StaticFiles that keeps small files in a bounded in-memory LRU.
+
+    Entries are keyed by path and mtime, so a redeployed file is picked up
+    on its next request. Files over ``max_file_size`` use the regular
+    streamed FileResponse. Cache misses are read in ``lookup_path``, which
+    StaticFiles already runs in a worker thread, so the event loop never
+    blocks on file I/O.
+    """
+
+    def __init__(
+        self,
+        *,
+        max_file_size: int = 64 * 1024,
+        max_entries: int = 256,
+        **kwargs: Any,
+    ) -> None:
+        """
+        Initialize cached static files.
+
+        Args:
+            max_file_size: Largest file (bytes) kept in memory
+            max_entries: Maximum number of cached files
+            **kwargs: Passed through to StaticFiles (directory, html, ...)
+        """
+        super().__init__(**kwargs)
+        self._max_file_size = max_file_size
+        self._max_entries = max_entries
+        self._cache: OrderedDict[tuple[str, int], tuple[bytes, dict[str, str]]] = OrderedDict()
+        # Files read ahead by lookup_path, handed to file_response on the loop
+        self._pending: dict[tuple[str, int], tuple[bytes, dict[str, str]]] = {}
+
+    def lookup_path(self, path: str) -> tuple[str, os.stat_result | None]:
+        """Resolve a path and read small uncached files (runs in a worker thread)."""
+        full_path, stat_result = super().lookup_path(path)
+        if (
+            stat_result is not None
+            and stat.S_ISREG(stat_result.st_mode)
+            and stat_result.st_size <= self._max_file_size
+        ):
+            key = (full_path, stat_result.st_mtime_ns)
+            if key not in self._cache:
+                self._pending[key] = self._load(full_path, stat_result)
+        return full_path, stat_result
+
+    def file_response(
+        self,
+        full_path: str | os.PathLike[str],
+        stat_result: os.stat_result,
+        scope: Scope,
+        status_code: int = 200,
+    ) -> Response:
+        """Serve small files from memory, larger ones via FileResponse."""
+        if stat_result.st_size > self._max_file_size:
+            return super().file_response(full_path, stat_result, scope, status_code)
+
+        key = (os.fspath(full_path), stat_result.st_mtime_ns)
+        entry = self._cache.get(key)
+        if entry is None:
+            entry = self._pending.pop(key, None)
+            if entry is None:
+                # Not read ahead (e.g. evicted meanwhile): stream, don't block the loop
+                return super().file_response(full_path, stat_result, scope, status_code)
+            self._cache[key] = entry
+            if len(self._cache) > self._max_entries:
+                self._cache.popitem(last=False)
+        else:
+            self._cache.move_to_end(key)
+
+        body, headers = entry
+        if self.is_not_modified(Headers(headers=headers), Headers(scope=scope)):
+            return NotModifiedResponse(Headers(headers=headers))
+        return Response(body, status_code=status_code, headers=headers)
+
+    @staticmethod
+    def _load(path: str, stat_result: os.stat_result) -> tuple[bytes, dict[str, str]]:
+        """Read a small file and build the same headers FileResponse would."""
+        with open(path, "rb") as f:
+            body = f.read()
+
+        media_type = mimetypes.guess_type(path)[0] or "text/plain"
+        if media_type.startswith("text/") or media_type == "application/javascript":
+            media_type += "; charset=utf-8"
+
+        etag_base = f"{stat_result.st_mtime}-{stat_result.st_size}"
+        etag = hashlib.md5(etag_base.encode(), usedforsecurity=False).hexdigest()
+        return body, {
+            "content-type": media_type,
+            "etag": f'"{etag}"',
+            "last-modified": formatdate(stat_result.st_mtime, usegmt=True),
+        }
+
+
+@dataclass(frozen=True)
+class PreloadedFile:
+    """
+    A single file held in memory with a precomputed gzip body and ETag.
+
+    Used for entry points (index.html, styles.css, ...) that are hit on
+    every page load but only change on deploy.
+    """
+
+    body: bytes
+    gzip_body: bytes
+    etag: str
+    media_type: str
+
+    @classmethod
+    def read(cls, path: Path, media_type: str) -> PreloadedFile:
+        """Read and compress a file (blocking - call at startup or via to_thread)."""
+        body = path.read_bytes()
+        return cls(
+            body=body,
+            gzip_body=gzip.compress(body, compresslevel=9),
+            etag=f'"{hashlib.blake2b(body, digest_size=16).hexdigest()}"',
+            media_type=media_type,
+        )
+
+    def response(self, request: Request) -> Response:
+        """Build a response, honouring If-None-Match and Accept-Encoding."""
+        # no-cache: browsers always revalidate, which costs a bodyless 304
+        headers = {"etag": self.etag, "cache-control": "no-cache", "vary": "Accept-Encoding"}
+        if request.headers.get("if-none-match") == self.etag:
+            return Response(status_code=304, headers=headers)
+        if "gzip" in request.headers.get("accept-encoding", ""):
+            headers["content-encoding"] = "gzip"
+            return Response(self.gzip_body, media_type=self.media_type, headers=headers)
+        return Response(self.body, media_type=self.media_type, headers=headers)
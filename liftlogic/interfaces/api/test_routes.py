@@ -1,16 +1,31 @@
 """Tests for API Routes."""
 
-from collections.abc import Generator
+import os
+from collections.abc import AsyncGenerator, AsyncIterator, Generator
+from pathlib import Path
+from typing import BinaryIO
 from unittest.mock import AsyncMock
 
 import pytest
+from fastapi import FastAPI
 from fastapi.testclient import TestClient
 
 from liftlogic.adapters import LLMResponse
+from liftlogic.config.errors import ErrorCode, LiftLogicError
 from liftlogic.domains.knowledge import KnowledgeGraphStore
-
-from .deps import get_knowledge_graph, get_sqlite_repository
+from liftlogic.domains.orchestration import ResponseCacheImpl
+
+from .deps import (
+    get_answer_cache,
+    get_diagnosis_cache,
+    get_document_cache,
+    get_knowledge_graph,
+    get_llm,
+    get_sqlite_repository,
+)
 from .main import create_app
+from .middleware import ErrorHandlerMiddleware, RateLimitMiddleware
+from .static import CachedStaticFiles
 
 
 @pytest.fixture
@@ -30,6 +45,7 @@ def mock_knowledge_graph() -> AsyncMock:
     mock.find_fault_by_code.return_value = None
     mock.get_fault_resolution.return_value = []
     mock.get_fault_tests.return_value = []
+    mock.get_fault_with_procedures.return_value = None
     mock.get_neighbors.return_value = []
     return mock
 
@@ -45,21 +61,37 @@ def mock_llm() -> AsyncMock:
     return mock
 
 
+@pytest.fixture(scope="session")
+def app() -> FastAPI:
+    """Build the application once per test session."""
+    return create_app()
+
+
 @pytest.fixture
 def client(
-    mock_sqlite_repo: AsyncMock, mock_knowledge_graph: AsyncMock
+    app: FastAPI,
+    mock_sqlite_repo: AsyncMock,
+    mock_knowledge_graph: AsyncMock,
+    mock_llm: AsyncMock,
 ) -> Generator[TestClient, None, None]:
     """Create a test client with mocked dependencies."""
-    app = create_app()
-
     # Override dependencies with mocks
     app.dependency_overrides[get_sqlite_repository] = lambda: mock_sqlite_repo
     app.dependency_overrides[get_knowledge_graph] = lambda: mock_knowledge_graph
+    app.dependency_overrides[get_llm] = lambda: mock_llm
+    diagnosis_cache = ResponseCacheImpl()
+    app.dependency_overrides[get_diagnosis_cache] = lambda: diagnosis_cache
+    document_cache = ResponseCacheImpl()
+    app.dependency_overrides[get_document_cache] = lambda: document_cache
+    answer_cache = ResponseCacheImpl()
+    app.dependency_overrides[get_answer_cache] = lambda: answer_cache
 
     yield TestClient(app)
 
-    # Cleanup
+    # Cleanup; dropping the built middleware stack gives the next test fresh
+    # middleware state (e.g. rate-limit buckets)
     app.dependency_overrides.clear()
+    app.middleware_stack = None
 
 
 def test_health_endpoint(client: TestClient) -> None:
@@ -74,14 +106,9 @@ def test_health_endpoint(client: TestClient) -> None:
 
 def test_search_endpoint_basic(client: TestClient, mock_sqlite_repo: AsyncMock) -> None:
     """Test basic search without RAG."""
+    # (id, filename, content, manufacturer, document_type, score, snippet)
     mock_sqlite_repo.search_fts.return_value = [
-        {
-            "id": 1,
-            "filename": "test.pdf",
-            "content": "Test content about fault codes",
-            "manufacturer": "KONE",
-            "score": -0.5,
-        }
+        (1, "test.pdf", "Test content about fault codes", "KONE", None, -0.5, None)
     ]
 
     response = client.post(
@@ -123,28 +150,138 @@ def test_search_endpoint_limit_validation(client: TestClient) -> None:
     assert response.status_code == 422
 
 
+def test_search_rag_streams_server_sent_events(
+    client: TestClient, mock_sqlite_repo: AsyncMock, mock_llm: AsyncMock
+) -> None:
+    """Test RAG answers stream as SSE, uncompressed so gzip can't buffer them."""
+    import json
+    from unittest.mock import MagicMock
+
+    mock_sqlite_repo.search_fts.return_value = [
+        (1, "test.pdf", "Door lock", None, None, -0.5, None)
+    ]
+
+    async def chunks() -> AsyncIterator[str]:
+        for chunk in ("Check ", "the ", "door lock"):
+            yield chunk
+
+    mock_llm.generate_stream = MagicMock(return_value=chunks())
+
+    response = client.post(
+        "/api/search",
+        json={"query": "door", "use_rag": True},
+        headers={"Accept": "text/event-stream", "Accept-Encoding": "gzip"},
+    )
+
+    assert response.status_code == 200
+    assert response.headers["content-type"].startswith("text/event-stream")
+    assert "content-encoding" not in response.headers
+    events = [
+        json.loads(line.removeprefix("data: "))
+        for line in response.text.split("\n\n")
+        if line.startswith("data: ")
+    ]
+    assert events[0]["total"] == 1
+    assert "".join(e.get("delta", "") for e in events) == "Check the door lock"
+    assert events[-1] == {"done": True}
+
+
+async def test_event_stream_closes_chunks_on_disconnect() -> None:
+    """Test the LLM chunk generator is closed when the client goes away mid-stream."""
+    from .routes.search import _event_stream
+
+    closed = False
+
+    async def chunks() -> AsyncGenerator[str, None]:
+        nonlocal closed
+        try:
+            while True:
+                yield "token "
+        finally:
+            closed = True
+
+    body = _event_stream({"total": 0}, chunks()).body_iterator
+    assert isinstance(body, AsyncGenerator)
+    await anext(body)  # head event
+    await anext(body)  # first delta
+    await body.aclose()  # client disconnected
+
+    assert closed
+
+
+def test_fault_code_answer_is_cached(
+    client: TestClient, mock_sqlite_repo: AsyncMock, mock_llm: AsyncMock
+) -> None:
+    """Test repeat fault lookups are served from the answer cache with an ETag."""
+    mock_llm.generate.return_value = LLMResponse(
+        text="Door lock fault", model="mock-model", provider="mock"
+    )
+
+    first = client.get("/api/search/fault/505")
+    second = client.get("/api/search/fault/505")
+    revalidated = client.get(
+        "/api/search/fault/505", headers={"If-None-Match": first.headers["etag"]}
+    )
+
+    assert first.json()["explanation"] == "Door lock fault"
+    assert second.content == first.content
+    assert revalidated.status_code == 304
+    mock_sqlite_repo.get_fault_code.assert_awaited_once()
+    mock_llm.generate.assert_awaited_once()
+
+
 def test_diagnosis_endpoint_structure(
     client: TestClient, mock_sqlite_repo: AsyncMock, mock_llm: AsyncMock
 ) -> None:
     """Test diagnosis endpoint returns correct structure."""
-    from unittest.mock import patch
+    response = client.post(
+        "/api/diagnosis/diagnose",
+        json={"fault_code": "F505"},
+    )
 
-    with patch(
-        "liftlogic.interfaces.api.routes.diagnosis.get_llm_for_user",
-        return_value=mock_llm,
-    ):
+    assert response.status_code == 200
+    data = response.json()
+    assert data["fault_code"] == "F505"
+    assert "severity" in data
+    assert "causes" in data
+    assert "remedies" in data
+    assert "confidence" in data
+
+
+def test_diagnosis_reuses_cached_fault_context(
+    client: TestClient, mock_knowledge_graph: AsyncMock, mock_llm: AsyncMock
+) -> None:
+    """Test repeated diagnoses of one fault skip the graph lookups."""
+    for symptoms in (["door stuck"], ["noise"]):
         response = client.post(
             "/api/diagnosis/diagnose",
-            json={"fault_code": "F505"},
+            json={"fault_code": "F505", "symptoms": symptoms},
         )
+        assert response.status_code == 200
+
+    mock_knowledge_graph.find_fault_by_code.assert_awaited_once_with("F505")
+    # Symptoms are still per-request
+    assert "- noise" in mock_llm.generate.call_args.args[0]
+
 
+def test_safety_analysis_caches_document_head(
+    client: TestClient, mock_sqlite_repo: AsyncMock, mock_llm: AsyncMock
+) -> None:
+    """Test repeat analyses of a document fetch it once and truncate content."""
+    mock_sqlite_repo.get_document.return_value = {
+        "id": 7,
+        "filename": "kone_manual.pdf",
+        "manufacturer": "KONE",
+        "content": "x" * 20000,
+    }
+
+    for _ in range(2):
+        response = client.post("/api/diagnosis/analyze/safety", params={"document_id": 7})
         assert response.status_code == 200
-        data = response.json()
-        assert data["fault_code"] == "F505"
-        assert "severity" in data
-        assert "causes" in data
-        assert "remedies" in data
-        assert "confidence" in data
+        assert response.json()["filename"] == "kone_manual.pdf"
+
+    mock_sqlite_repo.get_document.assert_awaited_once_with(7)
+    assert "x" * 10001 not in mock_llm.generate.call_args.args[0]
 
 
 def test_cors_headers(client: TestClient) -> None:
@@ -163,7 +300,196 @@ def test_request_id_header(client: TestClient) -> None:
     assert "x-request-id" in response.headers
 
 
+def test_request_id_header_is_propagated(client: TestClient) -> None:
+    """Test that a caller-supplied request ID is echoed back."""
+    response = client.get("/health", headers={"X-Request-ID": "trace-123"})
+    assert response.headers["x-request-id"] == "trace-123"
+
+
+def test_response_time_header(client: TestClient) -> None:
+    """Test that responses include latency header."""
+    response = client.get("/health")
+    assert float(response.headers["x-response-time-ms"]) >= 0
+
+
 def test_404_for_unknown_routes(client: TestClient) -> None:
     """Test 404 for non-existent routes."""
     response = client.get("/api/nonexistent")
     assert response.status_code == 404
+
+
+def test_rate_limit_exhausts_token_bucket() -> None:
+    """Test that requests beyond the bucket capacity get 429."""
+    app = FastAPI()
+
+    @app.get("/ping")
+    async def ping() -> dict[str, str]:
+        return {"status": "ok"}
+
+    app.add_middleware(RateLimitMiddleware, requests_per_minute=2)
+    client = TestClient(app)
+
+    first = client.get("/ping")
+    assert first.status_code == 200
+    assert first.headers["x-ratelimit-remaining"] == "1"
+    assert client.get("/ping").status_code == 200
+
+    limited = client.get("/ping")
+    assert limited.status_code == 429
+    assert int(limited.headers["retry-after"]) >= 1
+    assert limited.json()["error"]["code"] == ErrorCode.SECURITY_RATE_LIMITED.value
+
+
+def test_error_handler_maps_liftlogic_error() -> None:
+    """Test that LiftLogicError becomes a structured JSON error response."""
+    app = FastAPI()
+
+    @app.get("/missing")
+    async def missing() -> None:
+        raise LiftLogicError(ErrorCode.NOT_FOUND, "Document not found")
+
+    app.add_middleware(ErrorHandlerMiddleware)
+    client = TestClient(app)
+
+    response = client.get("/missing")
+    assert response.status_code == 404
+    assert response.json()["error"]["code"] == ErrorCode.NOT_FOUND.value
+
+
+def test_large_responses_are_gzipped() -> None:
+    """Test that responses over the size threshold are compressed."""
+    app = create_app()
+
+    @app.get("/big")
+    async def big() -> dict[str, str]:
+        return {"text": "x" * 4096}
+
+    response = TestClient(app).get("/big", headers={"Accept-Encoding": "gzip"})
+    assert response.status_code == 200
+    assert response.headers["content-encoding"] == "gzip"
+    assert response.json()["text"] == "x" * 4096
+
+
+@pytest.mark.parametrize(
+    ("operation", "expected"),
+    [
+        ("Car stops IMMEDIATELY at nearest floor", "critical"),
+        ("Prevents start; door lock monitored", "critical"),
+        ("Inhibits next start", "high"),
+        ("Alarm only", "low"),
+        ("Logged", "medium"),
+    ],
+)
+def test_classify_severity(operation: str, expected: str) -> None:
+    """Test severity keywords are matched case-insensitively in priority order."""
+    from .routes.diagnosis import _classify_severity
+
+    assert _classify_severity(operation) == expected
+
+
+def test_pack_context_respects_token_budget() -> None:
+    """Test context entries are packed in order and the overflow is trimmed."""
+    from .routes.search import pack_context
+
+    entries = ["a" * 300, "b" * 300, "c" * 300, "d" * 300]
+
+    context = pack_context(entries, max_tokens=220)  # ~880 characters
+
+    assert len(context) <= 880
+    assert context.startswith("a" * 300 + "\n\n" + "b" * 300)
+    assert "c" in context  # Trimmed, not dropped
+    assert "d" not in context
+    assert pack_context(["short"], max_tokens=200) == "short"
+
+
+def test_extract_pdf_spools_upload_to_disk(
+    client: TestClient, monkeypatch: pytest.MonkeyPatch
+) -> None:
+    """Test uploads are copied to a temp file that is cleaned up."""
+    from .routes import extraction
+
+    spool_to_disk = extraction._spool_to_disk
+    spooled: list[tuple[Path, bytes]] = []
+
+    def spool(source: BinaryIO) -> Path:
+        path = spool_to_disk(source)
+        spooled.append((path, path.read_bytes()))
+        return path
+
+    monkeypatch.setattr(extraction, "_spool_to_disk", spool)
+
+    response = client.post(
+        "/api/extraction/extract",
+        files={"file": ("manual.pdf", b"%PDF-1.4 test", "application/pdf")},
+    )
+
+    assert response.status_code == 200
+    assert response.json()["filename"] == "manual.pdf"
+    [(path, content)] = spooled
+    assert content == b"%PDF-1.4 test"
+    assert not path.exists()
+
+
+def test_cached_static_files_serve_and_revalidate(tmp_path: Path) -> None:
+    """Test small assets are served from memory and refreshed on change."""
+    asset = tmp_path / "site.css"
+    asset.write_text("body { color: red; }")
+
+    app = FastAPI()
+    app.mount("/assets", CachedStaticFiles(directory=tmp_path), name="assets")
+    client = TestClient(app)
+
+    first = client.get("/assets/site.css")
+    assert first.status_code == 200
+    assert first.text == "body { color: red; }"
+    assert first.headers["content-type"].startswith("text/css")
+
+    revalidated = client.get("/assets/site.css", headers={"If-None-Match": first.headers["etag"]})
+    assert revalidated.status_code == 304
+
+    asset.write_text("body { color: blue; }")
+    os.utime(asset, ns=(asset.stat().st_atime_ns, asset.stat().st_mtime_ns + 1_000_000_000))
+    assert client.get("/assets/site.css").text == "body { color: blue; }"
+
+
+def test_landing_page_served_with_etag(client: TestClient) -> None:
+    """Test the landing page is served precompressed and revalidates via ETag."""
+    response = client.get("/", headers={"Accept-Encoding": "gzip"})
+    assert response.status_code == 200
+    assert response.headers["content-encoding"] == "gzip"
+    assert "<html" in response.text.lower()
+
+    revalidated = client.get("/", headers={"If-None-Match": response.headers["etag"]})
+    assert revalidated.status_code == 304
+
+
+async def test_rate_limit_buckets_are_bounded() -> None:
+    """Test the least recently seen client bucket is evicted past max_clients."""
+    middleware = RateLimitMiddleware(AsyncMock(), requests_per_minute=60, max_clients=2)
+
+    for ip in ("10.0.0.1", "10.0.0.2", "10.0.0.1", "10.0.0.3"):
+        scope = {"type": "http", "path": "/api/search", "client": (ip, 1234)}
+        await middleware(scope, AsyncMock(), AsyncMock())
+
+    # .1 was refreshed, so .2 was the oldest when .3 arrived
+    assert list(middleware.buckets) == ["10.0.0.1", "10.0.0.3"]
+
+
+async def test_verified_tokens_are_cached() -> None:
+    """Test a verified token skips the userinfo round-trip on later requests."""
+    from unittest.mock import MagicMock, patch
+
+    from .auth import deps as auth_deps
+
+    http = AsyncMock()
+    http.get.return_value = MagicMock(status_code=200, json=lambda: {"email": "tech@example.com"})
+
+    with (
+        patch.object(auth_deps, "_get_client", return_value=http),
+        patch.object(auth_deps, "_token_cache", ResponseCacheImpl()),
+    ):
+        first = await auth_deps.get_current_user("Bearer token-1")
+        second = await auth_deps.get_current_user("Bearer token-1")
+
+    assert first.email == second.email == "tech@example.com"
+    http.get.assert_awaited_once()
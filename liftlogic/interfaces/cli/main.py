@@ -11,14 +11,22 @@ Usage:
 from __future__ import annotations
 
 import asyncio
+import sys
+from functools import lru_cache
 from pathlib import Path
+from typing import TYPE_CHECKING
 
+import orjson
 import typer
 from rich.console import Console
 from rich.panel import Panel
 from rich.progress import Progress, SpinnerColumn, TextColumn
 from rich.table import Table
 
+if TYPE_CHECKING:
+    from liftlogic.adapters.gemini import GeminiClient
+    from liftlogic.domains.extraction import ExtractionResult
+
 app = typer.Typer(
     name="liftlogic",
     help="LiftLogic - Elevator Intelligence Platform",
@@ -26,6 +34,51 @@ app = typer.Typer(
 )
 console = Console()
 
+# ExtractionResult list fields written item by item by _write_result_json;
+# default=str covers Path/datetime fields
+_STREAMED_RESULT_FIELDS = ("components", "connections", "fault_codes", "tables")
+_JSON_OPTIONS = orjson.OPT_SERIALIZE_NUMPY
+
+
+@lru_cache
+def _get_gemini() -> GeminiClient:
+    """Get the process-wide Gemini client (OAuth/ADC - no API key needed)."""
+    from liftlogic.adapters.gemini import GeminiClient
+
+    return GeminiClient()
+
+
+def _write_result_json(result: ExtractionResult, output: Path) -> None:
+    """
+    Write an ExtractionResult as JSON, one list item at a time.
+
+    Large extractions are never materialized as a full dict or string:
+    scalar fields are dumped once, and each component, connection, fault
+    code and table is serialized and written on its own line.
+
+    Args:
+        result: ExtractionResult to save
+        output: Destination file
+    """
+    streamed = _STREAMED_RESULT_FIELDS
+    header = result.model_dump(exclude=set(streamed))
+
+    with output.open("wb") as f:
+        f.write(b"{")
+        for i, name in enumerate(type(result).model_fields):
+            if i:
+                f.write(b",")
+            f.write(b"\n  " + orjson.dumps(name) + b": ")
+            if name not in streamed:
+                f.write(orjson.dumps(header[name], default=str, option=_JSON_OPTIONS))
+                continue
+            f.write(b"[")
+            for j, item in enumerate(getattr(result, name)):
+                f.write(b",\n    " if j else b"\n    ")
+                f.write(orjson.dumps(item.model_dump(), default=str, option=_JSON_OPTIONS))
+            f.write(b"\n  ]")
+        f.write(b"\n}\n")
+
 
 @app.command()
 def extract(
@@ -43,11 +96,10 @@ def extract(
 
 async def _extract_async(pdf_path: Path, output: Path | None, evaluate: bool) -> None:
     """Async extraction implementation."""
-    from liftlogic.adapters.gemini import GeminiClient
     from liftlogic.config import get_settings
     from liftlogic.domains.extraction import GeminiExtractor
 
-    settings = get_settings()
+    get_settings()
 
     with Progress(
         SpinnerColumn(),
@@ -57,7 +109,7 @@ async def _extract_async(pdf_path: Path, output: Path | None, evaluate: bool) ->
         task = progress.add_task("Initializing...", total=None)
 
         # Initialize components (OAuth/ADC mode - no API key needed)
-        gemini = GeminiClient()
+        gemini = _get_gemini()
         extractor = GeminiExtractor(gemini)
 
         progress.update(task, description="Extracting from PDF...")
@@ -85,9 +137,7 @@ async def _extract_async(pdf_path: Path, output: Path | None, evaluate: bool) ->
 
             # Save output if requested
             if output:
-                import json
-
-                output.write_text(json.dumps(result.model_dump(), indent=2))
+                _write_result_json(result, output)
                 console.print(f"\n[green]Saved to:[/green] {output}")
 
             # Run evaluation if requested
@@ -172,11 +222,10 @@ async def _diagnose_async(
     detailed: bool,
 ) -> None:
     """Async diagnosis implementation."""
-    from liftlogic.adapters.gemini import GeminiClient
     from liftlogic.config import get_settings
     from liftlogic.domains.diagnosis import DiagnosisMode, FaultDiagnosisAgent
 
-    settings = get_settings()
+    get_settings()
 
     with Progress(
         SpinnerColumn(),
@@ -187,7 +236,7 @@ async def _diagnose_async(
 
         try:
             # OAuth/ADC mode - no API key needed
-            gemini = GeminiClient()
+            gemini = _get_gemini()
             agent = FaultDiagnosisAgent(llm_client=gemini)
 
             mode = DiagnosisMode.DETAILED if detailed else DiagnosisMode.QUICK
@@ -257,6 +306,9 @@ def serve(
         port=port,
         reload=reload,
         factory=True,
+        # uvloop is unavailable on Windows; "auto" falls back to asyncio there
+        loop="auto" if sys.platform == "win32" else "uvloop",
+        http="httptools",
     )
 
 
@@ -11,18 +11,24 @@ This script:
 Usage:
     python tools/build_index.py
     python tools/build_index.py --skip-embeddings  # Fast mode, skip FAISS
+    python tools/build_index.py --onnx  # Faster CPU embedding via ONNX Runtime
 """
 
 from __future__ import annotations
 
 import argparse
 import asyncio
-import json
 import logging
+import math
+import re
 import sys
+from collections.abc import AsyncIterator
+from concurrent.futures import ProcessPoolExecutor
 from pathlib import Path
+from typing import Any
 
-import numpy as np
+import ijson
+import orjson
 
 # Add project root to path
 sys.path.insert(0, str(Path(__file__).parent.parent))
@@ -43,68 +49,179 @@ PROJECT_ROOT = Path(__file__).parent.parent
 DATA_DIR = PROJECT_ROOT / "data"
 PLATINUM_DIR = DATA_DIR / "processed" / "platinum"
 GRAPH_FILE = DATA_DIR / "graph" / "graph_production.jsonl"
+MODELS_DIR = DATA_DIR / "models"
+
+
+# Documents per insert transaction during the platinum load
+LOAD_BATCH_SIZE = 1000
+# Files per parse task handed to a worker process
+PARSE_CHUNK_SIZE = 32
+
+# Leading characters of each document used for its embedding
+EMBED_CHARS = 1000
+EMBED_BATCH_SIZE = 64
+
+# Above this many documents the exhaustive Flat index gives way to IVFPQ
+IVFPQ_MIN_VECTORS = 100_000
+IVFPQ_NLIST = 4096
+# Training vectors per IVF cluster below which k-means centroids are poor
+IVF_MIN_POINTS_PER_LIST = 39
+
+# Table headers that mark a fault code table (one scan over all headers)
+FAULT_HEADER_RE = re.compile(r"fault|code|error", re.IGNORECASE)
+
+
+def _first_item(json_file: Path, prefix: str, default: Any) -> Any:
+    """Stream a JSON file up to the first value at ``prefix``."""
+    with open(json_file, "rb") as f:
+        return next(ijson.items(f, prefix, use_float=True), default)
+
+
+def parse_platinum(json_file: Path) -> tuple[dict, list[dict]]:
+    """
+    Parse a platinum JSON into document and fault code insert kwargs.
+
+    The file is streamed with ijson, so only the metadata, the text and one
+    table at a time are ever held in memory; page text, images and other
+    structured content are skipped rather than materialized.
+    """
+    metadata = _first_item(json_file, "metadata", {})
+    doc_props = metadata.get("document_properties", {})
+    manufacturer = doc_props.get("manufacturer")
+
+    document = {
+        "filename": metadata.get("filename", json_file.name),
+        "content": _first_item(json_file, "full_text", "")[:50000],  # Limit content size
+        "manufacturer": manufacturer,
+        "model": doc_props.get("model"),
+        "document_type": doc_props.get("document_type"),
+        "filepath": str(json_file),
+        "metadata": metadata,
+    }
+
+    # Extract fault codes from structured content
+    fault_codes = []
+    with open(json_file, "rb") as f:
+        for table in ijson.items(f, "structured_content.pages.item.tables.item", use_float=True):
+            # Look for fault code tables
+            if FAULT_HEADER_RE.search("\t".join(table.get("headers", ()))):
+                for row in table.get("rows", []):
+                    if row and len(row) >= 2:
+                        code = str(row[0]).strip()
+                        desc = str(row[1]).strip() if len(row) > 1 else ""
+                        if code and len(code) < 20:  # Reasonable code length
+                            fault_codes.append({
+                                "code": code,
+                                "description": desc,
+                                "manufacturer": manufacturer,
+                            })
+
+    return document, fault_codes
+
+
+def parse_batch(json_files: list[Path]) -> tuple[list[dict], list[list[dict]]]:
+    """Parse a batch of platinum JSONs, skipping (and logging) bad files."""
+    documents: list[dict] = []
+    fault_codes: list[list[dict]] = []
+    for json_file in json_files:
+        try:
+            document, faults = parse_platinum(json_file)
+        except Exception as e:
+            logger.warning("Failed to process %s: %s", json_file.name, e)
+            continue
+        documents.append(document)
+        fault_codes.append(faults)
+    return documents, fault_codes
+
+
+async def flush_batch(
+    repo: SQLiteRepository,
+    documents: list[dict],
+    fault_codes: list[list[dict]],
+) -> int:
+    """Insert a batch of documents and their fault codes; returns fault count."""
+    doc_ids = await repo.insert_documents_bulk(documents)
+    rows = [
+        {**fault, "document_id": doc_id}
+        for doc_id, faults in zip(doc_ids, fault_codes)
+        for fault in faults
+    ]
+    return await repo.insert_fault_codes_bulk(rows)
+
+
+async def parse_ahead(
+    batches: list[list[Path]],
+    pool: ProcessPoolExecutor,
+) -> AsyncIterator[tuple[list[dict], list[list[dict]]]]:
+    """Yield parsed batches, parsing the next one across the pool meanwhile."""
+    loop = asyncio.get_running_loop()
+
+    def submit(batch: list[Path]) -> list[asyncio.Future]:
+        return [
+            loop.run_in_executor(pool, parse_batch, batch[i : i + PARSE_CHUNK_SIZE])
+            for i in range(0, len(batch), PARSE_CHUNK_SIZE)
+        ]
+
+    async def collect(futures: list[asyncio.Future]) -> tuple[list[dict], list[list[dict]]]:
+        documents: list[dict] = []
+        fault_codes: list[list[dict]] = []
+        for chunk_documents, chunk_faults in await asyncio.gather(*futures):
+            documents.extend(chunk_documents)
+            fault_codes.extend(chunk_faults)
+        return documents, fault_codes
+
+    pending = None
+    for batch in batches:
+        futures = submit(batch)
+        if pending is not None:
+            yield await collect(pending)
+        pending = futures
+    if pending is not None:
+        yield await collect(pending)
 
 
 async def load_platinum_to_sqlite(repo: SQLiteRepository) -> int:
-    """Load platinum JSONs into SQLite."""
+    """
+    Load platinum JSONs into SQLite in batched transactions.
+
+    Parsing is fanned out across a process pool one batch ahead of the
+    inserts, so every core decodes JSON while this coroutine is the single
+    SQLite writer.
+    """
     logger.info("Loading platinum JSONs into SQLite...")
 
+    json_files = sorted(PLATINUM_DIR.glob("*.json"))
+    batches = [
+        json_files[i : i + LOAD_BATCH_SIZE] for i in range(0, len(json_files), LOAD_BATCH_SIZE)
+    ]
+
     count = 0
     fault_count = 0
-
-    for json_file in sorted(PLATINUM_DIR.glob("*.json")):
-        try:
-            with open(json_file) as f:
-                data = json.load(f)
-
-            metadata = data.get("metadata", {})
-            doc_props = metadata.get("document_properties", {})
-
-            # Insert document
-            doc_id = await repo.insert_document(
-                filename=metadata.get("filename", json_file.name),
-                content=data.get("full_text", "")[:50000],  # Limit content size
-                manufacturer=doc_props.get("manufacturer"),
-                model=doc_props.get("model"),
-                document_type=doc_props.get("document_type"),
-                filepath=str(json_file),
-                metadata=metadata,
-            )
-
-            count += 1
-
-            # Extract and insert fault codes from structured content
-            structured = data.get("structured_content", {})
-            for page in structured.get("pages", []):
-                for table in page.get("tables", []):
-                    # Look for fault code tables
-                    headers = [h.lower() for h in table.get("headers", [])]
-                    if any("fault" in h or "code" in h or "error" in h for h in headers):
-                        for row in table.get("rows", []):
-                            if row and len(row) >= 2:
-                                code = str(row[0]).strip()
-                                desc = str(row[1]).strip() if len(row) > 1 else ""
-                                if code and len(code) < 20:  # Reasonable code length
-                                    await repo.insert_fault_code(
-                                        code=code,
-                                        description=desc,
-                                        manufacturer=doc_props.get("manufacturer"),
-                                        document_id=doc_id,
-                                    )
-                                    fault_count += 1
-
-            if count % 100 == 0:
+    # FTS indexing is deferred to one rebuild when the load finishes
+    with ProcessPoolExecutor() as pool:
+        async with repo.bulk_load():
+            async for documents, fault_codes in parse_ahead(batches, pool):
+                fault_count += await flush_batch(repo, documents, fault_codes)
+                count += len(documents)
                 logger.info("  Processed %d documents...", count)
 
-        except Exception as e:
-            logger.warning("Failed to process %s: %s", json_file.name, e)
-
     logger.info("Loaded %d documents, %d fault codes", count, fault_count)
     return count
 
 
-async def build_faiss_index(repo: SQLiteRepository, index: FAISSIndex) -> int:
-    """Build FAISS index from documents."""
+async def build_faiss_index(
+    repo: SQLiteRepository,
+    index: FAISSIndex,
+    fp16: bool = False,
+    onnx: bool = False,
+) -> int:
+    """
+    Build FAISS index from documents.
+
+    With fp16 the model encodes in half precision on GPU. With onnx it runs
+    on ONNX Runtime; the exported model is kept under data/models so only
+    the first run pays for the export.
+    """
     logger.info("Building FAISS index (this may take a few minutes)...")
 
     try:
@@ -114,14 +231,20 @@ async def build_faiss_index(repo: SQLiteRepository, index: FAISSIndex) -> int:
         return 0
 
     settings = get_settings()
-    model = SentenceTransformer(settings.embedding_model)
+    if onnx:
+        onnx_dir = MODELS_DIR / f"{settings.embedding_model.replace('/', '--')}-onnx"
+        if onnx_dir.exists():
+            model = SentenceTransformer(str(onnx_dir), backend="onnx")
+        else:
+            model = SentenceTransformer(settings.embedding_model, backend="onnx")
+            model.save_pretrained(str(onnx_dir))
+    else:
+        model = SentenceTransformer(settings.embedding_model)
+        if fp16 and model.device.type == "cuda":
+            model.half()
 
-    # Get all documents
-    conn = await repo._get_connection()
-    cursor = await conn.execute(
-        "SELECT id, filename, manufacturer, content FROM documents WHERE content IS NOT NULL"
-    )
-    rows = await cursor.fetchall()
+    # Get all documents, truncated to the embedded prefix in SQL
+    rows = await repo.get_documents_for_embedding(max_chars=EMBED_CHARS)
 
     if not rows:
         logger.warning("No documents found in database")
@@ -129,37 +252,20 @@ async def build_faiss_index(repo: SQLiteRepository, index: FAISSIndex) -> int:
 
     logger.info("Generating embeddings for %d documents...", len(rows))
 
-    # Process in batches
-    batch_size = 32
-    all_embeddings = []
-    all_metadata = []
-
-    for i in range(0, len(rows), batch_size):
-        batch = rows[i:i + batch_size]
-
-        texts = []
-        metadata = []
-        for row in batch:
-            # Use first 1000 chars for embedding
-            text = (row["content"] or "")[:1000]
-            texts.append(text)
-            metadata.append({
-                "doc_id": row["id"],
-                "filename": row["filename"],
-                "manufacturer": row["manufacturer"],
-            })
-
-        # Generate embeddings
-        embeddings = model.encode(texts, show_progress_bar=False)
-        all_embeddings.append(embeddings)
-        all_metadata.extend(metadata)
-
-        if (i + batch_size) % 500 == 0:
-            logger.info("  Embedded %d/%d documents...", min(i + batch_size, len(rows)), len(rows))
-
-    # Combine and add to index
-    embeddings_array = np.vstack(all_embeddings)
-    await index.add_vectors(embeddings_array, all_metadata)
+    # Split the (id, content) tuples into columns; vectors are keyed by
+    # document ID, so search hits join straight back to SQLite
+    doc_ids, texts = map(list, zip(*rows))
+
+    # One encode call over the whole corpus: sentence-transformers sorts the
+    # texts by length before batching (so batches carry little padding) and
+    # returns embeddings in input order
+    embeddings = model.encode(
+        texts,
+        batch_size=EMBED_BATCH_SIZE,
+        convert_to_numpy=True,
+        show_progress_bar=True,
+    )
+    await index.add_vectors(embeddings, doc_ids)
 
     # Save index
     index_path = DATA_DIR / "indices" / "faiss"
@@ -170,13 +276,15 @@ async def build_faiss_index(repo: SQLiteRepository, index: FAISSIndex) -> int:
         index_path=index_path / "faiss_index.bin",
         model=settings.embedding_model,
         dim=settings.embedding_dimension,
-        doc_count=len(all_metadata),
+        doc_count=len(doc_ids),
         source="platinum_jsons",
+        index_type=index.index_type,
+        nprobe=index.nprobe if index.index_type in ("IVFFlat", "IVFPQ") else None,
     )
     manifest.save(index_path / "manifest.json")
 
-    logger.info("FAISS index built with %d vectors", len(all_metadata))
-    return len(all_metadata)
+    logger.info("FAISS index built with %d vectors", len(doc_ids))
+    return len(doc_ids)
 
 
 async def load_graph_data() -> tuple[int, int]:
@@ -187,31 +295,86 @@ async def load_graph_data() -> tuple[int, int]:
         logger.warning("Graph file not found: %s", GRAPH_FILE)
         return 0, 0
 
-    nodes = []
-    edges = []
-
-    with open(GRAPH_FILE) as f:
-        for line in f:
-            data = json.loads(line.strip())
-            if data.get("entity") == "node":
-                nodes.append(data)
-            elif data.get("entity") == "edge":
-                edges.append(data)
-
-    # Save as structured JSON for the knowledge domain
     graph_dir = DATA_DIR / "graph"
-    with open(graph_dir / "nodes.json", "w") as f:
-        json.dump(nodes, f)
-    with open(graph_dir / "edges.json", "w") as f:
-        json.dump(edges, f)
-
-    logger.info("Loaded %d nodes, %d edges", len(nodes), len(edges))
-    return len(nodes), len(edges)
+    nodes_file = graph_dir / "nodes.json"
+    edges_file = graph_dir / "edges.json"
+    manifest_file = graph_dir / "manifest.json"
+
+    # The split files are current if they were written from this exact JSONL
+    # (size and mtime recorded below); import_data rewrites the manifest
+    # without that record, so every import forces a re-split. mtimes alone
+    # can't tell, as import_data keeps the source file's mtime
+    graph_stat = GRAPH_FILE.stat()
+    split_source = {"size": graph_stat.st_size, "mtime_ns": graph_stat.st_mtime_ns}
+    manifest = orjson.loads(manifest_file.read_bytes()) if manifest_file.exists() else {}
+    if (
+        manifest.get("split_source") == split_source
+        and nodes_file.exists()
+        and edges_file.exists()
+    ):
+        logger.info("Graph data up to date: %d nodes, %d edges", manifest["nodes"], manifest["edges"])
+        return manifest["nodes"], manifest["edges"]
+
+    # Stream entities straight into nodes.json / edges.json (JSON arrays for
+    # the knowledge domain) without holding either list in memory
+    counts = {"node": 0, "edge": 0}
+
+    with (
+        open(GRAPH_FILE, "rb") as src,
+        open(nodes_file, "wb") as nodes_out,
+        open(edges_file, "wb") as edges_out,
+    ):
+        outputs = {"node": nodes_out, "edge": edges_out}
+        nodes_out.write(b"[")
+        edges_out.write(b"[")
+
+        for line in src:
+            entity = orjson.loads(line).get("entity")
+            out = outputs.get(entity)
+            if out is None:
+                continue
+            if counts[entity]:
+                out.write(b",")
+            out.write(line.strip())  # Already a JSON object; no re-encode
+            counts[entity] += 1
+
+        nodes_out.write(b"]")
+        edges_out.write(b"]")
+
+    manifest.update(nodes=counts["node"], edges=counts["edge"], split_source=split_source)
+    manifest_file.write_bytes(orjson.dumps(manifest, option=orjson.OPT_INDENT_2))
+
+    logger.info("Loaded %d nodes, %d edges", counts["node"], counts["edge"])
+    return counts["node"], counts["edge"]
+
+
+def ivf_nlist(vector_count: int) -> int:
+    """IVF cluster count for a corpus: ~4*sqrt(N), with enough vectors to train each cluster."""
+    return max(
+        1,
+        min(
+            IVFPQ_NLIST,
+            int(4 * math.sqrt(vector_count)),
+            vector_count // IVF_MIN_POINTS_PER_LIST,
+        ),
+    )
 
 
 async def main() -> int:
     parser = argparse.ArgumentParser(description="Build search indices from imported data")
     parser.add_argument("--skip-embeddings", action="store_true", help="Skip FAISS index building")
+    parser.add_argument(
+        "--fp16", action="store_true", help="Store float16 vectors (half the memory, near-exact scores)"
+    )
+    parser.add_argument("--no-gpu", action="store_true", help="Build the FAISS index on CPU only")
+    parser.add_argument(
+        "--onnx", action="store_true", help="Encode with ONNX Runtime (pip install 'liftlogic[onnx]')"
+    )
+    parser.add_argument(
+        "--index-type",
+        choices=["Flat", "SQfp16", "IVFPQ", "HNSW"],
+        help=f"FAISS index type (default: IVFPQ above {IVFPQ_MIN_VECTORS:,} documents, else Flat)",
+    )
     args = parser.parse_args()
 
     settings = get_settings()
@@ -231,9 +394,17 @@ async def main() -> int:
     # Build FAISS index
     vector_count = 0
     if not args.skip_embeddings:
+        index_type = args.index_type
+        if index_type is None:
+            if doc_count > IVFPQ_MIN_VECTORS:
+                index_type = "IVFPQ"
+            else:
+                index_type = "SQfp16" if args.fp16 else "Flat"  # Exhaustive search for small datasets
         index = FAISSIndex(
             dimension=settings.embedding_dimension,
-            index_type="Flat",  # Use Flat for small datasets
+            index_type=index_type,
+            nlist=ivf_nlist(doc_count),
+            use_gpu=not args.no_gpu,
         )
         await index.initialize()
 
@@ -242,8 +413,18 @@ async def main() -> int:
             logger.info("FAISS index already exists. Loading...")
             await index.load(index_path.parent)
             vector_count = index.size
+        elif doc_count < index.min_train_vectors:
+            # Fail before spending time on embeddings the index could not take
+            logger.error(
+                "%s needs at least %d documents to train, found %d; use --index-type Flat",
+                index_type,
+                index.min_train_vectors,
+                doc_count,
+            )
+            await repo.close()
+            return 1
         else:
-            vector_count = await build_faiss_index(repo, index)
+            vector_count = await build_faiss_index(repo, index, fp16=args.fp16, onnx=args.onnx)
 
     # Load graph
     node_count, edge_count = await load_graph_data()
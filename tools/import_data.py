@@ -14,13 +14,18 @@ Usage:
 from __future__ import annotations
 
 import argparse
-import json
+import filecmp
 import logging
+import mmap
+import re
 import shutil
 import sys
 from pathlib import Path
 from typing import Any
 
+import ijson
+import orjson
+
 logging.basicConfig(level=logging.INFO, format="%(levelname)s: %(message)s")
 logger = logging.getLogger(__name__)
 
@@ -28,6 +33,13 @@ logger = logging.getLogger(__name__)
 PROJECT_ROOT = Path(__file__).parent.parent
 DATA_DIR = PROJECT_ROOT / "data"
 
+# A flat (no nested objects) document_properties object, matched on raw bytes
+DOC_PROPS_RE = re.compile(rb'"document_properties"\s*:\s*(\{[^{}]*\})')
+
+# Entity kind of a graph JSONL record, counted on raw bytes
+ENTITY_RE = re.compile(rb'"entity"\s*:\s*"(node|edge)"')
+COPY_CHUNK_SIZE = 1 << 20
+
 
 def import_platinum_jsons(source_dir: Path) -> int:
     """
@@ -49,12 +61,16 @@ def import_platinum_jsons(source_dir: Path) -> int:
     dest = DATA_DIR / "processed" / "platinum"
     dest.mkdir(parents=True, exist_ok=True)
 
+    # Files whose size and mtime (kept by copy2) match are skipped without
+    # reading them; same-size files with other mtimes are compared byte by
+    # byte, and anything changed is re-copied
     count = 0
     for json_file in platinum_src.glob("*.json"):
         dest_file = dest / json_file.name
-        if not dest_file.exists():
-            shutil.copy2(json_file, dest_file)
-            count += 1
+        if dest_file.exists() and filecmp.cmp(json_file, dest_file, shallow=True):
+            continue
+        shutil.copy2(json_file, dest_file)
+        count += 1
 
     logger.info("Imported %d platinum JSONs to %s", count, dest)
     return count
@@ -78,21 +94,29 @@ def import_graph_data(graph_file: Path) -> dict[str, int]:
     dest = DATA_DIR / "graph"
     dest.mkdir(parents=True, exist_ok=True)
 
-    # Copy graph file
     dest_file = dest / "graph_production.jsonl"
-    shutil.copy2(graph_file, dest_file)
+    if dest_file.exists() and dest_file.samefile(graph_file):
+        raise shutil.SameFileError(f"{graph_file} is already the imported graph file")
 
-    # Count entities
+    # Copy the graph file and count entities in a single pass over 1 MiB
+    # chunks; records are one per line, so matching whole lines on raw bytes
+    # needs no JSON decoding
     nodes = 0
     edges = 0
 
-    with open(dest_file) as f:
-        for line in f:
-            data = json.loads(line.strip())
-            if data.get("entity") == "node":
-                nodes += 1
-            elif data.get("entity") == "edge":
-                edges += 1
+    with open(graph_file, "rb") as src, open(dest_file, "wb") as out:
+        tail = b""
+        for chunk in iter(lambda: src.read(COPY_CHUNK_SIZE), b""):
+            out.write(chunk)
+            lines, _, next_tail = (tail + chunk).rpartition(b"\n")
+            kinds = ENTITY_RE.findall(lines)
+            nodes += kinds.count(b"node")
+            edges += kinds.count(b"edge")
+            tail = next_tail
+        kinds = ENTITY_RE.findall(tail)
+        nodes += kinds.count(b"node")
+        edges += kinds.count(b"edge")
+    shutil.copystat(graph_file, dest_file)
 
     logger.info("Imported graph: %d nodes, %d edges", nodes, edges)
 
@@ -106,12 +130,31 @@ def import_graph_data(graph_file: Path) -> dict[str, int]:
     }
 
     manifest_file = dest / "manifest.json"
-    with open(manifest_file, "w") as f:
-        json.dump(manifest, f, indent=2)
+    manifest_file.write_bytes(orjson.dumps(manifest, option=orjson.OPT_INDENT_2))
 
     return {"nodes": nodes, "edges": edges}
 
 
+def read_document_properties(json_file: Path) -> dict[str, Any]:
+    """
+    Read ``metadata.document_properties`` from a platinum JSON.
+
+    The file is memory-mapped and scanned with a byte regex, so only the
+    small properties object is decoded. Files where it is missing or
+    nested fall back to streaming with ijson.
+    """
+    try:
+        with open(json_file, "rb") as f, mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ) as mm:
+            if match := DOC_PROPS_RE.search(mm):
+                doc_props: dict[str, Any] = orjson.loads(match.group(1))
+                return doc_props
+    except ValueError:  # Empty file or undecodable match
+        pass
+
+    with open(json_file, "rb") as f:
+        return next(ijson.items(f, "metadata.document_properties", use_float=True), {})
+
+
 def create_data_index(data_dir: Path) -> dict[str, Any]:
     """
     Create an index of all imported data.
@@ -134,27 +177,22 @@ def create_data_index(data_dir: Path) -> dict[str, Any]:
             index["platinum_jsons"] += 1
 
             try:
-                with open(json_file) as f:
-                    data = json.load(f)
-
-                meta = data.get("metadata", {})
-                doc_props = meta.get("document_properties", {})
+                doc_props = read_document_properties(json_file)
 
                 if manufacturer := doc_props.get("manufacturer"):
                     index["manufacturers"].add(manufacturer)
                 if doc_type := doc_props.get("document_type"):
                     index["document_types"].add(doc_type)
 
-            except (json.JSONDecodeError, KeyError):
+            except (ijson.JSONError, KeyError):
                 continue
 
     # Count graph data
     graph_manifest = data_dir / "graph" / "manifest.json"
     if graph_manifest.exists():
-        with open(graph_manifest) as f:
-            manifest = json.load(f)
-            index["graph_nodes"] = manifest.get("nodes", 0)
-            index["graph_edges"] = manifest.get("edges", 0)
+        manifest = orjson.loads(graph_manifest.read_bytes())
+        index["graph_nodes"] = manifest.get("nodes", 0)
+        index["graph_edges"] = manifest.get("edges", 0)
 
     # Convert sets to lists for JSON serialization
     index["manufacturers"] = sorted(index["manufacturers"])
@@ -162,8 +200,7 @@ def create_data_index(data_dir: Path) -> dict[str, Any]:
 
     # Save index
     index_file = data_dir / "index.json"
-    with open(index_file, "w") as f:
-        json.dump(index, f, indent=2)
+    index_file.write_bytes(orjson.dumps(index, option=orjson.OPT_INDENT_2))
 
     return index
 
@@ -0,0 +1,188 @@
+"""
+EVIH Migration File Copying
+
+Document and FAISS index copy phases for migrate_from_evih.py, with the
+kernel-assisted copy they share.
+"""
+
+from __future__ import annotations
+
+import logging
+import os
+import shutil
+import time
+from concurrent.futures import ThreadPoolExecutor
+from pathlib import Path
+
+logger = logging.getLogger(__name__)
+
+
+def fast_copy(src: Path, dst: Path) -> None:
+    """
+    Copy a file with its metadata, letting the kernel move the data.
+
+    os.copy_file_range copies without a userspace buffer and reflinks on
+    btrfs/XFS; where it is unavailable or refused (other platforms, some
+    cross-filesystem copies) this falls back to shutil.copy2.
+
+    Raises:
+        shutil.SameFileError: If dst is src or a hardlink to it (opening dst
+            for writing would truncate the source), as shutil.copy2 does
+    """
+    try:
+        if os.path.samefile(src, dst):
+            raise shutil.SameFileError(f"{src} and {dst} are the same file")
+    except FileNotFoundError:
+        pass  # dst doesn't exist yet
+    if hasattr(os, "copy_file_range"):
+        try:
+            with open(src, "rb") as fsrc, open(dst, "wb") as fdst:
+                remaining = os.fstat(fsrc.fileno()).st_size
+                while remaining > 0:
+                    copied = os.copy_file_range(fsrc.fileno(), fdst.fileno(), remaining)
+                    if copied == 0:
+                        break
+                    remaining -= copied
+            shutil.copystat(src, dst)
+            return
+        except OSError:
+            pass  # EXDEV, ENOSYS, ...: use the regular copy below
+    shutil.copy2(src, dst)
+
+
+def is_same_file(src: Path, dst: Path) -> bool:
+    """
+    Check whether dst is src itself (a hardlink) or a same-size, same-mtime copy.
+
+    fast_copy() preserves mtime, so files copied by an earlier run match.
+    """
+    try:
+        dst_stat = dst.stat()
+    except FileNotFoundError:
+        return False
+    src_stat = src.stat()
+    if (src_stat.st_dev, src_stat.st_ino) == (dst_stat.st_dev, dst_stat.st_ino):
+        return True
+    return (
+        src_stat.st_size == dst_stat.st_size
+        and int(src_stat.st_mtime) == int(dst_stat.st_mtime)
+    )
+
+
+def migrate_faiss_index(source_dir: Path, dest_dir: Path, force: bool = False) -> bool:
+    """
+    Migrate FAISS index files.
+
+    Args:
+        source_dir: Source directory containing FAISS index
+        dest_dir: Destination directory
+        force: Copy even files that look unchanged since a previous run
+
+    Returns:
+        True if successful
+    """
+    faiss_files = list(source_dir.glob("*.faiss")) + list(source_dir.glob("*.index"))
+
+    if not faiss_files:
+        logger.info("No FAISS index files found in %s", source_dir)
+        return False
+
+    dest_dir.mkdir(parents=True, exist_ok=True)
+
+    for faiss_file in faiss_files:
+        dest_path = dest_dir / faiss_file.name
+        # Indexes can be many GB; skip the ones an earlier run already copied
+        if not force and is_same_file(faiss_file, dest_path):
+            logger.debug("FAISS index unchanged, skipping: %s", faiss_file)
+            continue
+        logger.info("Copying FAISS index: %s -> %s", faiss_file, dest_path)
+        try:
+            fast_copy(faiss_file, dest_path)
+        except shutil.SameFileError:
+            # --force with a destination that overlaps the source
+            logger.warning("FAISS index is already at destination, skipping: %s", dest_path)
+
+    return True
+
+
+def migrate_faiss_indexes(index_dirs: list[Path], dest_dir: Path, force: bool = False) -> bool:
+    """
+    Migrate FAISS index files from the first directory that has any.
+
+    Returns:
+        True if an index directory was found
+    """
+    return any(migrate_faiss_index(index_dir, dest_dir, force) for index_dir in index_dirs)
+
+
+def migrate_documents(source_dir: Path, dest_dir: Path, hardlink: bool = False) -> int:
+    """
+    Migrate PDF documents and extractions.
+
+    Args:
+        source_dir: Source documents directory
+        dest_dir: Destination documents directory
+        hardlink: Hardlink files instead of copying them when both
+            directories are on the same filesystem
+
+    Returns:
+        Number of files migrated
+    """
+    if not source_dir.exists():
+        logger.warning("Source documents directory not found: %s", source_dir)
+        return 0
+
+    # Collect (source, destination) pairs first in one walk of the source
+    # tree, dispatching on extension; the first file with a given name wins
+    # and existing destinations are left alone, as before
+    target_dirs = {"pdf": dest_dir, "json": dest_dir / "extractions"}
+    # Names already present (or claimed), listed once per destination
+    # directory instead of a stat per candidate file
+    taken = {
+        target_dir: set(os.listdir(target_dir)) if target_dir.is_dir() else set()
+        for target_dir in target_dirs.values()
+    }
+    pairs: dict[Path, Path] = {}
+    for root, _, names in os.walk(source_dir):
+        for name in names:
+            target_dir = target_dirs.get(name.rpartition(".")[2].lower())
+            if target_dir is None or name in taken[target_dir]:
+                continue
+            taken[target_dir].add(name)
+            pairs[target_dir / name] = Path(root, name)
+
+    for parent in {dest_path.parent for dest_path in pairs} | {dest_dir}:
+        parent.mkdir(parents=True, exist_ok=True)
+
+    # Links take no I/O and no extra disk, but only work within one filesystem
+    link = hardlink and source_dir.stat().st_dev == dest_dir.stat().st_dev
+
+    def copy(item: tuple[Path, Path]) -> None:
+        dest_path, src_file = item
+        if link:
+            try:
+                os.link(src_file, dest_path)
+                logger.debug("Linked %s", src_file.name)
+                return
+            except OSError:
+                pass  # EXDEV from a nested mount, or no link support: copy
+        logger.debug("Copying %s", src_file.name)
+        try:
+            fast_copy(src_file, dest_path)
+        except shutil.SameFileError:
+            logger.debug("Already at destination, skipping: %s", dest_path)
+
+    # Copies spend most of their time in open/stat/write syscalls, which
+    # release the GIL, so threads overlap the per-file latency
+    with ThreadPoolExecutor(max_workers=min(32, (os.cpu_count() or 1) * 4)) as pool:
+        # Progress at most once a second rather than a log line per file
+        last_log = time.monotonic()
+        for done, _ in enumerate(pool.map(copy, pairs.items()), 1):
+            if time.monotonic() - last_log >= 1.0:
+                logger.info("Migrated %d/%d document files", done, len(pairs))
+                last_log = time.monotonic()
+    files_migrated = len(pairs)
+
+    logger.info("Migrated %d document files", files_migrated)
+    return files_migrated
+
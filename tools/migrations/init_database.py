@@ -23,9 +23,13 @@ logger = logging.getLogger(__name__)
 
 SCHEMA = """
 -- ================================================================
--- LiftLogic Database Schema v2.0
+-- LiftLogic Database Schema v2.1
 -- ================================================================
 
+-- Tables are STRICT: values are stored exactly as declared rather than
+-- coerced by type affinity. JSON and timestamp columns are TEXT (JSON
+-- functions and CURRENT_TIMESTAMP both work on TEXT); booleans are INTEGER.
+
 -- Documents: Stores uploaded PDF documents
 CREATE TABLE IF NOT EXISTS documents (
     id INTEGER PRIMARY KEY AUTOINCREMENT,
@@ -37,10 +41,10 @@ CREATE TABLE IF NOT EXISTS documents (
     doc_type TEXT,
     page_count INTEGER DEFAULT 0,
     extraction_status TEXT DEFAULT 'pending',
-    metadata JSON,
-    created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
-    updated_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP
-);
+    metadata TEXT,
+    created_at TEXT DEFAULT CURRENT_TIMESTAMP,
+    updated_at TEXT DEFAULT CURRENT_TIMESTAMP
+) STRICT;
 
 -- Chunks: Text chunks for RAG retrieval
 CREATE TABLE IF NOT EXISTS chunks (
@@ -51,10 +55,10 @@ CREATE TABLE IF NOT EXISTS chunks (
     chunk_index INTEGER,
     embedding_id INTEGER,
     token_count INTEGER,
-    metadata JSON,
-    created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
+    metadata TEXT,
+    created_at TEXT DEFAULT CURRENT_TIMESTAMP,
     UNIQUE(document_id, page_number, chunk_index)
-);
+) STRICT;
 
 -- Components: Extracted electrical/mechanical components
 CREATE TABLE IF NOT EXISTS components (
@@ -63,12 +67,12 @@ CREATE TABLE IF NOT EXISTS components (
     component_id TEXT NOT NULL,
     name TEXT NOT NULL,
     component_type TEXT,
-    specs JSON,
+    specs TEXT,
     description TEXT,
-    metadata JSON,
-    created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
+    metadata TEXT,
+    created_at TEXT DEFAULT CURRENT_TIMESTAMP,
     UNIQUE(document_id, component_id)
-);
+) STRICT;
 
 -- Connections: Component relationships
 CREATE TABLE IF NOT EXISTS connections (
@@ -78,10 +82,10 @@ CREATE TABLE IF NOT EXISTS connections (
     target_component TEXT NOT NULL,
     connection_type TEXT,
     label TEXT,
-    wire_info JSON,
-    metadata JSON,
-    created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP
-);
+    wire_info TEXT,
+    metadata TEXT,
+    created_at TEXT DEFAULT CURRENT_TIMESTAMP
+) STRICT;
 
 -- Fault Codes: Error/fault code definitions
 CREATE TABLE IF NOT EXISTS fault_codes (
@@ -90,12 +94,12 @@ CREATE TABLE IF NOT EXISTS fault_codes (
     code TEXT NOT NULL,
     description TEXT,
     severity TEXT,
-    causes JSON,
-    remedies JSON,
-    related_components JSON,
-    metadata JSON,
-    created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP
-);
+    causes TEXT,
+    remedies TEXT,
+    related_components TEXT,
+    metadata TEXT,
+    created_at TEXT DEFAULT CURRENT_TIMESTAMP
+) STRICT;
 
 -- Safety Items: Extracted safety warnings and procedures
 CREATE TABLE IF NOT EXISTS safety_items (
@@ -106,31 +110,30 @@ CREATE TABLE IF NOT EXISTS safety_items (
     severity TEXT,
     category TEXT,
     page_number INTEGER,
-    metadata JSON,
-    created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP
-);
+    metadata TEXT,
+    created_at TEXT DEFAULT CURRENT_TIMESTAMP
+) STRICT;
 
 -- Query Cache: Cache for expensive LLM queries
+-- Keyed by cache_key WITHOUT ROWID, so a lookup is a single b-tree probe
 CREATE TABLE IF NOT EXISTS query_cache (
-    id INTEGER PRIMARY KEY AUTOINCREMENT,
-    cache_key TEXT UNIQUE NOT NULL,
+    cache_key TEXT PRIMARY KEY NOT NULL,
     query TEXT NOT NULL,
-    response JSON NOT NULL,
+    response TEXT NOT NULL,
     query_type TEXT,
     hit_count INTEGER DEFAULT 0,
-    created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
-    expires_at TIMESTAMP
-);
+    created_at TEXT DEFAULT CURRENT_TIMESTAMP,
+    expires_at TEXT
+) WITHOUT ROWID, STRICT;
 
 -- User Sessions: Track user interactions
 CREATE TABLE IF NOT EXISTS sessions (
-    id INTEGER PRIMARY KEY AUTOINCREMENT,
-    session_id TEXT UNIQUE NOT NULL,
+    session_id TEXT PRIMARY KEY NOT NULL,
     user_id TEXT,
-    started_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
-    last_active TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
-    metadata JSON
-);
+    started_at TEXT DEFAULT CURRENT_TIMESTAMP,
+    last_active TEXT DEFAULT CURRENT_TIMESTAMP,
+    metadata TEXT
+) WITHOUT ROWID, STRICT;
 
 -- Query History: Log of queries for analytics
 CREATE TABLE IF NOT EXISTS query_history (
@@ -139,9 +142,9 @@ CREATE TABLE IF NOT EXISTS query_history (
     query TEXT NOT NULL,
     query_type TEXT,
     response_time_ms INTEGER,
-    success BOOLEAN,
-    created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP
-);
+    success INTEGER,
+    created_at TEXT DEFAULT CURRENT_TIMESTAMP
+) STRICT;
 
 -- ================================================================
 -- Full-Text Search (FTS5)
@@ -200,9 +203,12 @@ END;
 -- Indexes
 -- ================================================================
 
+-- Lookups by document_id (and page) use the UNIQUE(document_id, page_number,
+-- chunk_index) index on chunks; query_cache and sessions are keyed by their
+-- primary keys
+
 CREATE INDEX IF NOT EXISTS idx_documents_hash ON documents(file_hash);
 CREATE INDEX IF NOT EXISTS idx_documents_manufacturer ON documents(manufacturer);
-CREATE INDEX IF NOT EXISTS idx_chunks_document ON chunks(document_id);
 CREATE INDEX IF NOT EXISTS idx_chunks_embedding ON chunks(embedding_id);
 CREATE INDEX IF NOT EXISTS idx_components_document ON components(document_id);
 CREATE INDEX IF NOT EXISTS idx_components_type ON components(component_type);
@@ -210,9 +216,7 @@ CREATE INDEX IF NOT EXISTS idx_connections_source ON connections(source_componen
 CREATE INDEX IF NOT EXISTS idx_connections_target ON connections(target_component);
 CREATE INDEX IF NOT EXISTS idx_fault_codes_code ON fault_codes(code);
 CREATE INDEX IF NOT EXISTS idx_fault_codes_severity ON fault_codes(severity);
-CREATE INDEX IF NOT EXISTS idx_query_cache_key ON query_cache(cache_key);
 CREATE INDEX IF NOT EXISTS idx_query_cache_expires ON query_cache(expires_at);
-CREATE INDEX IF NOT EXISTS idx_sessions_id ON sessions(session_id);
 CREATE INDEX IF NOT EXISTS idx_query_history_session ON query_history(session_id);
 CREATE INDEX IF NOT EXISTS idx_query_history_created ON query_history(created_at);
 """
@@ -227,6 +231,12 @@ def init_database(db_path: Path) -> None:
     conn = sqlite3.connect(db_path)
 
     try:
+        # Persistent settings, so they must precede the first table: larger
+        # pages suit long document/chunk text, and WAL keeps readers
+        # unblocked during bulk loads. Per-connection pragmas (cache, sync)
+        # are set by whoever opens the database to load it.
+        conn.execute("PRAGMA page_size=8192")
+        conn.execute("PRAGMA journal_mode=WAL")
         conn.executescript(SCHEMA)
         conn.commit()
         logger.info("Database schema created successfully")
@@ -17,12 +17,14 @@ This script:
 from __future__ import annotations
 
 import argparse
-import json
 import logging
-import shutil
+import os
 import sqlite3
-from pathlib import Path
+from concurrent.futures import ProcessPoolExecutor
 from datetime import datetime
+from pathlib import Path
+
+from copy_files import migrate_documents, migrate_faiss_indexes
 
 logging.basicConfig(
     level=logging.INFO,
@@ -30,6 +32,142 @@ logging.basicConfig(
 )
 logger = logging.getLogger(__name__)
 
+# Legacy EVIH table names, in order of preference
+DOCUMENT_TABLES = ("documents", "pdf_documents", "manuals")
+CHUNK_TABLES = ("chunks", "text_chunks", "embeddings")
+
+# Destination column order -> (legacy source columns in order of preference, fallback);
+# documents also take created_at, which falls back to the migration time
+DOCUMENT_FIELDS = (
+    (("title", "name"), "Unknown"),
+    (("file_path", "path"), None),
+    (("manufacturer",), None),
+    (("doc_type", "type"), None),
+)
+CHUNK_FIELDS = (
+    (("document_id", "doc_id"), 1),
+    (("content", "text"), ""),
+    (("page_number", "page"), None),
+    (("chunk_index", "index"), 0),
+)
+
+# Insert heads; build_select() supplies the SELECT that feeds them
+INSERT_DOCUMENTS_SQL = "INSERT INTO documents (title, file_path, manufacturer, doc_type, created_at) "
+INSERT_CHUNKS_SQL = "INSERT INTO chunks (document_id, content, page_number, chunk_index) "
+
+# Destination schema, split so the bulk load pays no index or FTS upkeep per row
+SCHEMA_TABLES = """
+    -- Documents table
+    CREATE TABLE IF NOT EXISTS documents (
+        id INTEGER PRIMARY KEY AUTOINCREMENT,
+        title TEXT NOT NULL,
+        file_path TEXT,
+        file_hash TEXT,
+        manufacturer TEXT,
+        model TEXT,
+        doc_type TEXT,
+        page_count INTEGER DEFAULT 0,
+        created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
+        updated_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP
+    );
+
+    -- Chunks table (for RAG)
+    CREATE TABLE IF NOT EXISTS chunks (
+        id INTEGER PRIMARY KEY AUTOINCREMENT,
+        document_id INTEGER REFERENCES documents(id),
+        content TEXT NOT NULL,
+        page_number INTEGER,
+        chunk_index INTEGER,
+        embedding_id INTEGER,
+        created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP
+    );
+
+    -- Components table
+    CREATE TABLE IF NOT EXISTS components (
+        id INTEGER PRIMARY KEY AUTOINCREMENT,
+        document_id INTEGER REFERENCES documents(id),
+        component_id TEXT,
+        name TEXT NOT NULL,
+        component_type TEXT,
+        specs JSON,
+        created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP
+    );
+
+    -- Fault codes table
+    CREATE TABLE IF NOT EXISTS fault_codes (
+        id INTEGER PRIMARY KEY AUTOINCREMENT,
+        document_id INTEGER REFERENCES documents(id),
+        code TEXT NOT NULL,
+        description TEXT,
+        severity TEXT,
+        causes JSON,
+        remedies JSON,
+        created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP
+    );
+
+    -- Connections table
+    CREATE TABLE IF NOT EXISTS connections (
+        id INTEGER PRIMARY KEY AUTOINCREMENT,
+        document_id INTEGER REFERENCES documents(id),
+        source_component TEXT,
+        target_component TEXT,
+        connection_type TEXT,
+        label TEXT,
+        created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP
+    );
+"""
+
+SCHEMA_INDEXES_FTS = """
+    -- Create FTS5 virtual table
+    CREATE VIRTUAL TABLE IF NOT EXISTS chunks_fts USING fts5(
+        content,
+        content='chunks',
+        content_rowid='id'
+    );
+
+    -- Triggers for FTS sync
+    CREATE TRIGGER IF NOT EXISTS chunks_ai AFTER INSERT ON chunks BEGIN
+        INSERT INTO chunks_fts(rowid, content) VALUES (new.id, new.content);
+    END;
+
+    -- Indexes
+    CREATE INDEX IF NOT EXISTS idx_chunks_document ON chunks(document_id);
+    CREATE INDEX IF NOT EXISTS idx_components_document ON components(document_id);
+    CREATE INDEX IF NOT EXISTS idx_fault_codes_code ON fault_codes(code);
+
+    -- Index rows already loaded in one pass rather than per-insert trigger writes
+    INSERT INTO chunks_fts(chunks_fts) VALUES('rebuild');
+"""
+
+
+def build_select(conn: sqlite3.Connection, table: str, fields: tuple) -> tuple[str, list]:
+    """
+    Build a SELECT over the attached source returning rows in destination column order.
+
+    Source columns are detected once via table_info; alternative names are
+    merged with COALESCE and missing columns select the fallback instead.
+
+    Returns:
+        (sql, params) for the SELECT
+    """
+    present = {
+        name for (name,) in conn.execute("SELECT name FROM pragma_table_info(?, 'src')", (table,))
+    }
+    exprs = []
+    params = []
+    for candidates, fallback in fields:
+        terms = [f'"{col}"' for col in candidates if col in present]
+        if fallback is not None:
+            terms.append("?")
+            params.append(fallback)
+        if not terms:
+            exprs.append("NULL")
+        elif len(terms) == 1:
+            exprs.append(terms[0])
+        else:
+            exprs.append(f"COALESCE({', '.join(terms)})")
+    return f"SELECT {', '.join(exprs)} FROM src.{table}", params
+
 
 def migrate_database(source_db: Path, dest_db: Path) -> int:
     """
@@ -48,217 +186,83 @@ def migrate_database(source_db: Path, dest_db: Path) -> int:
 
     logger.info("Migrating database from %s", source_db)
 
-    # Connect to source
-    src_conn = sqlite3.connect(source_db)
-    src_conn.row_factory = sqlite3.Row
-
     # Create destination
     dest_db.parent.mkdir(parents=True, exist_ok=True)
-    dest_conn = sqlite3.connect(dest_db)
-
-    # Create new schema
-    dest_conn.executescript("""
-        -- Documents table
-        CREATE TABLE IF NOT EXISTS documents (
-            id INTEGER PRIMARY KEY AUTOINCREMENT,
-            title TEXT NOT NULL,
-            file_path TEXT,
-            file_hash TEXT,
-            manufacturer TEXT,
-            model TEXT,
-            doc_type TEXT,
-            page_count INTEGER DEFAULT 0,
-            created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
-            updated_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP
-        );
-
-        -- Chunks table (for RAG)
-        CREATE TABLE IF NOT EXISTS chunks (
-            id INTEGER PRIMARY KEY AUTOINCREMENT,
-            document_id INTEGER REFERENCES documents(id),
-            content TEXT NOT NULL,
-            page_number INTEGER,
-            chunk_index INTEGER,
-            embedding_id INTEGER,
-            created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP
-        );
-
-        -- Components table
-        CREATE TABLE IF NOT EXISTS components (
-            id INTEGER PRIMARY KEY AUTOINCREMENT,
-            document_id INTEGER REFERENCES documents(id),
-            component_id TEXT,
-            name TEXT NOT NULL,
-            component_type TEXT,
-            specs JSON,
-            created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP
-        );
-
-        -- Fault codes table
-        CREATE TABLE IF NOT EXISTS fault_codes (
-            id INTEGER PRIMARY KEY AUTOINCREMENT,
-            document_id INTEGER REFERENCES documents(id),
-            code TEXT NOT NULL,
-            description TEXT,
-            severity TEXT,
-            causes JSON,
-            remedies JSON,
-            created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP
-        );
-
-        -- Connections table
-        CREATE TABLE IF NOT EXISTS connections (
-            id INTEGER PRIMARY KEY AUTOINCREMENT,
-            document_id INTEGER REFERENCES documents(id),
-            source_component TEXT,
-            target_component TEXT,
-            connection_type TEXT,
-            label TEXT,
-            created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP
-        );
-
-        -- Create FTS5 virtual table
-        CREATE VIRTUAL TABLE IF NOT EXISTS chunks_fts USING fts5(
-            content,
-            content='chunks',
-            content_rowid='id'
-        );
-
-        -- Triggers for FTS sync
-        CREATE TRIGGER IF NOT EXISTS chunks_ai AFTER INSERT ON chunks BEGIN
-            INSERT INTO chunks_fts(rowid, content) VALUES (new.id, new.content);
-        END;
-
-        -- Indexes
-        CREATE INDEX IF NOT EXISTS idx_chunks_document ON chunks(document_id);
-        CREATE INDEX IF NOT EXISTS idx_components_document ON components(document_id);
-        CREATE INDEX IF NOT EXISTS idx_fault_codes_code ON fault_codes(code);
-    """)
+    # Autocommit mode: the only transaction is the explicit BEGIN IMMEDIATE
+    # below, with no implicit BEGINs from the sqlite3 module around it
+    dest_conn = sqlite3.connect(dest_db, isolation_level=None)
 
-    records_migrated = 0
+    # Bulk-write settings: the migration is the only writer, and the single
+    # transaction below makes it all-or-nothing anyway
+    dest_conn.execute("PRAGMA journal_mode=WAL")
+    dest_conn.execute("PRAGMA synchronous=NORMAL")
+    dest_conn.execute("PRAGMA temp_store=MEMORY")
+    dest_conn.execute("PRAGMA cache_size=-200000")
+    dest_conn.execute("PRAGMA locking_mode=EXCLUSIVE")
 
-    # Migrate documents
-    try:
-        # Try different possible table names from old schema
-        for table_name in ["documents", "pdf_documents", "manuals"]:
-            try:
-                rows = src_conn.execute(f"SELECT * FROM {table_name}").fetchall()
-                if rows:
-                    logger.info("Found %d documents in %s", len(rows), table_name)
-                    for row in rows:
-                        dest_conn.execute("""
-                            INSERT INTO documents (title, file_path, manufacturer, doc_type, created_at)
-                            VALUES (?, ?, ?, ?, ?)
-                        """, (
-                            row.get("title") or row.get("name") or "Unknown",
-                            row.get("file_path") or row.get("path"),
-                            row.get("manufacturer"),
-                            row.get("doc_type") or row.get("type"),
-                            row.get("created_at") or datetime.now().isoformat(),
-                        ))
-                        records_migrated += 1
-                    break
-            except sqlite3.OperationalError:
-                continue
-    except Exception as e:
-        logger.warning("Could not migrate documents: %s", e)
+    # Base tables only; indexes, FTS and its trigger are created after the load
+    dest_conn.executescript(SCHEMA_TABLES)
 
-    # Migrate chunks/embeddings
-    try:
-        for table_name in ["chunks", "text_chunks", "embeddings"]:
-            try:
-                rows = src_conn.execute(f"SELECT * FROM {table_name}").fetchall()
-                if rows:
-                    logger.info("Found %d chunks in %s", len(rows), table_name)
-                    for row in rows:
-                        dest_conn.execute("""
-                            INSERT INTO chunks (document_id, content, page_number, chunk_index)
-                            VALUES (?, ?, ?, ?)
-                        """, (
-                            row.get("document_id") or row.get("doc_id") or 1,
-                            row.get("content") or row.get("text") or "",
-                            row.get("page_number") or row.get("page"),
-                            row.get("chunk_index") or row.get("index") or 0,
-                        ))
-                        records_migrated += 1
+    # Attach the source so rows are copied by INSERT ... SELECT inside SQLite,
+    # with no per-row round trip through Python
+    dest_conn.execute("ATTACH DATABASE ? AS src", (str(source_db),))
+
+    records_migrated = 0
+    document_fields = DOCUMENT_FIELDS + ((("created_at",), datetime.now().isoformat()),)
+
+    # Look the legacy tables up once rather than probing for each name
+    existing = {
+        name for (name,) in dest_conn.execute("SELECT name FROM src.sqlite_master WHERE type='table'")
+    }
+
+    # Both tables are written in one transaction (one commit, one sync);
+    # the connection context manager commits it, or rolls back on error
+    with dest_conn:
+        dest_conn.execute("BEGIN IMMEDIATE")
+
+        # Migrate documents
+        try:
+            # Use the first legacy table that has rows
+            for table_name in [t for t in DOCUMENT_TABLES if t in existing]:
+                select, params = build_select(dest_conn, table_name, document_fields)
+                migrated = dest_conn.execute(INSERT_DOCUMENTS_SQL + select, params).rowcount
+                if migrated:
+                    logger.info("Migrated %d documents from %s", migrated, table_name)
+                    records_migrated += migrated
                     break
-            except sqlite3.OperationalError:
-                continue
-    except Exception as e:
-        logger.warning("Could not migrate chunks: %s", e)
+        except Exception as e:
+            logger.warning("Could not migrate documents: %s", e)
+
+        # Migrate chunks/embeddings
+        try:
+            for table_name in [t for t in CHUNK_TABLES if t in existing]:
+                select, params = build_select(dest_conn, table_name, CHUNK_FIELDS)
+                migrated = dest_conn.execute(INSERT_CHUNKS_SQL + select, params).rowcount
+                if migrated:
+                    logger.info("Migrated %d chunks from %s", migrated, table_name)
+                    records_migrated += migrated
+                    break
+        except Exception as e:
+            logger.warning("Could not migrate chunks: %s", e)
+
+    dest_conn.execute("DETACH DATABASE src")
+
+    # Indexes, FTS table and trigger once the data is in (executescript
+    # runs outside the transaction above, which is already committed)
+    dest_conn.executescript(SCHEMA_INDEXES_FTS)
 
-    dest_conn.commit()
-    src_conn.close()
     dest_conn.close()
 
     logger.info("Migrated %d total records", records_migrated)
     return records_migrated
 
 
-def migrate_faiss_index(source_dir: Path, dest_dir: Path) -> bool:
-    """
-    Migrate FAISS index files.
-
-    Args:
-        source_dir: Source directory containing FAISS index
-        dest_dir: Destination directory
-
-    Returns:
-        True if successful
-    """
-    faiss_files = list(source_dir.glob("*.faiss")) + list(source_dir.glob("*.index"))
-
-    if not faiss_files:
-        logger.info("No FAISS index files found in %s", source_dir)
-        return False
-
-    dest_dir.mkdir(parents=True, exist_ok=True)
-
-    for faiss_file in faiss_files:
-        dest_path = dest_dir / faiss_file.name
-        logger.info("Copying FAISS index: %s -> %s", faiss_file, dest_path)
-        shutil.copy2(faiss_file, dest_path)
-
-    return True
-
-
-def migrate_documents(source_dir: Path, dest_dir: Path) -> int:
-    """
-    Migrate PDF documents and extractions.
-
-    Args:
-        source_dir: Source documents directory
-        dest_dir: Destination documents directory
-
-    Returns:
-        Number of files migrated
-    """
-    if not source_dir.exists():
-        logger.warning("Source documents directory not found: %s", source_dir)
-        return 0
-
-    dest_dir.mkdir(parents=True, exist_ok=True)
-    files_migrated = 0
-
-    # Copy PDFs
-    for pdf_file in source_dir.rglob("*.pdf"):
-        dest_path = dest_dir / pdf_file.name
-        if not dest_path.exists():
-            logger.info("Copying PDF: %s", pdf_file.name)
-            shutil.copy2(pdf_file, dest_path)
-            files_migrated += 1
-
-    # Copy JSON extractions
-    for json_file in source_dir.rglob("*.json"):
-        dest_path = dest_dir / "extractions" / json_file.name
-        dest_path.parent.mkdir(parents=True, exist_ok=True)
-        if not dest_path.exists():
-            logger.info("Copying extraction: %s", json_file.name)
-            shutil.copy2(json_file, dest_path)
-            files_migrated += 1
-
-    logger.info("Migrated %d document files", files_migrated)
-    return files_migrated
+def list_names(path: Path) -> set[str]:
+    """Names in a directory, or an empty set if it cannot be listed."""
+    try:
+        return set(os.listdir(path))
+    except OSError:
+        return set()
 
 
 def create_symlink(source: Path, dest: Path) -> bool:
@@ -272,19 +276,22 @@ def create_symlink(source: Path, dest: Path) -> bool:
     Returns:
         True if successful
     """
-    if dest.exists():
-        if dest.is_symlink():
-            dest.unlink()
-        else:
-            logger.warning("Destination exists and is not a symlink: %s", dest)
-            return False
+    if dest.exists() and not dest.is_symlink():
+        logger.warning("Destination exists and is not a symlink: %s", dest)
+        return False
 
+    # Build the link under a temporary name and rename it over dest, so an
+    # existing symlink is swapped atomically and dest is never missing
+    tmp = dest.with_name(f".{dest.name}.tmp.{os.getpid()}")
     try:
         dest.parent.mkdir(parents=True, exist_ok=True)
-        dest.symlink_to(source)
+        tmp.unlink(missing_ok=True)
+        os.symlink(source, tmp)
+        os.replace(tmp, dest)
         logger.info("Created symlink: %s -> %s", dest, source)
         return True
     except Exception as e:
+        tmp.unlink(missing_ok=True)
         logger.error("Failed to create symlink: %s", e)
         return False
 
@@ -308,7 +315,23 @@ def main():
     parser.add_argument(
         "--symlink",
         action="store_true",
-        help="Create symlink instead of copying data",
+        help="Create symlink instead of copying data (falls back to per-file migration)",
+    )
+    parser.add_argument(
+        "--hardlink",
+        action="store_true",
+        help="Hardlink document files instead of copying them when on the same filesystem",
+    )
+    parser.add_argument(
+        "--force",
+        action="store_true",
+        help="Copy FAISS index files even if they look unchanged",
+    )
+    parser.add_argument(
+        "--jobs",
+        type=int,
+        default=1,
+        help="Run the database, document and FAISS phases in up to this many processes",
     )
     parser.add_argument(
         "--dry-run",
@@ -323,50 +346,62 @@ def main():
     if args.dry_run:
         logger.info("DRY RUN - no changes will be made")
 
-    # Find source paths
+    # Find source paths from one listing per directory rather than a stat
+    # per candidate name (each is a round trip on network mounts)
+    source_names = list_names(args.source)
     source_data = args.source / "data"
-    if not source_data.exists():
+    if "data" not in source_names:
         # Try alternative locations
         for alt in ["uploads", "documents", "pdfs"]:
-            alt_path = args.source / alt
-            if alt_path.exists():
-                source_data = alt_path
+            if alt in source_names:
+                source_data = args.source / alt
                 break
 
-    # Find database
+    # Find database, preferring the project root over the data directory
+    data_names = list_names(source_data)
     source_db = None
     for db_name in ["liftlogic.db", "evih.db", "database.db", "app.db"]:
-        db_path = args.source / db_name
-        if db_path.exists():
-            source_db = db_path
+        if db_name in source_names:
+            source_db = args.source / db_name
             break
-        # Check in data directory
-        db_path = source_data / db_name
-        if db_path.exists():
-            source_db = db_path
+        if db_name in data_names:
+            source_db = source_data / db_name
             break
 
     if not args.dry_run:
         # Create destination structure
         args.dest.mkdir(parents=True, exist_ok=True)
 
-        if args.symlink and source_data.exists():
-            # Symlink data directory
-            create_symlink(source_data, args.dest / "documents")
-        else:
-            # Copy documents
-            migrate_documents(source_data, args.dest / "documents")
+        # The phases write disjoint destinations: (function, *args) each
+        phases: list[tuple] = []
+
+        # Symlink data directory, or else copy (or hardlink) documents file by file
+        if not (
+            args.symlink
+            and source_data.exists()
+            and create_symlink(source_data, args.dest / "documents")
+        ):
+            phases.append((migrate_documents, source_data, args.dest / "documents", args.hardlink))
 
         # Migrate database
         if source_db:
-            migrate_database(source_db, args.dest / "liftlogic.db")
+            phases.append((migrate_database, source_db, args.dest / "liftlogic.db"))
         else:
             logger.warning("No source database found")
 
         # Migrate FAISS index
-        for index_dir in [source_data, args.source / "indexes", args.source / "faiss"]:
-            if migrate_faiss_index(index_dir, args.dest / "indexes"):
-                break
+        index_dirs = [source_data, args.source / "indexes", args.source / "faiss"]
+        phases.append((migrate_faiss_indexes, index_dirs, args.dest / "indexes", args.force))
+
+        if args.jobs > 1:
+            # SQLite work is CPU-bound and file copies I/O-bound, so they overlap well
+            with ProcessPoolExecutor(max_workers=min(args.jobs, len(phases))) as pool:
+                futures = [pool.submit(func, *func_args) for func, *func_args in phases]
+                for future in futures:
+                    future.result()
+        else:
+            for func, *func_args in phases:
+                func(*func_args)
 
     logger.info("Migration complete!")
 